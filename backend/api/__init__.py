@@ -19,6 +19,16 @@ def create_app(config_class=Config):
         doc='/api/docs'
     )
 
+    # Optional per-request breakdown of ML stage timings
+    from utils import stage_timing
+    stage_timing.init_app(app)
+
+    # Keep the ML feature store and patient baselines in sync with clinical writes
+    from services.feature_store import feature_store
+    from services.baseline_store import baseline_store
+    feature_store.register_listeners()
+    baseline_store.register_listeners()
+
     # Import and register namespaces
     from .auth import api as auth_ns
     from .users import api as users_ns
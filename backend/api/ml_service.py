@@ -1,16 +1,33 @@
-from flask import request
-from flask_restx import Namespace, Resource, fields
+from flask import request, Response, stream_with_context, url_for
+from flask_restx import Namespace, Resource, fields, marshal
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.patient import Patient
 from models.vital_sign import VitalSign
 from models.medical_record import MedicalRecord
+from models.user import User
 from utils.decorators import professional_required
-from utils.ml_utils import load_model, preprocess_data
+from utils.ml_utils import (
+    get_served_version, load_model, load_compiled_model, load_pipeline, build_prediction_features,
+    build_anomaly_detection_features, top_contributors, tree_intervals, tree_agreement, VITAL_SIGN_FIELDS
+)
+from utils.tree_compiler import compiled_view
+from utils.stage_timing import StageTimer
+from __init__ import db
+from config import Config
+from services.feature_store import feature_store
+from services.baseline_store import baseline_store
+from services.job_queue import job_manager, JobQueueFull
+from services.shadow import shadow_evaluator
 import numpy as np
+import json
+import logging
+import uuid
 from datetime import datetime, timedelta
 import joblib
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
 api = Namespace('ml-service', description='Machine Learning service operations')
 
 # Models
@@ -19,11 +36,17 @@ risk_assessment_model = api.model('RiskAssessment', {
     'risk_level': fields.String(description='Overall risk level'),
     'risk_factors': fields.List(fields.String, description='Identified risk factors'),
     'recommendations': fields.List(fields.String, description='Health recommendations'),
-    'confidence_score': fields.Float(description='Model confidence score'),
+    'confidence_score': fields.Float(description='Share of trees agreeing with the risk level'),
+    'confidence_interval': fields.List(fields.Float, description='Spread across trees of the risk level probability'),
     'assessment_date': fields.DateTime(description='Assessment timestamp'),
     'next_assessment_date': fields.DateTime(description='Next assessment due date')
 })
 
+risk_assessment_batch_request = api.model('RiskAssessmentBatchRequest', {
+    'patient_ids': fields.List(fields.String, description='Patients to assess'),
+    'filter': fields.Raw(description='Select patients by primary_physician_id and/or medical_condition')
+})
+
 health_prediction_model = api.model('HealthPrediction', {
     'patient_id': fields.String(required=True, description='Patient ID'),
     'prediction_type': fields.String(required=True, description='Type of prediction'),
@@ -43,16 +66,33 @@ anomaly_detection_model = api.model('AnomalyDetection', {
     'recommended_actions': fields.List(fields.String, description='Recommended actions')
 })
 
+job_model = api.model('MLJob', {
+    'job_id': fields.String(description='Job ID'),
+    'job_type': fields.String(description='ML operation the job runs'),
+    'status': fields.String(description='queued, running, succeeded or failed'),
+    'error': fields.String(description='Error message of a failed job'),
+    'submitted_at': fields.DateTime(description='Submission timestamp'),
+    'started_at': fields.DateTime(description='Start timestamp'),
+    'finished_at': fields.DateTime(description='Completion timestamp'),
+    'result_url': fields.String(description='Where to fetch the result')
+})
+
+async_parser = api.parser()
+async_parser.add_argument('async', type=str, location='args',
+                          help='Set to true to run as a background job and return its ID')
+
 @api.route('/risk-assessment')
 class RiskAssessment(Resource):
     @jwt_required()
-    @api.marshal_with(risk_assessment_model)
+    @api.expect(async_parser)
+    @api.response(200, 'Success', risk_assessment_model)
+    @api.response(202, 'Job submitted', job_model)
     @api.doc(
         responses={
-            200: 'Success',
             401: 'Unauthorized',
             403: 'Forbidden',
-            404: 'Patient not found'
+            404: 'Patient not found',
+            503: 'Job queue full'
         }
     )
     def post(self):
@@ -65,34 +105,93 @@ class RiskAssessment(Resource):
         if not has_ml_service_access(current_user_id, patient_id):
             api.abort(403, 'Permission denied')
         
+        if is_async_request():
+            return submit_job('risk_assessment', current_user_id, patient_id)
+        
         try:
-            # Load patient data
-            patient_data = gather_patient_data(patient_id)
-            
-            # Load risk assessment model
-            risk_model = load_model('risk_assessment')
-            
-            # Preprocess data
-            processed_data = preprocess_data(patient_data, model_type='risk_assessment')
-            
-            # Generate risk assessment
-            risk_assessment = generate_risk_assessment(risk_model, processed_data)
-            
-            return risk_assessment
-            
+            return run_risk_assessment(patient_id)
+        except LookupError as e:
+            api.abort(404, str(e))
         except Exception as e:
             api.abort(400, f'Error performing risk assessment: {str(e)}')
 
+@api.route('/risk-assessment/batch')
+class RiskAssessmentBatch(Resource):
+    @jwt_required()
+    @professional_required
+    @api.expect(risk_assessment_batch_request)
+    @api.doc(
+        responses={
+            200: 'Success (newline-delimited JSON, one assessment or error per line)',
+            400: 'Validation error',
+            401: 'Unauthorized',
+            403: 'Forbidden'
+        }
+    )
+    def post(self):
+        """Perform risk assessment for a cohort of patients"""
+        current_user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        # Everything that can fail on bad input runs before the 200 is sent
+        try:
+            patient_ids = resolve_cohort(data)
+        except ValueError as e:
+            api.abort(400, str(e))
+        if not patient_ids:
+            api.abort(400, 'Provide patient_ids or a filter matching at least one patient')
+        if len(patient_ids) > Config.COHORT_MAX_PATIENTS:
+            api.abort(400, f'At most {Config.COHORT_MAX_PATIENTS} patients can be assessed per request')
+        
+        # Check access rights for the whole cohort at once
+        allowed_ids = filter_ml_service_access(current_user_id, patient_ids)
+        
+        try:
+            # One model version for the whole cohort
+            version = get_served_version()
+            risk_model = load_compiled_model('risk_assessment', version)
+            pipeline = load_pipeline('risk_assessment', version)
+        except Exception as e:
+            api.abort(400, f'Error performing risk assessment: {str(e)}')
+        
+        def generate():
+            for patient_id in patient_ids:
+                if patient_id not in allowed_ids:
+                    yield json.dumps({'patient_id': patient_id, 'error': 'Permission denied'}) + '\n'
+            
+            permitted = [patient_id for patient_id in patient_ids if patient_id in allowed_ids]
+            for start in range(0, len(permitted), Config.COHORT_BATCH_SIZE):
+                chunk = permitted[start:start + Config.COHORT_BATCH_SIZE]
+                try:
+                    assessments = assess_cohort_chunk(risk_model, pipeline, chunk)
+                except Exception as e:
+                    # The status line is already sent, so the failure is reported in
+                    # the stream and the remaining chunks are still assessed
+                    db.session.rollback()
+                    logger.error(f"Error assessing cohort chunk: {str(e)}", exc_info=True)
+                    yield json.dumps({
+                        'patient_ids': chunk,
+                        'error': f'Error performing risk assessment: {str(e)}'
+                    }) + '\n'
+                    continue
+                
+                for assessment in assessments:
+                    yield json.dumps(assessment, default=str) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @api.route('/health-prediction')
 class HealthPrediction(Resource):
     @jwt_required()
-    @api.marshal_with(health_prediction_model)
+    @api.expect(async_parser)
+    @api.response(200, 'Success', health_prediction_model)
+    @api.response(202, 'Job submitted', job_model)
     @api.doc(
         responses={
-            200: 'Success',
             401: 'Unauthorized',
             403: 'Forbidden',
-            404: 'Patient not found'
+            404: 'Patient not found',
+            503: 'Job queue full'
         }
     )
     def post(self):
@@ -106,34 +205,26 @@ class HealthPrediction(Resource):
         if not has_ml_service_access(current_user_id, patient_id):
             api.abort(403, 'Permission denied')
         
+        if is_async_request():
+            return submit_job('health_prediction', current_user_id, patient_id, prediction_type)
+        
         try:
-            # Load patient data
-            patient_data = gather_patient_data(patient_id)
-            
-            # Load prediction model
-            prediction_model = load_model(f'health_prediction_{prediction_type}')
-            
-            # Preprocess data
-            processed_data = preprocess_data(patient_data, model_type='health_prediction')
-            
-            # Generate predictions
-            predictions = generate_health_predictions(prediction_model, processed_data, prediction_type)
-            
-            return predictions
-            
+            return run_health_prediction(patient_id, prediction_type)
         except Exception as e:
             api.abort(400, f'Error generating health predictions: {str(e)}')
 
 @api.route('/anomaly-detection')
 class AnomalyDetection(Resource):
     @jwt_required()
-    @api.marshal_with(anomaly_detection_model)
+    @api.expect(async_parser)
+    @api.response(200, 'Success', anomaly_detection_model)
+    @api.response(202, 'Job submitted', job_model)
     @api.doc(
         responses={
-            200: 'Success',
             401: 'Unauthorized',
             403: 'Forbidden',
-            404: 'Patient not found'
+            404: 'Patient not found',
+            503: 'Job queue full'
         }
     )
     def post(self):
@@ -146,31 +237,174 @@ class AnomalyDetection(Resource):
         if not has_ml_service_access(current_user_id, patient_id):
             api.abort(403, 'Permission denied')
         
+        if is_async_request():
+            return submit_job('anomaly_detection', current_user_id, patient_id)
+        
         try:
-            # Load patient data
-            patient_data = gather_patient_data(patient_id)
-            
-            # Load anomaly detection model
-            anomaly_model = load_model('anomaly_detection')
-            
-            # Preprocess data
-            processed_data = preprocess_data(patient_data, model_type='anomaly_detection')
-            
-            # Detect anomalies
-            anomalies = detect_health_anomalies(anomaly_model, processed_data)
-            
-            return anomalies
-            
+            return run_anomaly_detection(patient_id)
         except Exception as e:
             api.abort(400, f'Error detecting anomalies: {str(e)}')
 
+@api.route('/jobs/<job_id>', endpoint='ml_job')
+class MLJob(Resource):
+    @jwt_required()
+    @api.marshal_with(job_model)
+    @api.doc(
+        responses={
+            200: 'Success',
+            401: 'Unauthorized',
+            404: 'Job not found or expired'
+        }
+    )
+    def get(self, job_id):
+        """Get the status of an ML job"""
+        job = get_owned_job(job_id, get_jwt_identity())
+        return job_status(job)
+
+@api.route('/jobs/<job_id>/result', endpoint='ml_job_result')
+class MLJobResult(Resource):
+    @jwt_required()
+    @api.doc(
+        responses={
+            200: 'Job result',
+            202: 'Job not finished yet',
+            401: 'Unauthorized',
+            404: 'Job not found or expired',
+            500: 'Job failed'
+        }
+    )
+    def get(self, job_id):
+        """Get the result of a finished ML job"""
+        job = get_owned_job(job_id, get_jwt_identity())
+        
+        if not job.done:
+            return marshal(job_status(job), job_model), 202
+        if job.error is not None:
+            api.abort(500, f'Job failed: {job.error}')
+        
+        return job.result
+
+def run_risk_assessment(patient_id):
+    """Assess a patient's health risk and return the serialized assessment"""
+    # Read the patient's incrementally maintained features
+    with StageTimer('db', model='risk_assessment'):
+        features = feature_store.get_features(patient_id)
+        # Save rows the read rebuilt
+        db.session.commit()
+    if features is None:
+        raise LookupError('Patient not found')
+    
+    # Load risk assessment model and its pipeline from the same version
+    with StageTimer('load_model', model='risk_assessment'):
+        version = get_served_version()
+        risk_model = load_compiled_model('risk_assessment', version)
+        pipeline = load_pipeline('risk_assessment', version)
+    
+    # Preprocess data
+    with StageTimer('preprocess', model='risk_assessment'):
+        processed_data = pipeline.transform(features)
+    
+    # Generate risk assessment
+    risk_assessment = generate_risk_assessment(risk_model, processed_data, patient_id, pipeline.feature_names,
+                                               features)
+    
+    return marshal(risk_assessment, risk_assessment_model)
+
+def run_health_prediction(patient_id, prediction_type):
+    """Predict a patient's health values and return the serialized predictions"""
+    model_name = f'health_prediction_{prediction_type}'
+    
+    # Load patient data
+    with StageTimer('db', model=model_name):
+        patient_data = gather_patient_data(patient_id)
+    
+    # Load prediction model and its pipeline from the same version
+    with StageTimer('load_model', model=model_name):
+        version = get_served_version()
+        prediction_model = load_model(model_name, version)
+        pipeline = load_pipeline(model_name, version)
+        intervals = load_model(f'{model_name}_intervals', version)
+    
+    # Preprocess data
+    with StageTimer('preprocess', model=model_name):
+        features = build_prediction_features(patient_data)
+        processed_data = pipeline.transform(features)
+    
+    # Generate predictions
+    predictions = generate_health_predictions(
+        prediction_model, processed_data, prediction_type, patient_id, pipeline.feature_names, features, intervals
+    )
+    
+    return marshal(predictions, health_prediction_model)
+
+def run_anomaly_detection(patient_id):
+    """Detect anomalies in a patient's data and return the serialized result"""
+    # Load patient data
+    with StageTimer('db', model='anomaly_detection'):
+        patient_data = gather_patient_data(patient_id)
+    
+    # Load anomaly detection model and its pipeline from the same version
+    with StageTimer('load_model', model='anomaly_detection'):
+        version = get_served_version()
+        anomaly_model = load_compiled_model('anomaly_detection', version)
+        pipeline = load_pipeline('anomaly_detection', version)
+    
+    # Preprocess data
+    with StageTimer('preprocess', model='anomaly_detection'):
+        features = build_anomaly_detection_features(patient_data)
+        processed_data = pipeline.transform(features)
+    
+    # Detect anomalies
+    anomalies = detect_health_anomalies(anomaly_model, processed_data, patient_id, features)
+    
+    return marshal(anomalies, anomaly_detection_model)
+
+# Operations the job workers can run for asynchronous requests
+job_manager.register('risk_assessment', run_risk_assessment)
+job_manager.register('health_prediction', run_health_prediction)
+job_manager.register('anomaly_detection', run_anomaly_detection)
+
+def is_async_request():
+    """Check whether the caller asked for a background job"""
+    return request.args.get('async', '').lower() in ('1', 'true', 'yes')
+
+def submit_job(job_type, user_id, *args):
+    """Queue an ML operation for the job workers and describe the submitted job"""
+    try:
+        job = job_manager.submit(job_type, *[str(arg) for arg in args], owner_id=str(user_id))
+    except JobQueueFull as e:
+        api.abort(503, str(e))
+    
+    return marshal(job_status(job), job_model), 202, {'Location': url_for('ml_job', job_id=job.id)}
+
+def get_owned_job(job_id, user_id):
+    """Get a job submitted by the user, hiding everyone else's"""
+    job = job_manager.get(job_id)
+    if job is None or job.owner_id != str(user_id):
+        api.abort(404, 'Job not found or expired')
+    return job
+
+def job_status(job):
+    """Describe a job together with the location of its result"""
+    status = job.to_dict()
+    status['result_url'] = url_for('ml_job_result', job_id=job.id)
+    return status
+
 def gather_patient_data(patient_id):
     """Gather all relevant patient data for ML processing"""
     patient = Patient.query.get_or_404(patient_id)
     
-    # Gather vital signs
-    vital_signs = VitalSign.query.filter_by(patient_id=patient_id)\
-        .order_by(VitalSign.measurement_time.desc())\
+    # The full-history aggregates risk assessments and training exports use
+    vital_sign_features = feature_store.get_vital_sign_features(patient.id)
+    # Save rows the read rebuilt
+    db.session.commit()
+    
+    # Gather the recent vital sign series as plain columns, without hydrating ORM objects
+    vital_signs = db.session.query(VitalSign.recorded_at, *[
+            getattr(VitalSign, field) for field in VITAL_SIGN_FIELDS
+        ])\
+        .filter(VitalSign.patient_id == patient_id)\
+        .order_by(VitalSign.recorded_at.desc())\
         .limit(100)\
         .all()
     
@@ -182,56 +416,158 @@ def gather_patient_data(patient_id):
     # Transform data into ML-ready format
     data = {
         'patient_info': patient.to_dict(),
-        'vital_signs': [v.to_dict() for v in vital_signs],
+        'vital_sign_features': vital_sign_features,
+        'baseline_features': baseline_store.get_features(patient.id),
+        'vital_signs': [row._asdict() for row in vital_signs],
         'medical_records': [r.to_dict() for r in medical_records]
     }
     
     return data
 
-def generate_risk_assessment(model, data):
+def generate_risk_assessment(model, data, patient_id, feature_names, features):
     """Generate health risk assessment"""
     # Perform risk assessment using the model
-    risk_scores = model.predict_proba(data)[0]
-    risk_factors = identify_risk_factors(model, data)
+    risk_scores, confidence = score_risk(model, data, features)
+    with StageTimer('risk_factors', model='risk_assessment'):
+        risk_factors = identify_risk_factors(model, data, risk_scores, feature_names)[0]
+    
+    return build_risk_assessment(patient_id, risk_scores[0], model.classes_, risk_factors,
+                                 confidence['score'][0], confidence['interval'][0])
+
+def score_risk(model, data, features):
+    """Class probabilities and their spread across trees from one walk of the forest
+    
+    ``features`` are the unscaled rows of ``data``, replayed through shadowed
+    candidate versions with their own pipelines.
+    """
+    with StageTimer('predict', model='risk_assessment') as predict_timer:
+        forest = compiled_view(model)
+        per_tree = forest.per_tree_proba(data)
+        risk_scores = forest.proba_from_trees(per_tree)
+    shadow_evaluator.submit('risk_assessment', 'predict_proba', features, risk_scores, predict_timer.elapsed_ms)
+    
+    # Spread of the predicted class's probability over the (rows x trees) matrix
+    with StageTimer('confidence', model='risk_assessment'):
+        predicted = np.argmax(risk_scores, axis=1)
+        rows = np.arange(len(predicted))
+        lower, upper = tree_intervals(per_tree)
+        confidence = {
+            'score': tree_agreement(per_tree, predicted),
+            'interval': np.stack([lower[rows, predicted], upper[rows, predicted]], axis=1)
+        }
+    
+    return risk_scores, confidence
+
+def build_risk_assessment(patient_id, risk_scores, classes, risk_factors, confidence_score, confidence_interval):
+    """Assemble a risk assessment from one row of class probabilities"""
     recommendations = generate_recommendations(risk_factors)
     
     assessment = {
-        'patient_id': data['patient_info']['id'],
-        'risk_level': determine_risk_level(risk_scores),
+        'patient_id': str(patient_id),
+        'risk_level': determine_risk_level(risk_scores, classes),
         'risk_factors': risk_factors,
         'recommendations': recommendations,
-        'confidence_score': np.max(risk_scores),
+        'confidence_score': float(confidence_score),
+        'confidence_interval': [float(bound) for bound in confidence_interval],
         'assessment_date': datetime.utcnow(),
         'next_assessment_date': datetime.utcnow() + timedelta(days=30)
     }
     
     return assessment
 
-def generate_health_predictions(model, data, prediction_type):
+def parse_uuid(value):
+    """Canonical string form of a UUID, or None if the value is not one"""
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
+
+def resolve_cohort(data):
+    """Get the de-duplicated patient IDs named by a batch request
+    
+    Raises ValueError for malformed IDs, so they are rejected before any
+    query runs.
+    """
+    requested_ids = [str(patient_id) for patient_id in data.get('patient_ids') or []]
+    invalid_ids = [patient_id for patient_id in requested_ids if parse_uuid(patient_id) is None]
+    if invalid_ids:
+        raise ValueError(f"Invalid patient IDs: {', '.join(invalid_ids[:10])}")
+    patient_ids = [parse_uuid(patient_id) for patient_id in requested_ids]
+    
+    cohort_filter = data.get('filter')
+    if cohort_filter:
+        query = db.session.query(Patient.id)
+        if cohort_filter.get('primary_physician_id'):
+            physician_id = parse_uuid(cohort_filter['primary_physician_id'])
+            if physician_id is None:
+                raise ValueError('Invalid primary_physician_id')
+            query = query.filter(Patient.primary_physician_id == uuid.UUID(physician_id))
+        if cohort_filter.get('medical_condition'):
+            query = query.filter(Patient.medical_conditions.any(cohort_filter['medical_condition']))
+        patient_ids.extend(str(row.id) for row in query.limit(Config.COHORT_MAX_PATIENTS + 1))
+    
+    return list(dict.fromkeys(patient_ids))
+
+def assess_cohort_chunk(model, pipeline, patient_ids):
+    """Assess a chunk of patients with one set-based fetch and one model pass"""
+    with StageTimer('db', model='risk_assessment'):
+        features = feature_store.get_features_many(patient_ids)
+        # Save rows the read rebuilt
+        db.session.commit()
+    
+    found_ids = [patient_id for patient_id in patient_ids if patient_id in features]
+    assessments = [
+        {'patient_id': patient_id, 'error': 'Patient not found'}
+        for patient_id in patient_ids if patient_id not in features
+    ]
+    if not found_ids:
+        return assessments
+    
+    with StageTimer('preprocess', model='risk_assessment'):
+        rows = [features[patient_id] for patient_id in found_ids]
+        X = pipeline.transform(rows)
+    risk_scores, confidence = score_risk(model, X, rows)
+    
+    with StageTimer('risk_factors', model='risk_assessment'):
+        risk_factors = identify_risk_factors(model, X, risk_scores, pipeline.feature_names)
+    
+    for index, patient_id in enumerate(found_ids):
+        assessments.append(
+            build_risk_assessment(patient_id, risk_scores[index], model.classes_, risk_factors[index],
+                                  confidence['score'][index], confidence['interval'][index])
+        )
+    
+    return assessments
+
+def generate_health_predictions(model, data, prediction_type, patient_id, feature_names, features, intervals):
     """Generate health predictions"""
     # Generate predictions using the model
-    predicted_values = model.predict(data)
-    confidence = model.predict_proba(data)
+    model_name = f'health_prediction_{prediction_type}'
+    with StageTimer('predict', model=model_name) as predict_timer:
+        predicted_values = model.predict(data)
+    shadow_evaluator.submit(model_name, 'predict', features, predicted_values, predict_timer.elapsed_ms)
     
     prediction = {
-        'patient_id': data['patient_info']['id'],
+        'patient_id': str(patient_id),
         'prediction_type': prediction_type,
         'predicted_values': predicted_values.tolist(),
-        'confidence_intervals': calculate_confidence_intervals(predicted_values, confidence),
+        'confidence_intervals': calculate_confidence_intervals(predicted_values, intervals),
         'prediction_horizon': '30 days',
-        'factors_considered': list(data.columns)
+        'factors_considered': list(feature_names)
     }
     
     return prediction
 
-def detect_health_anomalies(model, data):
+def detect_health_anomalies(model, data, patient_id, features):
     """Detect health anomalies"""
     # Detect anomalies using the model
-    anomaly_scores = model.predict(data)
+    with StageTimer('predict', model='anomaly_detection') as predict_timer:
+        anomaly_scores = model.predict(data)
+    shadow_evaluator.submit('anomaly_detection', 'predict', features, anomaly_scores, predict_timer.elapsed_ms)
     anomalies = identify_anomalies(data, anomaly_scores)
     
     result = {
-        'patient_id': data['patient_info']['id'],
+        'patient_id': patient_id,
         'anomaly_type': anomalies['type'] if anomalies else None,
         'severity': determine_severity(anomaly_scores),
         'detected_values': anomalies['values'] if anomalies else None,
@@ -259,26 +595,52 @@ def has_ml_service_access(user_id, patient_id):
     
     return False
 
+def filter_ml_service_access(user_id, patient_ids):
+    """Get the subset of patient IDs the user may run ML services for"""
+    user = User.query.get(user_id)
+    
+    if user.user_type in ('admin', 'professional'):
+        # Same policy as has_ml_service_access
+        return set(patient_ids)
+    
+    if user.user_type == 'patient':
+        patient = Patient.query.filter_by(user_id=user_id).first()
+        return {str(patient.id)} & set(patient_ids) if patient else set()
+    
+    return set()
+
 # Helper functions for ML operations
-def identify_risk_factors(model, data):
+def identify_risk_factors(model, data, risk_scores, feature_names, top_k=Config.RISK_FACTOR_TOP_K):
     """Identify health risk factors"""
-    # Implementation for risk factor identification
-    pass
+    # Path-based contributions of each feature toward each row's predicted risk level
+    contributions = compiled_view(model).contributions(data)
+    predicted = np.argmax(risk_scores, axis=1)
+    toward_predicted = contributions[np.arange(len(predicted)), :, predicted]
+    
+    return top_contributors(toward_predicted, feature_names, top_k)
 
 def generate_recommendations(risk_factors):
     """Generate health recommendations"""
     # Implementation for recommendation generation
     pass
 
-def determine_risk_level(risk_scores):
+def determine_risk_level(risk_scores, classes):
     """Determine overall risk level"""
-    # Implementation for risk level determination
-    pass
+    # The most probable class label of the risk assessment model
+    return str(classes[int(np.argmax(risk_scores))])
 
-def calculate_confidence_intervals(predictions, confidence):
+def calculate_confidence_intervals(predictions, intervals):
     """Calculate confidence intervals for predictions"""
-    # Implementation for confidence interval calculation
-    pass
+    # Boosted trees are additive corrections rather than independent estimates,
+    # so intervals come from holdout residual quantiles saved at training
+    lower_offset, upper_offset = intervals['residual_quantiles']
+    predictions = np.asarray(predictions, dtype=np.float64)
+    
+    return {
+        'level': intervals['level'],
+        'lower': (predictions + lower_offset).tolist(),
+        'upper': (predictions + upper_offset).tolist()
+    }
 
 def identify_anomalies(data, anomaly_scores):
     """Identify specific health anomalies"""
@@ -3,9 +3,18 @@ from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.vital_sign import VitalSign
 from models.patient import Patient
+from models.user import User
+from models.emergency_alert import EmergencyAlert
+from services.anomaly_stream import anomaly_stream
+from utils.ml_utils import vital_sign_measurements
+from config import Config
+from __init__ import db
 from utils.decorators import professional_required
 from utils.pagination import paginate
 from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
 
 api = Namespace('vital-signs', description='Vital signs operations')
 
@@ -78,7 +87,7 @@ class VitalSignList(Resource):
             query = query.filter(VitalSign.is_abnormal == (is_abnormal.lower() == 'true'))
         
         return paginate(query.order_by(VitalSign.measurement_time.desc()))
-
+    
     @jwt_required()
     @api.expect(vital_sign_model)
     @api.marshal_with(vital_sign_model)
@@ -119,12 +128,15 @@ class VitalSignList(Resource):
             db.session.add(vital_sign)
             db.session.commit()
             
+            # Score the new reading against the patient's rolling window
+            anomaly = anomaly_stream.observe(vital_sign) if Config.ANOMALY_STREAM_ENABLED else None
+            
             # Check for abnormal values and trigger alerts if necessary
-            if vital_sign.is_abnormal:
-                trigger_vital_sign_alert(vital_sign)
+            if vital_sign.is_abnormal or (anomaly and anomaly['is_anomaly']):
+                trigger_vital_sign_alert(vital_sign, anomaly)
             
             return vital_sign, 201
-            
+        
         except Exception as e:
             db.session.rollback()
             api.abort(400, f'Error recording vital sign: {str(e)}')
@@ -149,7 +161,7 @@ class VitalSignDetail(Resource):
             api.abort(403, 'Permission denied')
         
         return vital_sign
-
+    
     @jwt_required()
     @api.expect(vital_sign_model)
     @api.marshal_with(vital_sign_model)
@@ -185,7 +197,7 @@ class VitalSignDetail(Resource):
                 trigger_vital_sign_alert(vital_sign)
             
             return vital_sign
-            
+        
         except Exception as e:
             db.session.rollback()
             api.abort(400, f'Error updating vital sign: {str(e)}')
@@ -316,7 +328,35 @@ def has_vital_sign_access(user_id, patient_id):
     
     return False
 
-def trigger_vital_sign_alert(vital_sign):
+def trigger_vital_sign_alert(vital_sign, anomaly=None):
     """Trigger alerts for abnormal vital signs"""
-    # Implementation for alert system
-    pass
+    measurements = dict(vital_sign_measurements(vital_sign))
+    if anomaly and anomaly['is_anomaly']:
+        description = f"Anomalous vital signs detected (anomaly score {anomaly['score']:.3f})"
+        severity = anomaly['severity']
+    else:
+        description = 'Vital signs outside normal ranges'
+        severity = 'medium'
+    
+    try:
+        if not anomaly_stream.should_alert(vital_sign.patient_id):
+            # Release the patient row locked by the cooldown check
+            db.session.rollback()
+            return None
+        
+        alert = EmergencyAlert(
+            patient_id=vital_sign.patient_id,
+            alert_type='medical',
+            description=description,
+            severity=severity,
+            vital_signs=measurements
+        )
+        db.session.add(alert)
+        db.session.commit()
+    except Exception as e:
+        # The reading is already stored; a failed alert must not reject it
+        db.session.rollback()
+        logger.error(f'Error creating vital sign alert: {str(e)}')
+        return None
+    
+    return alert
@@ -1,9 +1,13 @@
-from flask import Flask, request
+from flask import Flask, jsonify, request
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, jwt_required
 from datetime import timedelta
 import os
 from models import db
+from services.model_runtime import is_ready, start_background_threads, start_warmup
+from services.shadow import shadow_evaluator
+from utils.metrics import metrics
+from utils import stage_timing
 from routes.auth import auth_bp
 from routes.health_data import health_data_bp
 from routes.predictions import predictions_bp
@@ -39,6 +43,9 @@ def create_app():
              }
          })
     
+    # Optional per-request breakdown of ML stage timings
+    stage_timing.init_app(app)
+    
     # Register blueprints with URL prefixes
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(health_data_bp, url_prefix='/api/health-records')
@@ -49,6 +56,31 @@ def create_app():
     with app.app_context():
         db.create_all()
     
+    # Model warmup and registry watcher threads are started in the serving
+    # process, never in a preloading gunicorn master they would not survive
+    @app.before_request
+    def ensure_background_threads():
+        start_background_threads()
+    
+    @app.route('/api/ready')
+    def readiness():
+        ready = is_ready()
+        if not ready:
+            # Workers that do not warm up on startup load and warm the models
+            # on the first probe, so they still become ready without traffic
+            start_warmup()
+        return jsonify({"ml_ready": ready}), 200 if ready else 503
+    
+    @app.route('/api/metrics')
+    @jwt_required()
+    def get_metrics():
+        return jsonify(metrics.snapshot()), 200
+    
+    @app.route('/api/metrics/shadow')
+    @jwt_required()
+    def get_shadow_metrics():
+        return jsonify(shadow_evaluator.stats()), 200
+    
     @app.after_request
     def after_request(response):
         if request.method == 'OPTIONS':
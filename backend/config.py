@@ -19,6 +19,58 @@ class Config:
     
     # ML Model Configuration
     MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'ml_models')
+    INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'tensorflow')  # 'tensorflow' or 'numpy'
+    ML_DEFAULT_RISK_MODELS = os.getenv('ML_DEFAULT_RISK_MODELS', 'true').lower() == 'true'  # untrained stand-ins when MODEL_PATH has none
+    ML_WARMUP_ON_STARTUP = os.getenv('ML_WARMUP_ON_STARTUP', 'false').lower() == 'true'
+    FUSED_INFERENCE = os.getenv('FUSED_INFERENCE', 'true').lower() == 'true'
+    MODEL_VERSION = os.getenv('MODEL_VERSION', '1.0.0')
+    MODEL_REGISTRY_PATH = os.getenv('MODEL_REGISTRY_PATH', os.path.join(MODEL_PATH, 'registry'))
+    MODEL_REGISTRY_POLL_INTERVAL = float(os.getenv('MODEL_REGISTRY_POLL_INTERVAL', '30'))  # seconds, 0 disables
+    MODEL_CACHE_MAX_MB = int(os.getenv('MODEL_CACHE_MAX_MB', '1024'))
+    MODEL_CACHE_CHECK_INTERVAL = float(os.getenv('MODEL_CACHE_CHECK_INTERVAL', '10'))  # seconds
+    MODEL_MMAP_MODE = os.getenv('MODEL_MMAP_MODE', 'r')  # empty string disables memory mapping
+    COMPILED_TREES = os.getenv('COMPILED_TREES', 'true').lower() == 'true'
+    MODEL_PRELOAD = os.getenv('MODEL_PRELOAD', 'true').lower() == 'true'
+    PREDICTION_CACHE_ENABLED = os.getenv('PREDICTION_CACHE_ENABLED', 'true').lower() == 'true'
+    PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '1024'))
+    PREDICTION_CACHE_TTL = float(os.getenv('PREDICTION_CACHE_TTL', '300'))  # seconds
+    COHORT_BATCH_SIZE = int(os.getenv('COHORT_BATCH_SIZE', '256'))
+    COHORT_MAX_PATIENTS = int(os.getenv('COHORT_MAX_PATIENTS', '5000'))
+    ML_JOB_POLL_INTERVAL = float(os.getenv('ML_JOB_POLL_INTERVAL', '1'))  # seconds an idle job worker waits
+    ML_JOB_MAX_PENDING = int(os.getenv('ML_JOB_MAX_PENDING', '100'))
+    ML_JOB_RESULT_TTL = float(os.getenv('ML_JOB_RESULT_TTL', '3600'))  # seconds
+    ML_JOB_LEASE = float(os.getenv('ML_JOB_LEASE', '900'))  # seconds before a running job counts as abandoned
+    ML_JOB_MAX_ATTEMPTS = int(os.getenv('ML_JOB_MAX_ATTEMPTS', '2'))
+    ANOMALY_STREAM_ENABLED = os.getenv('ANOMALY_STREAM_ENABLED', 'true').lower() == 'true'
+    ANOMALY_WINDOW_SIZE = int(os.getenv('ANOMALY_WINDOW_SIZE', '20'))  # readings per measurement type
+    ANOMALY_MIN_READINGS = int(os.getenv('ANOMALY_MIN_READINGS', '5'))
+    ANOMALY_STREAM_MAX_PATIENTS = int(os.getenv('ANOMALY_STREAM_MAX_PATIENTS', '10000'))
+    ANOMALY_ALERT_COOLDOWN = float(os.getenv('ANOMALY_ALERT_COOLDOWN', '900'))  # seconds
+    BASELINE_EWMA_ALPHA = float(os.getenv('BASELINE_EWMA_ALPHA', '0.1'))
+    BASELINE_MIN_COUNT = int(os.getenv('BASELINE_MIN_COUNT', '10'))  # readings before a baseline is used
+    BASELINE_Z_THRESHOLD = float(os.getenv('BASELINE_Z_THRESHOLD', '3.0'))
+    RISK_FACTOR_TOP_K = int(os.getenv('RISK_FACTOR_TOP_K', '5'))
+    RISK_FACTOR_ATTRIBUTIONS = os.getenv('RISK_FACTOR_ATTRIBUTIONS', 'true').lower() == 'true'
+    CONFIDENCE_INTERVAL_LEVEL = float(os.getenv('CONFIDENCE_INTERVAL_LEVEL', '0.9'))
+    SHADOW_MODEL_VERSION = os.getenv('SHADOW_MODEL_VERSION')  # registry version replayed in shadow mode
+    SHADOW_SAMPLE_RATE = float(os.getenv('SHADOW_SAMPLE_RATE', '0.05'))  # fraction of live requests replayed
+    SHADOW_WORKERS = int(os.getenv('SHADOW_WORKERS', '1'))
+    SHADOW_MAX_PENDING = int(os.getenv('SHADOW_MAX_PENDING', '50'))
+    TRAINING_SEARCH_MODE = os.getenv('TRAINING_SEARCH_MODE', 'halving')  # 'halving' or 'grid'
+    TRAINING_PARALLEL = os.getenv('TRAINING_PARALLEL', 'true').lower() == 'true'
+    TRAINING_THREADS = int(os.getenv('TRAINING_THREADS', '0'))  # CPU threads shared by training jobs, 0 for all
+    TRAINING_EXPORT_PATH = os.getenv('TRAINING_EXPORT_PATH', os.path.join('data', 'export'))
+    TRAINING_EXPORT_BATCH_SIZE = int(os.getenv('TRAINING_EXPORT_BATCH_SIZE', '1000'))  # patients per part file
+    TRAINING_EXPORT_LAG = float(os.getenv('TRAINING_EXPORT_LAG', '60'))  # seconds the watermark trails the clock
+    ANOMALY_TRAINING_MAX_ROWS = int(os.getenv('ANOMALY_TRAINING_MAX_ROWS', '200000'))  # rows sampled for the isolation forest
+    RETRAIN_DRIFT_THRESHOLD = float(os.getenv('RETRAIN_DRIFT_THRESHOLD', '0.5'))  # mean shift in std units forcing a full refit
+    RETRAIN_HOLDOUT_TOLERANCE = float(os.getenv('RETRAIN_HOLDOUT_TOLERANCE', '0.01'))  # allowed drop vs. the current model
+    RETRAIN_WARM_START_FRACTION = float(os.getenv('RETRAIN_WARM_START_FRACTION', '0.2'))  # share of trees or rounds added
+    RETRAIN_MAX_TREES = int(os.getenv('RETRAIN_MAX_TREES', '1000'))  # forest size that forces a full refit
+    STAGE_TIMING_HEADER = os.getenv('STAGE_TIMING_HEADER', 'false').lower() == 'true'  # per-request Server-Timing breakdown
+    INFERENCE_BATCHING = os.getenv('INFERENCE_BATCHING', 'true').lower() == 'true'
+    INFERENCE_BATCH_MAX_SIZE = int(os.getenv('INFERENCE_BATCH_MAX_SIZE', '32'))
+    INFERENCE_BATCH_WINDOW_MS = float(os.getenv('INFERENCE_BATCH_WINDOW_MS', '5'))
     
     # Security Configuration
     BCRYPT_LOG_ROUNDS = 13
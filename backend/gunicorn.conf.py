@@ -0,0 +1,30 @@
+import multiprocessing
+import os
+from config import Config
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Import the app once in the master so that models loaded there are shared
+# copy-on-write with every forked worker instead of being loaded N times.
+preload_app = Config.MODEL_PRELOAD
+
+def when_ready(server):
+    """Load models in the master process before workers are forked"""
+    if not Config.MODEL_PRELOAD:
+        return
+    
+    from utils.ml_utils import preload_models
+    loaded = preload_models()
+    server.log.info(f"Preloaded models: {', '.join(loaded) or 'none'}")
+    
+    # TensorFlow is not fork-safe, so only the NumPy backend is preloaded
+    if Config.INFERENCE_BACKEND == 'numpy':
+        from services.model_runtime import warmup
+        warmup()
+        server.log.info("Preloaded NumPy health risk models")
+
+def post_fork(server, worker):
+    """Start the per-process model threads, which are not inherited from the master"""
+    from services.model_runtime import start_background_threads
+    start_background_threads()
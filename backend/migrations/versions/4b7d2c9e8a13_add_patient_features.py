@@ -0,0 +1,34 @@
+"""Add patient_features table
+
+Revision ID: 4b7d2c9e8a13
+Revises: 1e801fbc3d91
+Create Date: 2026-10-17 09:12:31.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '4b7d2c9e8a13'
+down_revision = '1e801fbc3d91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('patient_features',
+    sa.Column('patient_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('patient_info', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('vital_stats', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('diagnosis_codes', postgresql.ARRAY(sa.String()), nullable=False),
+    sa.Column('last_record_date', sa.DateTime(), nullable=True),
+    sa.Column('is_stale', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('patient_id')
+    )
+
+
+def downgrade():
+    op.drop_table('patient_features')
@@ -0,0 +1,36 @@
+"""Add patient_baselines table
+
+Revision ID: 9c3e5a7f1d24
+Revises: 4b7d2c9e8a13
+Create Date: 2026-10-17 14:05:12.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '9c3e5a7f1d24'
+down_revision = '4b7d2c9e8a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('patient_baselines',
+    sa.Column('patient_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('measurement_type', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('mean', sa.Float(), nullable=False),
+    sa.Column('m2', sa.Float(), nullable=False),
+    sa.Column('ewma', sa.Float(), nullable=True),
+    sa.Column('ewm_var', sa.Float(), nullable=False),
+    sa.Column('last_value', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ),
+    sa.PrimaryKeyConstraint('patient_id', 'measurement_type')
+    )
+
+
+def downgrade():
+    op.drop_table('patient_baselines')
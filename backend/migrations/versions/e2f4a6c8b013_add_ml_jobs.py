@@ -0,0 +1,42 @@
+"""Add ml_jobs table
+
+Revision ID: e2f4a6c8b013
+Revises: 9c3e5a7f1d24
+Create Date: 2026-10-17 16:20:41.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'e2f4a6c8b013'
+down_revision = '9c3e5a7f1d24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ml_jobs',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('job_type', sa.String(length=50), nullable=False),
+    sa.Column('owner_id', sa.String(length=36), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('args', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('submitted_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ml_jobs_status'), 'ml_jobs', ['status'], unique=False)
+    op.create_index(op.f('ix_ml_jobs_expires_at'), 'ml_jobs', ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_ml_jobs_expires_at'), table_name='ml_jobs')
+    op.drop_index(op.f('ix_ml_jobs_status'), table_name='ml_jobs')
+    op.drop_table('ml_jobs')
@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+INTEGER_DTYPES = (np.int8, np.int16, np.int32, np.int64)
+
+class _ColumnScan:
+    """Running summary of one CSV column used to pick its cache dtype"""
+    
+    def __init__(self):
+        self.kind = 'integer'
+        self.min = None
+        self.max = None
+        self.categories = set()
+    
+    def update(self, values):
+        if self.kind != 'categorical' and not (pd.api.types.is_numeric_dtype(values)
+                                               or pd.api.types.is_bool_dtype(values)):
+            # Strings anywhere make the whole column categorical
+            self.kind = 'categorical'
+        if self.kind == 'categorical':
+            return
+        
+        if pd.api.types.is_integer_dtype(values) or pd.api.types.is_bool_dtype(values):
+            # Exact bounds: int64 values beyond 2**53 do not survive float64
+            finite = values.to_numpy(dtype=np.int64)
+        else:
+            values = values.to_numpy(dtype=np.float64)
+            finite = values[np.isfinite(values)]
+            if self.kind == 'integer' and (finite.size != values.size or (finite != np.round(finite)).any()):
+                self.kind = 'float'
+        if finite.size:
+            low, high = finite.min().item(), finite.max().item()
+            self.min = low if self.min is None else min(self.min, low)
+            self.max = high if self.max is None else max(self.max, high)
+    
+    def spec(self, name, index):
+        spec = {'name': name, 'file': f'{index:04d}.npy'}
+        if self.kind == 'categorical':
+            spec['categories'] = sorted(self.categories)
+            spec['dtype'] = 'int16' if len(spec['categories']) < np.iinfo(np.int16).max else 'int32'
+        elif self.kind == 'integer' and self.min is not None:
+            spec['dtype'] = next(
+                np.dtype(dtype).name for dtype in INTEGER_DTYPES
+                if np.iinfo(dtype).min <= self.min and self.max <= np.iinfo(dtype).max
+            )
+        else:
+            spec['dtype'] = 'float32'
+        return spec
+
+def _encode(values, spec):
+    """Convert a chunk of CSV values to the column's cache dtype"""
+    if 'categories' in spec:
+        # Missing values become code -1, as in pandas categoricals
+        return pd.Categorical(values, categories=spec['categories']).codes
+    if np.issubdtype(np.dtype(spec['dtype']), np.integer) and (
+            pd.api.types.is_integer_dtype(values) or pd.api.types.is_bool_dtype(values)):
+        return values.to_numpy().astype(spec['dtype'])
+    return values.to_numpy(dtype=np.float64).astype(spec['dtype'])
+
+class ColumnarDataset:
+    """A training CSV converted once into typed, memory-mapped column arrays.
+    
+    The CSV is parsed in chunks, so conversion needs memory for one chunk
+    rather than the whole file. Integers are stored in the smallest integer
+    type that holds them, other numbers as float32 and strings as category
+    codes. Each column is a ``.npy`` file opened with ``mmap_mode='r'``, so
+    only the pages a caller actually touches are read into memory, and later
+    runs skip CSV parsing entirely. The cache is rebuilt whenever the CSV's
+    size or modification time changes.
+    """
+    
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        with open(os.path.join(cache_path, MANIFEST_NAME)) as f:
+            self.manifest = json.load(f)
+        self.specs = {spec['name']: spec for spec in self.manifest['columns']}
+        self._arrays = {}
+    
+    @classmethod
+    def from_csv(cls, csv_path, cache_dir, chunksize=100000):
+        """Open the cache of ``csv_path`` under ``cache_dir``, converting the CSV if needed"""
+        name = os.path.splitext(os.path.basename(csv_path))[0]
+        cache_path = os.path.join(cache_dir, name)
+        source = os.stat(csv_path)
+        
+        try:
+            dataset = cls(cache_path)
+            if dataset.manifest['source'] == {'size': source.st_size, 'mtime': source.st_mtime}:
+                return dataset
+        except (FileNotFoundError, KeyError, ValueError):
+            pass
+        
+        cls.convert(csv_path, cache_path, chunksize)
+        return cls(cache_path)
+    
+    @staticmethod
+    def convert(csv_path, cache_path, chunksize=100000):
+        """Write the columnar cache of a CSV in chunked passes"""
+        logger.info(f"Converting {csv_path} to a columnar cache at {cache_path}...")
+        source = os.stat(csv_path)
+        
+        # Pass 1: row count and the narrowest dtype of every column
+        scans = {}
+        n_rows = 0
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            n_rows += len(chunk)
+            for name in chunk.columns:
+                scans.setdefault(name, _ColumnScan()).update(chunk[name])
+        
+        # Categories come from the raw text, as a column may only turn out to be textual in a late chunk
+        text_dtypes = {name: str for name, scan in scans.items() if scan.kind == 'categorical'}
+        if text_dtypes:
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize, usecols=list(text_dtypes), dtype=str):
+                for name in text_dtypes:
+                    scans[name].categories.update(chunk[name].dropna().unique())
+        specs = [scan.spec(name, index) for index, (name, scan) in enumerate(scans.items())]
+        
+        # Pass 2: fill preallocated column files, staged so readers never see a partial cache
+        parent = os.path.dirname(os.path.abspath(cache_path))
+        os.makedirs(parent, exist_ok=True)
+        staging_path = tempfile.mkdtemp(dir=parent, prefix=f'.{os.path.basename(cache_path)}-')
+        try:
+            columns = {
+                spec['name']: np.lib.format.open_memmap(
+                    os.path.join(staging_path, spec['file']), mode='w+', dtype=spec['dtype'], shape=(n_rows,)
+                )
+                for spec in specs
+            }
+            offset = 0
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=text_dtypes):
+                for spec in specs:
+                    columns[spec['name']][offset:offset + len(chunk)] = _encode(chunk[spec['name']], spec)
+                offset += len(chunk)
+            for column in columns.values():
+                column.flush()
+            del columns
+            
+            with open(os.path.join(staging_path, MANIFEST_NAME), 'w') as f:
+                json.dump({
+                    'source': {'size': source.st_size, 'mtime': source.st_mtime},
+                    'n_rows': n_rows,
+                    'columns': specs
+                }, f, indent=2)
+            
+            shutil.rmtree(cache_path, ignore_errors=True)
+            os.replace(staging_path, cache_path)
+        except Exception:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+    
+    @property
+    def columns(self):
+        return [spec['name'] for spec in self.manifest['columns']]
+    
+    @property
+    def n_rows(self):
+        return self.manifest['n_rows']
+    
+    def column(self, name):
+        """The stored array of a column, memory-mapped read-only"""
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.cache_path, self.specs[name]['file']), mmap_mode='r')
+        return self._arrays[name]
+    
+    def _series(self, name, rows=None):
+        values = self.column(name) if rows is None else self.column(name)[rows]
+        spec = self.specs[name]
+        if 'categories' in spec:
+            return pd.Categorical.from_codes(values, categories=spec['categories'])
+        return values
+    
+    def values(self, name, rows=None):
+        """A column as a NumPy array, with categories decoded to their labels"""
+        return np.asarray(self._series(name, rows))
+    
+    def to_matrix(self, columns=None, exclude=(), rows=None, dtype=np.float32):
+        """Load columns (all by default) of the rows at index ``rows`` as one 2D array
+        
+        The matrix is filled a column at a time, so it is the only full copy
+        held in memory. Categorical columns hold their codes.
+        """
+        names = [name for name in (columns or self.columns) if name not in exclude]
+        n_rows = self.n_rows if rows is None else len(rows)
+        matrix = np.empty((n_rows, len(names)), dtype=dtype)
+        for index, name in enumerate(names):
+            matrix[:, index] = self.column(name) if rows is None else self.column(name)[rows]
+        return matrix
+    
+    def to_frame(self, columns=None, exclude=(), rows=None):
+        """Load columns (all by default) as a DataFrame in their compact dtypes"""
+        names = [name for name in (columns or self.columns) if name not in exclude]
+        return pd.DataFrame({name: self._series(name, rows) for name in names})
+    
+    def iter_frames(self, batch_size=100000, columns=None, exclude=()):
+        """Yield the dataset in row batches, holding one batch in memory at a time"""
+        for start in range(0, self.n_rows, batch_size):
+            yield self.to_frame(columns, exclude, rows=slice(start, start + batch_size))
+    
+    def sample(self, n_rows, random_state=None, columns=None, exclude=()):
+        """Load a uniform random subset of rows, in file order"""
+        if n_rows >= self.n_rows:
+            return self.to_frame(columns, exclude)
+        rows = np.sort(np.random.default_rng(random_state).choice(self.n_rows, n_rows, replace=False))
+        return self.to_frame(columns, exclude, rows=rows)
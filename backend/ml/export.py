@@ -0,0 +1,162 @@
+import csv
+import glob
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta
+import pandas as pd
+from sqlalchemy import select, union
+from __init__ import db
+from config import Config
+from models.user import User
+from models.patient import Patient
+from models.vital_sign import VitalSign
+from models.medical_record import MedicalRecord
+from models.health_metric import HealthMetric
+from services.feature_store import feature_store
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_NAME = 'watermark.json'
+
+def changed_patients_query(since, until):
+    """Patient IDs with a user, patient, vital sign, medical record or health metric row written in (since, until]"""
+    def changed(query, timestamp):
+        query = query.where(timestamp <= until)
+        return query.where(timestamp > since) if since is not None else query
+    
+    return union(
+        # Age and gender features come from the patient's user row
+        changed(select(Patient.id).join(User, User.id == Patient.user_id), User.updated_at),
+        changed(select(Patient.id), Patient.updated_at),
+        changed(select(VitalSign.patient_id), VitalSign.updated_at),
+        changed(select(MedicalRecord.patient_id), MedicalRecord.updated_at),
+        # Health metrics are append-only and have no updated_at
+        changed(select(HealthMetric.patient_id), HealthMetric.created_at)
+    )
+
+class TrainingSetExporter:
+    """Incrementally export per-patient training rows from the clinical tables.
+    
+    Each run finds the patients with any row written since the last
+    watermark, streaming their IDs through a server-side cursor, and builds
+    their rows with the feature store that serves predictions. Rows go to a
+    new part file per batch, so a run only writes what changed; later parts
+    supersede earlier rows of the same patient. Deleted patients leave no
+    row to find, so instead of tombstones ``materialize`` drops the rows of
+    patients no longer in the database. The watermark is advanced
+    only after every part is on disk, so an interrupted run is simply
+    repeated. ``lag`` keeps the watermark behind the clock so rows from
+    transactions still in flight are picked up by the next run.
+    """
+    
+    def __init__(self, output_dir, batch_size=1000, lag=timedelta(seconds=60)):
+        self.output_dir = output_dir
+        self.parts_dir = os.path.join(output_dir, 'parts')
+        self.watermark_path = os.path.join(output_dir, WATERMARK_NAME)
+        self.batch_size = batch_size
+        self.lag = lag
+    
+    def read_watermark(self):
+        """Upper bound of the last completed export, or None before the first"""
+        try:
+            with open(self.watermark_path) as f:
+                return datetime.fromisoformat(json.load(f)['watermark'])
+        except FileNotFoundError:
+            return None
+    
+    def _write_watermark(self, watermark, exported_rows):
+        os.makedirs(self.output_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, prefix='.watermark-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({
+                'watermark': watermark.isoformat(),
+                'exported_rows': exported_rows,
+                'exported_at': datetime.utcnow().isoformat()
+            }, f)
+        os.replace(tmp_path, self.watermark_path)
+    
+    def export(self, until=None):
+        """Write rows of every patient changed since the watermark; returns the row count"""
+        since = self.read_watermark()
+        until = until or datetime.utcnow() - self.lag
+        if since is not None and until <= since:
+            return 0
+        
+        os.makedirs(self.parts_dir, exist_ok=True)
+        run_id = until.strftime('%Y%m%dT%H%M%S%f')
+        
+        # Server-side cursor on its own connection: IDs arrive in batches, and
+        # commits made while building features cannot close the cursor
+        exported_rows = 0
+        with db.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=self.batch_size).execute(
+                changed_patients_query(since, until)
+            )
+            for index, batch in enumerate(result.scalars().partitions(self.batch_size)):
+                features = feature_store.get_features_many(batch)
+                # Save rows the read rebuilt
+                db.session.commit()
+                self._write_part(os.path.join(self.parts_dir, f'{run_id}-{index:06d}.csv'), features)
+                exported_rows += len(features)
+        
+        self._write_watermark(until, exported_rows)
+        logger.info(f"Exported {exported_rows} changed patients since {since} to {self.parts_dir}")
+        return exported_rows
+    
+    def _write_part(self, path, features):
+        columns = sorted({name for row in features.values() for name in row})
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['patient_id'] + columns)
+            writer.writeheader()
+            for patient_id, row in features.items():
+                writer.writerow({'patient_id': patient_id, **row})
+        os.replace(tmp_path, path)
+    
+    def parts(self):
+        """Part files in export order"""
+        return sorted(glob.glob(os.path.join(self.parts_dir, '*.csv')))
+    
+    def materialize(self, output_path, labels_path=None):
+        """Merge the parts into one CSV with the latest row per patient, compacting the parts
+        
+        The clinical tables hold no outcome labels; with ``labels_path``, a CSV
+        keyed by ``patient_id``, rows are joined to their labels and the ID
+        column is dropped, giving a file ModelTrainer can read directly.
+        """
+        parts = self.parts()
+        if not parts:
+            return 0
+        
+        merged = pd.concat([pd.read_csv(part) for part in parts], ignore_index=True)
+        merged = merged.drop_duplicates('patient_id', keep='last')
+        # Drop patients deleted since their rows were exported
+        merged = merged[merged['patient_id'].isin(self._patient_ids())]
+        
+        # Keep a single part holding the merged rows, named so later parts still sort after it
+        self._replace_parts(merged, parts)
+        
+        if labels_path:
+            merged = merged.merge(pd.read_csv(labels_path), on='patient_id').drop(columns='patient_id')
+        merged.to_csv(output_path, index=False)
+        return len(merged)
+    
+    def _patient_ids(self):
+        return {str(patient_id) for patient_id in db.session.execute(select(Patient.id)).scalars()}
+    
+    def _replace_parts(self, merged, parts):
+        compacted_path = parts[-1]
+        tmp_path = f'{compacted_path}.tmp'
+        merged.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, compacted_path)
+        for part in parts[:-1]:
+            os.remove(part)
+
+# Exporter writing under Config.TRAINING_EXPORT_PATH
+training_set_exporter = TrainingSetExporter(
+    Config.TRAINING_EXPORT_PATH,
+    batch_size=Config.TRAINING_EXPORT_BATCH_SIZE,
+    lag=timedelta(seconds=Config.TRAINING_EXPORT_LAG)
+)
@@ -0,0 +1,211 @@
+import copy
+import logging
+import math
+import os
+import shutil
+import tempfile
+import joblib
+import numpy as np
+from sklearn.metrics import f1_score, r2_score
+from sklearn.model_selection import train_test_split
+from xgboost import XGBRegressor
+from config import Config
+from ml.train_models import CHECKPOINT_DIR_NAME, ModelTrainer, TRAINING_JOBS, save_artifact
+from utils.ml_utils import interval_quantiles
+from utils.model_registry import model_registry
+from utils.tree_compiler import compile_forest
+
+logger = logging.getLogger(__name__)
+
+# Training CSV and target column of each training job
+JOB_DATASETS = {
+    'risk_assessment': ('risk_assessment_data', 'risk_level'),
+    'health_prediction_vital_signs': ('health_prediction_data', 'vital_signs_target'),
+    'health_prediction_lab_results': ('health_prediction_data', 'lab_results_target'),
+    'anomaly_detection': ('anomaly_detection_data', None)
+}
+
+def feature_drift(pipeline, X):
+    """Largest shift of a feature's mean, in training standard deviations"""
+    scaled = pipeline.transform(X)
+    if not len(scaled):
+        return 0.0
+    return float(np.abs(np.nanmean(scaled, axis=0)).max())
+
+def holdout_score(model, X, y):
+    """Higher-is-better score of a model on held-out rows"""
+    if isinstance(model, XGBRegressor):
+        return float(r2_score(y, model.predict(X)))
+    if y is None:
+        # No labels for anomalies: distance of the flagged rate from the expected
+        # contamination, beyond two standard errors of sampling noise
+        flagged = float(np.mean(model.predict(X) == -1))
+        noise = 2 * math.sqrt(model.contamination * (1 - model.contamination) / len(X))
+        return -max(0.0, abs(flagged - model.contamination) - noise)
+    return float(f1_score(y, model.predict(X), average='weighted'))
+
+class IncrementalRetrainer:
+    """Retrain the served models on newly arrived rows instead of the full history.
+    
+    Each model starts from the registry's current version and grows on the
+    new rows only: forests gain ``warm_start_fraction`` more trees and
+    boosted models continue with that fraction of extra rounds, so the cost
+    scales with the new data. The feature pipeline of the current version is
+    kept, since existing trees split on its scaled values. A model falls back
+    to a full refit on ``trainer.data_path`` when its features drift more
+    than ``drift_threshold``, when the warm-started model scores more than
+    ``holdout_tolerance`` below the current one on a holdout of the new
+    rows, or when it would grow past ``max_trees``. Anomaly forests keep a
+    threshold calibrated on a sample of ``trainer.data_path`` and must flag
+    the expected share of the holdout against it; ``trainer.data_path``
+    is expected to already include the new rows. The result is registered
+    as a new version with the decision for each model in its metadata.
+    """
+    
+    def __init__(self, trainer, new_data_path, registry=model_registry,
+                 drift_threshold=Config.RETRAIN_DRIFT_THRESHOLD,
+                 holdout_tolerance=Config.RETRAIN_HOLDOUT_TOLERANCE,
+                 warm_start_fraction=Config.RETRAIN_WARM_START_FRACTION,
+                 max_trees=Config.RETRAIN_MAX_TREES, test_size=0.2):
+        self.trainer = trainer
+        self.new_data = ModelTrainer(new_data_path, models_dir=trainer.models_dir,
+                                     cache_dir=os.path.join(new_data_path, 'cache'))
+        self.registry = registry
+        self.drift_threshold = drift_threshold
+        self.holdout_tolerance = holdout_tolerance
+        self.warm_start_fraction = warm_start_fraction
+        self.max_trees = max_trees
+        self.test_size = test_size
+    
+    def retrain(self, version, promote=False):
+        """Build and register ``version`` from the current one; returns the per-model decisions"""
+        base_version = self.registry.current_version()
+        # Build in a fresh staging directory: the trainer's models_dir may hold
+        # the artifacts serving falls back to, and leftovers from earlier runs
+        # must not end up in this version
+        models_dir = self.trainer.models_dir
+        self.trainer.models_dir = tempfile.mkdtemp(prefix=f'retrain-{version}-')
+        try:
+            if base_version is None:
+                logger.info("No registered version to warm-start from, refitting all models...")
+                self.trainer.train_all_models()
+                decisions = {name: {'mode': 'full', 'reason': 'no base version'} for name in TRAINING_JOBS}
+            else:
+                # Untouched artifacts carry over from the base version
+                shutil.copytree(self.registry.version_path(base_version), self.trainer.models_dir,
+                                dirs_exist_ok=True)
+                decisions = {name: self.retrain_job(name) for name in TRAINING_JOBS}
+            
+            self.registry.register(version, self.trainer.models_dir,
+                                   metadata={'parent': base_version, 'retraining': decisions},
+                                   ignore=shutil.ignore_patterns(CHECKPOINT_DIR_NAME))
+        finally:
+            shutil.rmtree(self.trainer.models_dir, ignore_errors=True)
+            self.trainer.models_dir = models_dir
+        
+        if promote:
+            self.registry.promote(version)
+        logger.info(f"Registered {version} from {base_version}: {decisions}")
+        return decisions
+    
+    def retrain_job(self, job_name):
+        """Warm-start one model on the new rows, refitting it fully when that is not safe"""
+        dataset_name, target = JOB_DATASETS[job_name]
+        csv_path = os.path.join(self.new_data.data_path, f'{dataset_name}.csv')
+        if not os.path.exists(csv_path):
+            return {'mode': 'unchanged', 'reason': 'no new rows'}
+        
+        dataset = self.new_data.load_dataset(dataset_name)
+        if not dataset.n_rows:
+            return {'mode': 'unchanged', 'reason': 'no new rows'}
+        if target is None:
+            data = dataset.sample(Config.ANOMALY_TRAINING_MAX_ROWS, random_state=42)
+            X, y = data, None
+        else:
+            X = dataset.to_frame(exclude=[target])
+            y = dataset.to_frame(columns=[target])[target]
+        
+        model_path = os.path.join(self.trainer.models_dir, f'{job_name}.joblib')
+        model = joblib.load(model_path)
+        pipeline = joblib.load(os.path.join(self.trainer.models_dir, f'{job_name}_pipeline.joblib'))
+        decision = {'new_rows': dataset.n_rows, 'drift': feature_drift(pipeline, X)}
+        
+        if decision['drift'] > self.drift_threshold:
+            return self._refit(job_name, decision, f"feature drift {decision['drift']:.2f}")
+        
+        if y is None:
+            X_train, X_holdout = train_test_split(X, test_size=self.test_size, random_state=42)
+            y_train = y_holdout = None
+        else:
+            X_train, X_holdout, y_train, y_holdout = train_test_split(
+                X, y, test_size=self.test_size, random_state=42
+            )
+        X_train_scaled = pipeline.transform(X_train)
+        X_holdout_scaled = pipeline.transform(X_holdout)
+        
+        if hasattr(model, 'classes_') and set(np.unique(y_train)) != set(model.classes_):
+            # New trees must predict the same classes as the existing ones
+            return self._refit(job_name, decision, 'new rows do not cover the model classes')
+        
+        candidate = self._warm_start(model, X_train_scaled, y_train)
+        if candidate is None:
+            return self._refit(job_name, decision, f'forest would exceed {self.max_trees} trees')
+        if y is None:
+            # Fitting sets offset_ so that the new rows alone flag exactly the
+            # contamination share, which would make the holdout check vacuous
+            candidate.offset_ = self._history_offset(candidate, model, pipeline)
+        
+        decision['holdout_score'] = holdout_score(candidate, X_holdout_scaled, y_holdout)
+        decision['base_holdout_score'] = holdout_score(model, X_holdout_scaled, y_holdout)
+        # A shifted holdout throws the base model's flagged rate off as well, so
+        # anomaly models are held to the expected contamination itself
+        reference = 0.0 if y is None else decision['base_holdout_score']
+        if decision['holdout_score'] < reference - self.holdout_tolerance:
+            return self._refit(job_name, decision, 'warm-started model underperformed on the holdout')
+        
+        save_artifact(candidate, model_path)
+        if isinstance(candidate, XGBRegressor):
+            # Intervals must describe the updated model's residuals
+            residuals = np.asarray(y_holdout, dtype=np.float64) - candidate.predict(X_holdout_scaled)
+            save_artifact({
+                'level': Config.CONFIDENCE_INTERVAL_LEVEL,
+                'residual_quantiles': np.quantile(residuals, interval_quantiles())
+            }, os.path.join(self.trainer.models_dir, f'{job_name}_intervals.joblib'))
+        else:
+            compiled_path = os.path.join(self.trainer.models_dir, f'{job_name}_compiled.joblib')
+            save_artifact(compile_forest(candidate), compiled_path)
+        
+        logger.info(f"Warm-started {job_name} on {dataset.n_rows} new rows")
+        return dict(decision, mode='warm_start')
+    
+    def _warm_start(self, model, X, y):
+        """Copy of the model grown on X, or None if it would get too large"""
+        if isinstance(model, XGBRegressor):
+            rounds = max(1, int(math.ceil(model.get_booster().num_boosted_rounds() * self.warm_start_fraction)))
+            candidate = XGBRegressor(**dict(model.get_params(), n_estimators=rounds, n_jobs=self.trainer.n_jobs))
+            return candidate.fit(X, y, xgb_model=model.get_booster(), verbose=False)
+        
+        n_trees = len(model.estimators_)
+        n_estimators = n_trees + max(1, int(math.ceil(n_trees * self.warm_start_fraction)))
+        if n_estimators > self.max_trees:
+            return None
+        candidate = copy.deepcopy(model)
+        candidate.set_params(warm_start=True, n_estimators=n_estimators, n_jobs=self.trainer.n_jobs)
+        return candidate.fit(X) if y is None else candidate.fit(X, y)
+    
+    def _history_offset(self, candidate, base, pipeline):
+        """Anomaly threshold flagging the contamination share of the full history"""
+        history_path = os.path.join(self.trainer.data_path, 'anomaly_detection_data.csv')
+        if candidate.contamination == 'auto' or not os.path.exists(history_path):
+            return base.offset_
+        history = self.trainer.load_dataset('anomaly_detection_data').sample(
+            Config.ANOMALY_TRAINING_MAX_ROWS, random_state=42
+        )
+        scores = candidate.score_samples(pipeline.transform(history))
+        return float(np.percentile(scores, 100 * candidate.contamination))
+    
+    def _refit(self, job_name, decision, reason):
+        logger.info(f"Refitting {job_name} on the full history: {reason}")
+        method, args, _ = TRAINING_JOBS[job_name]
+        getattr(self.trainer, method)(*args)
+        return dict(decision, mode='full', reason=reason)
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import math
+import os
+from itertools import product
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import StratifiedKFold
+
+logger = logging.getLogger(__name__)
+
+def data_fingerprint(X, y, *settings):
+    """Hash of the training data and search settings, so checkpoints are only reused for the same run"""
+    hasher = hashlib.sha256()
+    for array in (X, y):
+        array = np.ascontiguousarray(array)
+        hasher.update(str((array.shape, array.dtype.str)).encode())
+        hasher.update(array.tobytes())
+    hasher.update(json.dumps(settings, sort_keys=True, default=str).encode())
+    return hasher.hexdigest()
+
+class SearchCheckpoint:
+    """Append-only JSON-lines record of completed fold scores.
+    
+    Every fold is appended and flushed as soon as it is scored, so an
+    interrupted search loses at most the fold in flight. Records written for
+    different data or settings are ignored, and a torn final line from a
+    crash is cut off on load so the next record starts on a line of its own.
+    """
+    
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.scores = {}
+        if path and os.path.exists(path):
+            with open(path, 'rb+') as f:
+                content = f.read()
+                if content and not content.endswith(b'\n'):
+                    f.truncate(content.rfind(b'\n') + 1)
+            for line in content.splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('fingerprint') == fingerprint:
+                    self.scores[(record['params'], record['resource'], record['fold'])] = record['score']
+    
+    def get(self, params_key, resource, fold):
+        return self.scores.get((params_key, resource, fold))
+    
+    def add(self, params_key, resource, fold, score):
+        self.scores[(params_key, resource, fold)] = score
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({
+                'fingerprint': self.fingerprint,
+                'params': params_key,
+                'resource': resource,
+                'fold': fold,
+                'score': score
+            }) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+class SuccessiveHalvingSearch:
+    """Successive halving over a parameter grid, with tree count as the budget.
+    
+    Every candidate is cross-validated with a small forest, and only the best
+    ``1 / factor`` go on to the next rung with ``factor`` times more trees,
+    up to ``max_resource``. Survivors grow their existing forests with
+    ``warm_start``; a random forest grown that way has exactly the trees a
+    fresh fit of the larger size would, so scores do not depend on whether
+    a fold was resumed. Fold scores are checkpointed to ``checkpoint_path``
+    and reused when the search is re-run on the same data.
+    """
+    
+    def __init__(self, estimator, param_grid, resource='n_estimators', max_resource=300, min_resource=10,
+                 factor=3, cv=5, scoring='f1_weighted', checkpoint_path=None):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.resource = resource
+        self.max_resource = max_resource
+        self.min_resource = min_resource
+        self.factor = factor
+        self.cv = cv
+        self.scoring = scoring
+        self.checkpoint_path = checkpoint_path
+    
+    def candidates(self):
+        """Every combination of the grid, in a stable order"""
+        names = sorted(self.param_grid)
+        return [dict(zip(names, values)) for values in product(*(self.param_grid[name] for name in names))]
+    
+    def resources(self):
+        """Tree count of each rung, ending at max_resource"""
+        n_rungs = 1 + max(0, int(math.floor(math.log(self.max_resource / self.min_resource, self.factor))))
+        return [int(math.ceil(self.max_resource / self.factor ** rung)) for rung in reversed(range(n_rungs))]
+    
+    def fit(self, X, y):
+        X = np.asarray(X)
+        y = np.asarray(y)
+        scorer = get_scorer(self.scoring)
+        folds = list(StratifiedKFold(n_splits=self.cv).split(X, y))
+        fingerprint = data_fingerprint(
+            X, y, self.estimator.get_params(), self.resource, self.cv, self.scoring
+        )
+        checkpoint = SearchCheckpoint(self.checkpoint_path, fingerprint)
+        
+        candidates = self.candidates()
+        fitted = {}
+        self.results_ = []
+        self.n_fits_ = 0
+        self.n_reused_ = 0
+        
+        for rung, resource in enumerate(self.resources()):
+            rung_scores = []
+            for params in candidates:
+                params_key = json.dumps(params, sort_keys=True)
+                fold_scores = []
+                for fold, (train_index, test_index) in enumerate(folds):
+                    score = checkpoint.get(params_key, resource, fold)
+                    if score is None:
+                        model = fitted.get((params_key, fold))
+                        if model is None:
+                            model = clone(self.estimator).set_params(warm_start=True, **params)
+                        model.set_params(**{self.resource: resource})
+                        model.fit(X[train_index], y[train_index])
+                        fitted[(params_key, fold)] = model
+                        score = float(scorer(model, X[test_index], y[test_index]))
+                        checkpoint.add(params_key, resource, fold, score)
+                        self.n_fits_ += 1
+                    else:
+                        self.n_reused_ += 1
+                    fold_scores.append(score)
+                
+                mean_score = float(np.mean(fold_scores))
+                rung_scores.append(mean_score)
+                self.results_.append({
+                    'params': params,
+                    'rung': rung,
+                    'resource': resource,
+                    'mean_score': mean_score,
+                    'std_score': float(np.std(fold_scores))
+                })
+            
+            # Keep the best 1 / factor of candidates; ties go to the earlier candidate
+            n_keep = max(1, int(math.ceil(len(candidates) / self.factor)))
+            ranking = np.argsort(-np.asarray(rung_scores), kind='stable')
+            survivors = [candidates[index] for index in ranking[:n_keep]]
+            logger.info(
+                f"Rung {rung}: {len(candidates)} candidates with {self.resource}={resource}, "
+                f"best score {rung_scores[ranking[0]]:.4f}"
+            )
+            
+            # Forests of eliminated candidates are no longer needed
+            survivor_keys = {json.dumps(params, sort_keys=True) for params in survivors}
+            fitted = {key: model for key, model in fitted.items() if key[0] in survivor_keys}
+            candidates = survivors
+        
+        self.best_params_ = dict(candidates[0], **{self.resource: self.max_resource})
+        self.best_score_ = rung_scores[ranking[0]]
+        self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+        return self
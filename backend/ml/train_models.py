@@ -4,11 +4,25 @@ from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.ensemble import RandomForestClassifier, IsolationForest
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report, confusion_matrix
-from xgboost import XGBRegressor
 import joblib
 import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import os
+import sys
+from threadpoolctl import threadpool_limits
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils.feature_pipeline import FeaturePipeline
+from ml.search import SuccessiveHalvingSearch
+from ml.datasets import ColumnarDataset
+from utils.ml_utils import interval_quantiles
+from utils.tree_compiler import compile_forest
 
 # Configure logging
 logging.basicConfig(
@@ -17,35 +31,107 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Default directory for search checkpoints, under models_dir
+CHECKPOINT_DIR_NAME = 'search_checkpoints'
+
+def save_artifact(obj, path):
+    """Save a model artifact so its arrays can be memory-mapped on load.
+    
+    Compressed joblib files must be inflated into private memory; plain ones
+    can be opened with ``mmap_mode='r'`` and shared between worker processes.
+    """
+    joblib.dump(obj, path, compress=0)
+
+HEALTH_PREDICTION_TYPES = ['vital_signs', 'lab_results']
+
+# Independent training jobs: trainer method, its arguments and relative CPU share
+TRAINING_JOBS = {
+    'risk_assessment': ('train_risk_assessment_model', (), 4),
+    'health_prediction_vital_signs': ('train_health_prediction_target', ('vital_signs',), 2),
+    'health_prediction_lab_results': ('train_health_prediction_target', ('lab_results',), 2),
+    'anomaly_detection': ('train_anomaly_detection_model', (), 1)
+}
+
+def allocate_threads(weights, total_threads):
+    """Split CPU threads between jobs in proportion to their weights, at least one each"""
+    total_weight = sum(weights.values())
+    shares = {name: total_threads * weight / total_weight for name, weight in weights.items()}
+    threads = {name: max(1, int(share)) for name, share in shares.items()}
+    
+    # Hand leftover threads to the jobs furthest below their share
+    for name in sorted(shares, key=lambda name: threads[name] - shares[name]):
+        if sum(threads.values()) >= total_threads:
+            break
+        threads[name] += 1
+    return threads
+
+def _run_training_job(trainer_config, method, args, n_threads):
+    """Run one training job in a worker process, limited to its share of threads"""
+    started = time.perf_counter()
+    # Caps BLAS/OpenMP pools too, not just the estimators' n_jobs
+    with threadpool_limits(limits=n_threads):
+        trainer = ModelTrainer(**trainer_config, n_jobs=n_threads)
+        getattr(trainer, method)(*args)
+    return time.perf_counter() - started
+
 class ModelTrainer:
-    def __init__(self, data_path, models_dir='models'):
+    def __init__(self, data_path, models_dir='models', search_mode=Config.TRAINING_SEARCH_MODE,
+                 checkpoint_dir=None, cache_dir=None, n_jobs=-1):
         """Initialize model trainer"""
         self.data_path = data_path
         self.models_dir = models_dir
-        self.scaler = StandardScaler()
+        self.search_mode = search_mode
+        self.checkpoint_dir = checkpoint_dir or os.path.join(models_dir, CHECKPOINT_DIR_NAME)
+        self.cache_dir = cache_dir or os.path.join(data_path, 'cache')
+        self.n_jobs = n_jobs
         
         # Create models directory if it doesn't exist
         if not os.path.exists(models_dir):
             os.makedirs(models_dir)
 
+    def load_dataset(self, name):
+        """Open a training CSV through its memory-mapped columnar cache"""
+        return ColumnarDataset.from_csv(f"{self.data_path}/{name}.csv", self.cache_dir)
+
+    def load_scaled_split(self, dataset, target, batch_size=100000):
+        """Split the rows, fit the scaler on the training rows and return scaled float32 matrices
+        
+        Feature matrices are filled straight from the memory-mapped columns
+        and scaled in place batch by batch, so the scaled train and test
+        matrices are the only full copies of the data held in memory.
+        """
+        feature_names = [name for name in dataset.columns if name != target]
+        train_rows, test_rows = train_test_split(np.arange(dataset.n_rows), test_size=0.2, random_state=42)
+        
+        # Batches in file order read each column page once
+        scaler = StandardScaler()
+        fit_rows = np.sort(train_rows)
+        for start in range(0, len(fit_rows), batch_size):
+            scaler.partial_fit(dataset.to_matrix(feature_names, rows=fit_rows[start:start + batch_size]))
+        pipeline = FeaturePipeline.from_scaler(scaler, feature_names)
+        
+        matrices = []
+        for rows in (train_rows, test_rows):
+            X = dataset.to_matrix(feature_names, rows=rows)
+            for start in range(0, len(X), batch_size):
+                X[start:start + batch_size] = pipeline.transform(X[start:start + batch_size])
+            matrices.append(X)
+        
+        X_train_scaled, X_test_scaled = matrices
+        return (scaler, pipeline, X_train_scaled, X_test_scaled,
+                dataset.values(target, train_rows), dataset.values(target, test_rows))
+
     def train_risk_assessment_model(self):
         """Train risk assessment model"""
         logger.info("Training risk assessment model...")
         
         try:
             # Load and preprocess data
-            data = pd.read_csv(f"{self.data_path}/risk_assessment_data.csv")
-            X = data.drop('risk_level', axis=1)
-            y = data['risk_level']
-            
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
-            )
+            dataset = self.load_dataset('risk_assessment_data')
             
-            # Scale features
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
+            # Split data and scale features with the pipeline that serving will use
+            scaler, pipeline, X_train_scaled, X_test_scaled, y_train, y_test = \
+                self.load_scaled_split(dataset, 'risk_level')
             
             # Define model and parameters
             model = RandomForestClassifier(random_state=42)
@@ -56,14 +142,26 @@ class ModelTrainer:
                 'min_samples_leaf': [1, 2, 4]
             }
             
-            # Perform grid search
-            grid_search = GridSearchCV(
-                model, param_grid, cv=5, scoring='f1_weighted', n_jobs=-1
-            )
-            grid_search.fit(X_train_scaled, y_train)
+            if self.search_mode == 'halving':
+                # Tree count is the budget: weak candidates are dropped after small forests
+                search = SuccessiveHalvingSearch(
+                    model.set_params(n_jobs=self.n_jobs),
+                    {name: values for name, values in param_grid.items() if name != 'n_estimators'},
+                    max_resource=max(param_grid['n_estimators']),
+                    cv=5,
+                    scoring='f1_weighted',
+                    checkpoint_path=os.path.join(self.checkpoint_dir, 'risk_assessment.jsonl')
+                )
+            else:
+                # Perform grid search
+                search = GridSearchCV(
+                    model, param_grid, cv=5, scoring='f1_weighted', n_jobs=self.n_jobs
+                )
+            search.fit(X_train_scaled, y_train)
+            logger.info(f"Best parameters: {search.best_params_} (CV score {search.best_score_:.4f})")
             
             # Get best model
-            best_model = grid_search.best_estimator_
+            best_model = search.best_estimator_
             
             # Evaluate model
             y_pred = best_model.predict(X_test_scaled)
@@ -73,8 +171,13 @@ class ModelTrainer:
             # Save model and scaler
             model_path = f"{self.models_dir}/risk_assessment.joblib"
             scaler_path = f"{self.models_dir}/risk_assessment_scaler.joblib"
-            joblib.dump(best_model, model_path)
-            joblib.dump(self.scaler, scaler_path)
+            pipeline_path = f"{self.models_dir}/risk_assessment_pipeline.joblib"
+            save_artifact(best_model, model_path)
+            save_artifact(scaler, scaler_path)
+            save_artifact(pipeline, pipeline_path)
+            
+            # Flattened copy of the forest for low-latency serving
+            save_artifact(compile_forest(best_model), f"{self.models_dir}/risk_assessment_compiled.joblib")
             
             logger.info(f"Risk assessment model saved to {model_path}")
             
@@ -83,53 +186,59 @@ class ModelTrainer:
             raise
 
     def train_health_prediction_model(self):
-        """Train health prediction model"""
+        """Train health prediction models"""
         logger.info("Training health prediction model...")
         
+        for pred_type in HEALTH_PREDICTION_TYPES:
+            self.train_health_prediction_target(pred_type)
+
+    def train_health_prediction_target(self, pred_type):
+        """Train the health prediction model of one prediction type"""
+        logger.info(f"Training model for {pred_type}...")
+        
         try:
             # Load and preprocess data
-            data = pd.read_csv(f"{self.data_path}/health_prediction_data.csv")
-            
-            # Prepare features and targets for different prediction types
-            prediction_types = ['vital_signs', 'lab_results']
-            
-            for pred_type in prediction_types:
-                logger.info(f"Training model for {pred_type}...")
-                
-                X = data.drop([f'{pred_type}_target'], axis=1)
-                y = data[f'{pred_type}_target']
-                
-                # Split data
-                X_train, X_test, y_train, y_test = train_test_split(
-                    X, y, test_size=0.2, random_state=42
-                )
-                
-                # Scale features
-                X_train_scaled = self.scaler.fit_transform(X_train)
-                X_test_scaled = self.scaler.transform(X_test)
-                
-                # Train model
-                model = XGBRegressor(
-                    objective='reg:squarederror',
-                    n_estimators=100,
-                    learning_rate=0.1,
-                    max_depth=6
-                )
-                model.fit(
-                    X_train_scaled, y_train,
-                    eval_set=[(X_test_scaled, y_test)],
-                    early_stopping_rounds=10,
-                    verbose=False
-                )
-                
-                # Save model and scaler
-                model_path = f"{self.models_dir}/health_prediction_{pred_type}.joblib"
-                scaler_path = f"{self.models_dir}/health_prediction_{pred_type}_scaler.joblib"
-                joblib.dump(model, model_path)
-                joblib.dump(self.scaler, scaler_path)
-                
-                logger.info(f"Health prediction model for {pred_type} saved to {model_path}")
-                
+            dataset = self.load_dataset('health_prediction_data')
+            
+            # Split data and scale features with the pipeline that serving will use
+            scaler, pipeline, X_train_scaled, X_test_scaled, y_train, y_test = \
+                self.load_scaled_split(dataset, f'{pred_type}_target')
+            
+            # Only the health prediction models need XGBoost
+            from xgboost import XGBRegressor
+            
+            # Train model
+            model = XGBRegressor(
+                objective='reg:squarederror',
+                n_estimators=100,
+                learning_rate=0.1,
+                max_depth=6,
+                n_jobs=self.n_jobs
+            )
+            model.fit(
+                X_train_scaled, y_train,
+                eval_set=[(X_test_scaled, y_test)],
+                early_stopping_rounds=10,
+                verbose=False
+            )
+            
+            # Save model and scaler
+            model_path = f"{self.models_dir}/health_prediction_{pred_type}.joblib"
+            scaler_path = f"{self.models_dir}/health_prediction_{pred_type}_scaler.joblib"
+            pipeline_path = f"{self.models_dir}/health_prediction_{pred_type}_pipeline.joblib"
+            save_artifact(model, model_path)
+            save_artifact(scaler, scaler_path)
+            save_artifact(pipeline, pipeline_path)
+            
+            # Prediction intervals from the spread of held-out residuals
+            residuals = np.asarray(y_test, dtype=np.float64) - model.predict(X_test_scaled)
+            save_artifact({
+                'level': Config.CONFIDENCE_INTERVAL_LEVEL,
+                'residual_quantiles': np.quantile(residuals, interval_quantiles())
+            }, f"{self.models_dir}/health_prediction_{pred_type}_intervals.joblib")
+            
+            logger.info(f"Health prediction model for {pred_type} saved to {model_path}")
+            
         except Exception as e:
             logger.error(f"Error training health prediction model: {str(e)}")
             raise
@@ -140,24 +249,38 @@ class ModelTrainer:
         
         try:
             # Load and preprocess data
-            data = pd.read_csv(f"{self.data_path}/anomaly_detection_data.csv")
+            dataset = self.load_dataset('anomaly_detection_data')
             
-            # Scale features
-            X_scaled = self.scaler.fit_transform(data)
+            # Scale features with the pipeline that serving will use, one batch at a time
+            scaler = StandardScaler()
+            for batch in dataset.iter_frames():
+                scaler.partial_fit(batch)
+            pipeline = FeaturePipeline.from_scaler(scaler, dataset.columns)
+            
+            # Each tree only sees max_samples rows, so a uniform sample trains
+            # an equivalent forest within a fixed memory budget
+            data = dataset.sample(Config.ANOMALY_TRAINING_MAX_ROWS, random_state=42)
+            X_scaled = pipeline.transform(data)
             
             # Train isolation forest model
             model = IsolationForest(
                 n_estimators=100,
                 contamination=0.1,
-                random_state=42
+                random_state=42,
+                n_jobs=self.n_jobs
             )
             model.fit(X_scaled)
             
             # Save model and scaler
             model_path = f"{self.models_dir}/anomaly_detection.joblib"
             scaler_path = f"{self.models_dir}/anomaly_detection_scaler.joblib"
-            joblib.dump(model, model_path)
-            joblib.dump(self.scaler, scaler_path)
+            pipeline_path = f"{self.models_dir}/anomaly_detection_pipeline.joblib"
+            save_artifact(model, model_path)
+            save_artifact(scaler, scaler_path)
+            save_artifact(pipeline, pipeline_path)
+            
+            # Flattened copy of the forest for low-latency serving
+            save_artifact(compile_forest(model), f"{self.models_dir}/anomaly_detection_compiled.joblib")
             
             logger.info(f"Anomaly detection model saved to {model_path}")
             
@@ -165,18 +288,63 @@ class ModelTrainer:
             logger.error(f"Error training anomaly detection model: {str(e)}")
             raise
 
-    def train_all_models(self):
+    def train_all_models(self, parallel=Config.TRAINING_PARALLEL, total_threads=None):
         """Train all models"""
         try:
-            self.train_risk_assessment_model()
-            self.train_health_prediction_model()
-            self.train_anomaly_detection_model()
+            if parallel:
+                self.train_all_models_parallel(total_threads)
+            else:
+                self.train_risk_assessment_model()
+                self.train_health_prediction_model()
+                self.train_anomaly_detection_model()
             logger.info("All models trained successfully!")
             
         except Exception as e:
             logger.error(f"Error training models: {str(e)}")
             raise
 
+    def train_all_models_parallel(self, total_threads=None, jobs=None):
+        """Train every model in its own process, with CPU threads split between them.
+        
+        Workers receive only the trainer settings and open the memory-mapped
+        dataset cache themselves, so feature matrices are shared through the
+        page cache instead of being pickled to each process. ``jobs`` defaults
+        to ``TRAINING_JOBS``.
+        """
+        jobs = jobs or TRAINING_JOBS
+        # Convert each CSV once here rather than racing to do it in the workers
+        for name in ('risk_assessment_data', 'health_prediction_data', 'anomaly_detection_data'):
+            self.load_dataset(name)
+        
+        total_threads = total_threads or Config.TRAINING_THREADS or os.cpu_count()
+        threads = allocate_threads({name: job[2] for name, job in jobs.items()}, total_threads)
+        trainer_config = {
+            'data_path': self.data_path,
+            'models_dir': self.models_dir,
+            'search_mode': self.search_mode,
+            'checkpoint_dir': self.checkpoint_dir,
+            'cache_dir': self.cache_dir
+        }
+        
+        # Spawned rather than forked so no OpenMP or BLAS thread state is inherited
+        with ProcessPoolExecutor(max_workers=len(jobs),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = {
+                name: executor.submit(_run_training_job, trainer_config, method, args, threads[name])
+                for name, (method, args, _) in jobs.items()
+            }
+            failures = []
+            for name, future in futures.items():
+                try:
+                    elapsed = future.result()
+                    logger.info(f"Trained {name} with {threads[name]} threads in {elapsed:.1f}s")
+                except Exception as e:
+                    failures.append(name)
+                    logger.error(f"Error training {name}: {str(e)}")
+        
+        if failures:
+            raise RuntimeError(f"Training failed for: {', '.join(failures)}")
+
 if __name__ == "__main__":
     # Initialize trainer
     trainer = ModelTrainer(
@@ -38,7 +38,8 @@ class HealthMetric(db.Model):
     device_type = db.Column(db.String(100))  # Type/model of the device
     
     # Additional data
-    metadata = db.Column(JSONB)  # Additional measurement-specific data
+    # 'metadata' is reserved on declarative models, so the attribute is renamed
+    metric_metadata = db.Column('metadata', JSONB)  # Additional measurement-specific data
     notes = db.Column(db.Text)
     tags = db.Column(db.ARRAY(db.String))
     
@@ -69,7 +70,7 @@ class HealthMetric(db.Model):
         self.created_by = created_by
         self.device_id = device_id
         self.device_type = device_type
-        self.metadata = metadata or {}
+        self.metric_metadata = metadata or {}
         self.notes = notes
         self.tags = tags or []
         self.accuracy = accuracy
@@ -88,7 +89,7 @@ class HealthMetric(db.Model):
             'measurement_method': self.measurement_method,
             'device_id': self.device_id,
             'device_type': self.device_type,
-            'metadata': self.metadata,
+            'metadata': self.metric_metadata,
             'notes': self.notes,
             'tags': self.tags,
             'accuracy': self.accuracy,
@@ -149,13 +150,21 @@ class HealthMetric(db.Model):
                                 range_value['diastolic'][0] <= diastolic <= range_value['diastolic'][1]
                             )
                 elif self.metric_type == 'body_fat':
-                    if 'gender' in self.metadata:
-                        gender = self.metadata['gender'].lower()
+                    if 'gender' in self.metric_metadata:
+                        gender = self.metric_metadata['gender'].lower()
                         if gender in ['male', 'female']:
                             self.is_abnormal = not (
                                 range_value[gender][0] <= self.value <= range_value[gender][1]
                             )
 
+    def check_against_baseline(self, baseline, min_count, z_threshold):
+        """Flag values that deviate from the patient's own baseline for this metric"""
+        if baseline is not None and baseline.is_mature(min_count) and isinstance(self.value, (int, float)):
+            if abs(baseline.z_score(self.value)) > z_threshold:
+                self.is_abnormal = True
+        
+        return self.is_abnormal
+
 class HealthMetricGoal(db.Model):
     """Track health metric goals and progress"""
     __tablename__ = 'health_metric_goals'
@@ -0,0 +1,50 @@
+from datetime import datetime
+from __init__ import db
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+import uuid
+
+class MLJob(db.Model):
+    """An ML operation queued by the API and run by a job worker process"""
+    __tablename__ = 'ml_jobs'
+    
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_type = db.Column(db.String(50), nullable=False)
+    owner_id = db.Column(db.String(36))
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    
+    # JSON arguments of the registered job function and its JSON result
+    args = db.Column(JSONB, nullable=False, default=list)
+    result = db.Column(JSONB)
+    error = db.Column(db.Text)
+    # Claims so far; a worker that crashes mid-job leaves it running until its lease expires
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    
+    submitted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, index=True)
+    
+    def __init__(self, job_type, args=None, owner_id=None):
+        self.id = uuid.uuid4()
+        self.job_type = job_type
+        self.args = list(args or [])
+        self.owner_id = owner_id
+        self.status = 'queued'
+        self.attempts = 0
+        self.submitted_at = datetime.utcnow()
+    
+    @property
+    def done(self):
+        return self.status in ('succeeded', 'failed')
+    
+    def to_dict(self):
+        return {
+            'job_id': str(self.id),
+            'job_type': self.job_type,
+            'status': self.status,
+            'error': self.error,
+            'attempts': self.attempts,
+            'submitted_at': self.submitted_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -32,7 +32,8 @@ class Notification(db.Model):
     image_url = db.Column(db.String(500))  # URL for notification image
     
     # Additional data
-    metadata = db.Column(JSONB)  # Additional context-specific data
+    # 'metadata' is reserved on declarative models, so the attribute is renamed
+    notification_metadata = db.Column('metadata', JSONB)  # Additional context-specific data
     category = db.Column(db.String(50))  # For grouping similar notifications
     tags = db.Column(db.ARRAY(db.String))
     
@@ -85,7 +86,7 @@ class Notification(db.Model):
         self.priority = priority
         self.action_url = action_url
         self.image_url = image_url
-        self.metadata = metadata or {}
+        self.notification_metadata = metadata or {}
         self.category = category
         self.tags = tags or []
         self.scheduled_for = scheduled_for
@@ -102,7 +103,7 @@ class Notification(db.Model):
             'message': self.message,
             'action_url': self.action_url,
             'image_url': self.image_url,
-            'metadata': self.metadata,
+            'metadata': self.notification_metadata,
             'category': self.category,
             'tags': self.tags,
             'channels': self.channels,
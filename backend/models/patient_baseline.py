@@ -0,0 +1,88 @@
+import math
+from datetime import datetime
+from __init__ import db
+from sqlalchemy.dialects.postgresql import UUID
+
+class PatientBaseline(db.Model):
+    """Running personal baseline of one measurement type for a patient"""
+    __tablename__ = 'patient_baselines'
+    
+    patient_id = db.Column(UUID(as_uuid=True), db.ForeignKey('patients.id'), primary_key=True)
+    measurement_type = db.Column(db.String(50), primary_key=True)
+    
+    # Welford aggregates over all readings
+    count = db.Column(db.Integer, nullable=False, default=0)
+    mean = db.Column(db.Float, nullable=False, default=0.0)
+    m2 = db.Column(db.Float, nullable=False, default=0.0)
+    
+    # Exponentially weighted mean and variance, tracking recent drift
+    ewma = db.Column(db.Float)
+    ewm_var = db.Column(db.Float, nullable=False, default=0.0)
+    
+    last_value = db.Column(db.Float)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __init__(self, patient_id, measurement_type):
+        self.patient_id = patient_id
+        self.measurement_type = measurement_type
+        self.reset()
+    
+    def reset(self):
+        """Forget all readings"""
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.ewma = None
+        self.ewm_var = 0.0
+        self.last_value = None
+    
+    @property
+    def std(self):
+        """Sample standard deviation of all readings"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+    
+    @property
+    def ewm_std(self):
+        return math.sqrt(self.ewm_var)
+    
+    def update(self, value, alpha):
+        """Fold in one reading in O(1)"""
+        value = float(value)
+        
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            diff = value - self.ewma
+            increment = alpha * diff
+            self.ewma += increment
+            self.ewm_var = (1 - alpha) * (self.ewm_var + diff * increment)
+        
+        self.last_value = value
+    
+    def z_score(self, value):
+        """Deviation of a value from the baseline in standard deviations"""
+        std = self.std
+        if std == 0:
+            return 0.0
+        return (float(value) - self.mean) / std
+    
+    def is_mature(self, min_count):
+        return self.count >= min_count
+    
+    def to_dict(self):
+        return {
+            'patient_id': str(self.patient_id),
+            'measurement_type': self.measurement_type,
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'ewma': self.ewma,
+            'ewm_std': self.ewm_std,
+            'last_value': self.last_value,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
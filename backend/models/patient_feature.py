@@ -0,0 +1,42 @@
+from datetime import datetime
+from __init__ import db
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
+
+class PatientFeatures(db.Model):
+    """Incrementally maintained ML feature state for a single patient"""
+    __tablename__ = 'patient_features'
+
+    patient_id = db.Column(UUID(as_uuid=True), db.ForeignKey('patients.id'), primary_key=True)
+    
+    # Demographics needed to derive age, gender and BMI features
+    patient_info = db.Column(JSONB, nullable=False, default=dict)
+    
+    # Running aggregates per vital type: count, mean, m2, min, max
+    vital_stats = db.Column(JSONB, nullable=False, default=dict)
+    
+    # Medical record summary
+    diagnosis_codes = db.Column(ARRAY(db.String), nullable=False, default=list)
+    last_record_date = db.Column(db.DateTime)
+    
+    # Set when an update or delete cannot be applied incrementally
+    is_stale = db.Column(db.Boolean, nullable=False, default=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __init__(self, patient_id, is_stale=False):
+        self.patient_id = patient_id
+        self.patient_info = {}
+        self.vital_stats = {}
+        self.diagnosis_codes = []
+        self.last_record_date = None
+        self.is_stale = is_stale
+
+    def to_dict(self):
+        return {
+            'patient_id': str(self.patient_id),
+            'patient_info': self.patient_info,
+            'vital_stats': self.vital_stats,
+            'diagnosis_codes': self.diagnosis_codes,
+            'last_record_date': self.last_record_date.isoformat() if self.last_record_date else None,
+            'is_stale': self.is_stale,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
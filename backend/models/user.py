@@ -23,7 +23,8 @@ class User(db.Model):
     # Relationships
     patient_profile = db.relationship('Patient', backref='user', uselist=False, lazy=True)
     professional_profile = db.relationship('Professional', backref='user', uselist=False, lazy=True)
-    notifications = db.relationship('Notification', backref='user', lazy=True)
+    notifications = db.relationship('Notification', backref='user', lazy=True,
+                                    foreign_keys='Notification.recipient_id')
 
     def __init__(self, email, password, user_type, first_name, last_name, date_of_birth=None, phone_number=None):
         self.id = uuid.uuid4()
@@ -63,6 +63,22 @@ class VitalSign(db.Model):
         
         self.is_abnormal = is_abnormal
 
+    def check_against_baselines(self, baselines, min_count, z_threshold):
+        """Flag readings that deviate from the patient's own baselines
+        
+        ``baselines`` maps measurement type to PatientBaseline. Only
+        baselines with at least ``min_count`` readings are used; the
+        population ranges above still apply.
+        """
+        for field, baseline in baselines.items():
+            value = getattr(self, field, None)
+            if value is None or baseline is None or not baseline.is_mature(min_count):
+                continue
+            if abs(baseline.z_score(value)) > z_threshold:
+                self.is_abnormal = True
+        
+        return self.is_abnormal
+
     def to_dict(self):
         return {
             'id': str(self.id),
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 import numpy as np
 
 from models import db, User, HealthRecord, RiskPrediction
+from utils.stage_timing import StageTimer
 
 predictions_bp = Blueprint('predictions', __name__)
 logger = logging.getLogger(__name__)
@@ -105,15 +106,17 @@ def get_latest_prediction():
         user_id = get_jwt_identity()
         
         # Get latest health record
-        latest_record = HealthRecord.query.filter_by(user_id=user_id)\
-            .order_by(HealthRecord.created_at.desc())\
-            .first()
+        with StageTimer('db', model='rule_based'):
+            latest_record = HealthRecord.query.filter_by(user_id=user_id)\
+                .order_by(HealthRecord.created_at.desc())\
+                .first()
             
         if not latest_record:
             return jsonify({"message": "No health records found"}), 404
             
         # Calculate risk factors
-        risk_factors = calculate_risk_factors(latest_record.health_data)
+        with StageTimer('risk_factors', model='rule_based'):
+            risk_factors = calculate_risk_factors(latest_record.health_data)
         
         # Calculate overall risk score (weighted average)
         weights = {
@@ -133,8 +136,9 @@ def get_latest_prediction():
             risk_factors=risk_factors
         )
         
-        db.session.add(prediction)
-        db.session.commit()
+        with StageTimer('db_write', model='rule_based'):
+            db.session.add(prediction)
+            db.session.commit()
         
         return jsonify({
             "overall_risk": round(overall_risk, 2),
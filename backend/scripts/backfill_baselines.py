@@ -0,0 +1,31 @@
+"""Rebuild per-patient baselines from the full vital sign and health metric history."""
+
+import os
+import sys
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from __init__ import create_app, db
+from models.patient import Patient
+from services.baseline_store import baseline_store
+
+def main():
+    """Replay the history of every patient, a batch of patients per transaction."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help='Patients rebuilt per transaction')
+    args = parser.parse_args()
+    
+    app = create_app()
+    with app.app_context():
+        patient_ids = [patient_id for patient_id, in db.session.query(Patient.id).order_by(Patient.id)]
+        readings = 0
+        for start in range(0, len(patient_ids), args.batch_size):
+            readings += baseline_store.rebuild_many(patient_ids[start:start + args.batch_size])
+            print(f"Rebuilt {min(start + args.batch_size, len(patient_ids))}/{len(patient_ids)} patients")
+        print(f"[SUCCESS] {readings} readings replayed into baselines")
+
+if __name__ == '__main__':
+    main()
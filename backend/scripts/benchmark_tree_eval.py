@@ -0,0 +1,70 @@
+"""Compare sklearn and array-compiled evaluation of the tree ensembles."""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+from sklearn.ensemble import RandomForestClassifier, IsolationForest
+from utils.tree_compiler import compile_forest
+
+def time_call(fn, X, repeat):
+    """Best-of-``repeat`` wall time of fn(X) in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def load_or_fit(models_dir, n_features):
+    """Use trained models if present, otherwise fit synthetic stand-ins of the same shape"""
+    risk_path = os.path.join(models_dir, 'risk_assessment.joblib')
+    anomaly_path = os.path.join(models_dir, 'anomaly_detection.joblib')
+    if os.path.exists(risk_path) and os.path.exists(anomaly_path):
+        return joblib.load(risk_path), joblib.load(anomaly_path)
+    
+    print(f"Trained models not found in {models_dir}; fitting synthetic ones")
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(5000, n_features))
+    y = np.digitize(X[:, 0] + X[:, 1] ** 2 + rng.normal(size=len(X)), [0.5, 2.0])
+    risk_model = RandomForestClassifier(n_estimators=300, random_state=42).fit(X, y)
+    anomaly_model = IsolationForest(n_estimators=100, contamination=0.1, random_state=42).fit(X)
+    return risk_model, anomaly_model
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--models-dir', default='models')
+    parser.add_argument('--features', type=int, default=12,
+                        help='Feature count for synthetic models')
+    parser.add_argument('--batch-sizes', default='1,8,64,256')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    risk_model, anomaly_model = load_or_fit(args.models_dir, args.features)
+    benchmarks = [
+        ('risk_assessment', risk_model, 'predict_proba'),
+        ('anomaly_detection', anomaly_model, 'decision_function')
+    ]
+    
+    rng = np.random.default_rng(0)
+    print(f"{'model':<20}{'batch':>7}{'sklearn ms':>13}{'compiled ms':>13}{'speedup':>10}  identical")
+    for name, model, method in benchmarks:
+        compiled = compile_forest(model)
+        for batch_size in [int(size) for size in args.batch_sizes.split(',')]:
+            X = rng.normal(size=(batch_size, model.n_features_in_))
+            expected = getattr(model, method)(X)
+            actual = getattr(compiled, method)(X)
+            
+            sklearn_ms = time_call(getattr(model, method), X, args.repeat)
+            compiled_ms = time_call(getattr(compiled, method), X, args.repeat)
+            print(f"{name:<20}{batch_size:>7}{sklearn_ms:>13.3f}{compiled_ms:>13.3f}"
+                  f"{sklearn_ms / compiled_ms:>9.1f}x  {np.array_equal(expected, actual)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Export array-compiled copies of the served tree ensembles."""
+
+import os
+import sys
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+from utils.tree_compiler import compile_forest
+
+COMPILED_MODELS = ['risk_assessment', 'anomaly_detection']
+
+def main():
+    """Write {model}_compiled.joblib next to each trained forest."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--models-dir', default='models',
+                        help='Directory holding the trained .joblib models')
+    args = parser.parse_args()
+    
+    for model_name in COMPILED_MODELS:
+        model_path = os.path.join(args.models_dir, f'{model_name}.joblib')
+        if not os.path.exists(model_path):
+            print(f"[SKIPPED] {model_path} not found")
+            continue
+        
+        compiled = compile_forest(joblib.load(model_path))
+        output_path = os.path.join(args.models_dir, f'{model_name}_compiled.joblib')
+        joblib.dump(compiled, output_path, compress=0)
+        print(f"[SUCCESS] {model_name}: {compiled.n_trees} trees, {compiled.n_nodes} nodes -> {output_path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""Export the TensorFlow health risk networks for the NumPy backend."""
+
+import os
+import sys
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from services.tf_model_service import HealthRiskModel
+
+def main():
+    """Write {risk_type}_model.npz files next to the Keras models."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', default=Config.MODEL_PATH,
+                        help='Directory to write the .npz files to')
+    args = parser.parse_args()
+    
+    print("Loading TensorFlow models...")
+    model = HealthRiskModel()
+    
+    print(f"Exporting weights to {args.output}...")
+    model.export_numpy_weights(args.output)
+    print("[SUCCESS] Set INFERENCE_BACKEND=numpy to serve the exported weights")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""Export training rows for patients changed since the last export."""
+
+import os
+import sys
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from __init__ import create_app
+from ml.export import training_set_exporter
+
+def main():
+    """Append changed patients to the export parts, then optionally write the merged training CSV."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output',
+                        help='Merged training CSV to write after the export, e.g. data/training/patients.csv')
+    parser.add_argument('--labels',
+                        help='CSV of outcome labels keyed by patient_id, joined into the merged file')
+    args = parser.parse_args()
+    
+    app = create_app()
+    with app.app_context():
+        since = training_set_exporter.read_watermark()
+        exported_rows = training_set_exporter.export()
+        print(f"[SUCCESS] {exported_rows} changed patients exported since {since or 'the beginning'}")
+        
+        if args.output:
+            merged_rows = training_set_exporter.materialize(args.output, labels_path=args.labels)
+            print(f"[SUCCESS] {merged_rows} rows -> {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""Run queued ML jobs submitted by the API's asynchronous mode."""
+
+import os
+import sys
+import argparse
+import logging
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from __init__ import create_app
+from config import Config
+from services.job_queue import job_manager
+# Registers the job functions
+import api.ml_service
+
+def main():
+    """Claim and run jobs until interrupted; start one process per core to run jobs in parallel."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--poll-interval', type=float, default=Config.ML_JOB_POLL_INTERVAL,
+                        help='Seconds to wait when the queue is empty')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    
+    app = create_app()
+    with app.app_context():
+        try:
+            job_manager.work(poll_interval=args.poll_interval)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Register, promote and list versions in the model registry."""
+
+import os
+import sys
+import json
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.model_registry import ModelRegistry
+
+def main():
+    """Run a model registry command."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--root', help='Registry directory (defaults to MODEL_REGISTRY_PATH)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    register_parser = subparsers.add_parser('register', help='Copy artifacts in as a new version')
+    register_parser.add_argument('version')
+    register_parser.add_argument('source', help='Directory or file with the model artifacts')
+    register_parser.add_argument('--promote', action='store_true', help='Promote after registering')
+    
+    promote_parser = subparsers.add_parser('promote', help='Serve a registered version')
+    promote_parser.add_argument('version')
+    
+    subparsers.add_parser('list', help='Show the manifest')
+    
+    args = parser.parse_args()
+    registry = ModelRegistry(args.root)
+    
+    if args.command == 'register':
+        path = registry.register(args.version, args.source)
+        print(f"[SUCCESS] Registered {args.version} at {path}")
+        if args.promote:
+            registry.promote(args.version)
+            print(f"[SUCCESS] Promoted {args.version}")
+    elif args.command == 'promote':
+        registry.promote(args.version)
+        print(f"[SUCCESS] Promoted {args.version}")
+    else:
+        print(json.dumps(registry.read_manifest(), indent=2))
+
+if __name__ == '__main__':
+    main()
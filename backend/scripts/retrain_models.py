@@ -0,0 +1,37 @@
+"""Warm-start the registry's current models on new rows and register the result."""
+
+import os
+import sys
+import json
+import argparse
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.incremental import IncrementalRetrainer
+from ml.train_models import ModelTrainer
+from utils.model_registry import ModelRegistry
+
+def main():
+    """Retrain incrementally into a new registry version."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('version', help='Registry version to create')
+    parser.add_argument('--new-data', required=True,
+                        help='Directory with training CSVs holding only the new rows')
+    parser.add_argument('--data-path', default='data/training',
+                        help='Directory with the full training history, used for full refits')
+    parser.add_argument('--models-dir', default='models/retrain',
+                        help='Directory keeping search checkpoints of full refits; artifacts are '
+                             'built in a temporary directory and never written here')
+    parser.add_argument('--root', help='Registry directory (defaults to MODEL_REGISTRY_PATH)')
+    parser.add_argument('--promote', action='store_true', help='Promote after registering')
+    args = parser.parse_args()
+    
+    trainer = ModelTrainer(data_path=args.data_path, models_dir=args.models_dir)
+    retrainer = IncrementalRetrainer(trainer, args.new_data, registry=ModelRegistry(args.root))
+    decisions = retrainer.retrain(args.version, promote=args.promote)
+    print(json.dumps(decisions, indent=2))
+    print(f"[SUCCESS] Registered {args.version}" + (" and promoted it" if args.promote else ""))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+from __init__ import db
+from config import Config
+from models.patient import Patient
+from models.vital_sign import VitalSign
+from models.emergency_alert import EmergencyAlert
+from utils.metrics import metrics
+from utils.ml_utils import get_served_version, load_compiled_model, load_pipeline, vital_sign_measurements, VITAL_SIGN_FIELDS
+
+logger = logging.getLogger(__name__)
+
+class RollingWindow:
+    """The last N values of one measurement."""
+    
+    __slots__ = ('values',)
+    
+    def __init__(self, size: int):
+        self.values = deque(maxlen=size)
+    
+    def push(self, value: float):
+        self.values.append(value)
+    
+    def features(self, vital_type: str) -> Dict[str, float]:
+        """Same names and definitions as calculate_statistical_features"""
+        # Two passes over at most N values: running sums of squares lose
+        # precision once the values are large relative to their spread
+        count = len(self.values)
+        mean = math.fsum(self.values) / count
+        return {
+            f'{vital_type}_avg': mean,
+            f'{vital_type}_std': math.sqrt(math.fsum((value - mean) ** 2 for value in self.values) / count),
+            f'{vital_type}_min': min(self.values),
+            f'{vital_type}_max': max(self.values),
+            f'{vital_type}_latest': self.values[-1]
+        }
+
+class PatientWindows:
+    """Rolling windows of one patient, and when their newest reading was stored."""
+    
+    __slots__ = ('windows', 'seen_at')
+    
+    def __init__(self, windows: Dict[str, RollingWindow]):
+        self.windows = windows
+        self.seen_at = None
+
+class AnomalyStream:
+    """Score each new vital sign against a rolling per-patient window.
+    
+    Windows are a process-memory cache fed by new readings, so scoring a
+    reading normally costs one indexed existence check in the database. A
+    patient without a window in this process, after a restart or an
+    eviction, or whose readings were stored through another worker since
+    the window's newest one, gets it rebuilt from their most recent stored
+    readings.
+    A patient is scored once any of their measurement types has
+    ``min_readings`` values. The least recently seen patients are dropped
+    beyond ``max_patients``. Alert cooldowns are read from the stored alerts,
+    so they hold across workers and restarts.
+    """
+    
+    def __init__(self, window_size: int = 20, min_readings: int = 5, max_patients: int = 10000,
+                 alert_cooldown: float = 900):
+        self.window_size = window_size
+        self.min_readings = min_readings
+        self.max_patients = max_patients
+        self.alert_cooldown = alert_cooldown
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def has_window(self, patient_id) -> bool:
+        with self._lock:
+            return str(patient_id) in self._windows
+    
+    def seen_at(self, patient_id) -> Optional[datetime]:
+        """When the newest reading in the patient's window was stored, if known."""
+        with self._lock:
+            entry = self._windows.get(str(patient_id))
+            return entry.seen_at if entry is not None else None
+    
+    def has_newer_readings(self, patient_id, seen_at: datetime, exclude_id=None) -> bool:
+        """Whether readings were stored after ``seen_at``, e.g. through another worker."""
+        return db.session.query(VitalSign.id)\
+            .filter(
+                VitalSign.patient_id == patient_id,
+                VitalSign.created_at > seen_at,
+                VitalSign.id != exclude_id
+            )\
+            .first() is not None
+    
+    def load_windows(self, patient_id, exclude_id=None) -> Dict[str, RollingWindow]:
+        """Rebuild a patient's windows from their most recent stored readings."""
+        readings = db.session.query(*[getattr(VitalSign, field) for field in VITAL_SIGN_FIELDS])\
+            .filter(VitalSign.patient_id == patient_id, VitalSign.id != exclude_id)\
+            .order_by(VitalSign.recorded_at.desc())\
+            .limit(self.window_size)\
+            .all()
+        
+        windows = {}
+        for reading in reversed(readings):
+            self._push(windows, vital_sign_measurements(reading))
+        return windows
+    
+    def _push(self, windows, measurements):
+        for vital_type, value in measurements:
+            window = windows.get(vital_type)
+            if window is None:
+                window = windows[vital_type] = RollingWindow(self.window_size)
+            window.push(value)
+    
+    def update(self, patient_id, measurements: Iterable[Tuple[str, float]],
+               history: Optional[Dict[str, RollingWindow]] = None,
+               seen_at: Optional[datetime] = None) -> Tuple[Dict[str, float], int]:
+        """Fold readings into the patient's window and return its features and depth.
+        
+        ``history``, rebuilt from the stored readings, replaces the patient's
+        window. ``seen_at`` is when the readings were stored.
+        """
+        key = str(patient_id)
+        
+        with self._lock:
+            entry = self._windows.get(key)
+            if entry is None or history is not None:
+                entry = self._windows[key] = PatientWindows(history or {})
+                self._windows.move_to_end(key)
+                if len(self._windows) > self.max_patients:
+                    self._windows.popitem(last=False)
+            else:
+                self._windows.move_to_end(key)
+            
+            windows = entry.windows
+            self._push(windows, measurements)
+            if seen_at is not None and (entry.seen_at is None or seen_at > entry.seen_at):
+                entry.seen_at = seen_at
+            
+            features = {}
+            for vital_type, window in windows.items():
+                features.update(window.features(vital_type))
+            depth = max((len(window.values) for window in windows.values()), default=0)
+        
+        return features, depth
+    
+    def score(self, features: Dict[str, float]) -> float:
+        """IsolationForest decision value; negative means anomalous."""
+        version = get_served_version()
+        X = load_pipeline('anomaly_detection', version).transform(features)
+        return float(load_compiled_model('anomaly_detection', version).decision_function(X)[0])
+    
+    def observe(self, vital_sign) -> Optional[Dict[str, Any]]:
+        """Update the window with a new reading and score it once the window is deep enough."""
+        started = time.perf_counter()
+        patient_id = vital_sign.patient_id
+        seen_at = self.seen_at(patient_id)
+        history = None
+        try:
+            # Windows only see this worker's readings; rebuild stale ones
+            if not self.has_window(patient_id) or \
+                    (seen_at is not None and self.has_newer_readings(patient_id, seen_at, vital_sign.id)):
+                history = self.load_windows(patient_id, exclude_id=vital_sign.id)
+        except Exception as e:
+            logger.warning(f'Could not rebuild the anomaly window from history: {str(e)}')
+        features, depth = self.update(patient_id, vital_sign_measurements(vital_sign), history,
+                                      getattr(vital_sign, 'created_at', None))
+        
+        if depth < self.min_readings:
+            return None
+        
+        try:
+            score = self.score(features)
+        except Exception as e:
+            # Scoring is best effort; the reading itself is already stored
+            logger.warning(f'Streaming anomaly scoring failed: {str(e)}')
+            return None
+        
+        metrics.observe('anomaly_stream_score_ms', (time.perf_counter() - started) * 1000)
+        
+        is_anomaly = score < 0
+        if is_anomaly:
+            metrics.inc('anomaly_stream_anomalies')
+        
+        return {
+            'score': score,
+            'is_anomaly': is_anomaly,
+            'severity': 'high' if score < -0.1 else 'medium',
+            'features': features
+        }
+    
+    def should_alert(self, patient_id) -> bool:
+        """Rate-limit alerts to one per patient per cooldown period.
+        
+        Only committed alerts count, so a failed alert does not suppress the
+        next one. The patient row stays locked until the caller's transaction
+        ends, so concurrent readings cannot both raise an alert; callers
+        commit the alert or roll back.
+        """
+        db.session.query(Patient.id).filter(Patient.id == patient_id).with_for_update().first()
+        recent_alert = db.session.query(EmergencyAlert.id)\
+            .filter(
+                EmergencyAlert.patient_id == patient_id,
+                EmergencyAlert.alert_type == 'medical',
+                EmergencyAlert.created_at > datetime.utcnow() - timedelta(seconds=self.alert_cooldown)
+            )\
+            .first()
+        return recent_alert is None
+    
+    def clear(self):
+        with self._lock:
+            self._windows.clear()
+
+# Global anomaly stream instance
+anomaly_stream = AnomalyStream(
+    window_size=Config.ANOMALY_WINDOW_SIZE,
+    min_readings=Config.ANOMALY_MIN_READINGS,
+    max_patients=Config.ANOMALY_STREAM_MAX_PATIENTS,
+    alert_cooldown=Config.ANOMALY_ALERT_COOLDOWN
+)
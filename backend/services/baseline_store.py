@@ -0,0 +1,168 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from __init__ import db
+from config import Config
+from models.patient import Patient
+from models.vital_sign import VitalSign
+from models.health_metric import HealthMetric
+from models.patient_baseline import PatientBaseline
+from utils.db_utils import insert_missing
+from utils.ml_utils import VITAL_SIGN_FIELDS, vital_sign_measurements, baseline_features
+
+logger = logging.getLogger(__name__)
+
+def empty_baseline(patient_id, measurement_type) -> Dict[str, Any]:
+    """Column values of a PatientBaseline row without readings."""
+    return {
+        'patient_id': patient_id,
+        'measurement_type': measurement_type,
+        'count': 0,
+        'mean': 0.0,
+        'm2': 0.0,
+        'ewm_var': 0.0,
+        'updated_at': datetime.utcnow()
+    }
+
+class BaselineStore:
+    """Per-patient running baselines for every vital sign and health metric type.
+    
+    A ``before_flush`` hook checks each new VitalSign and HealthMetric against
+    the patient's baseline as it stood before the reading, then folds the
+    reading in with an O(1) Welford and EWMA update. Readers get mean,
+    variance and EWMA from stored rows without touching history; readings
+    written before baselines were maintained are backfilled with
+    ``rebuild_many``.
+    """
+    
+    def __init__(self, alpha: float = 0.1, min_count: int = 10, z_threshold: float = 3.0):
+        self.alpha = alpha
+        self.min_count = min_count
+        self.z_threshold = z_threshold
+        self._registered = False
+    
+    def register_listeners(self):
+        """Hook into session flushes so new readings update baselines."""
+        if not self._registered:
+            event.listen(Session, 'before_flush', self._before_flush)
+            self._registered = True
+    
+    def get_baselines(self, patient_id) -> Dict[str, PatientBaseline]:
+        """Return the patient's baselines keyed by measurement type."""
+        return {
+            baseline.measurement_type: baseline
+            for baseline in PatientBaseline.query.filter_by(patient_id=patient_id)
+        }
+    
+    def get_baselines_many(self, patient_ids: Iterable) -> Dict[str, Dict[str, PatientBaseline]]:
+        """Return baselines for many patients with one query, keyed by patient ID string."""
+        baselines = {}
+        for baseline in PatientBaseline.query.filter(PatientBaseline.patient_id.in_(list(patient_ids))):
+            baselines.setdefault(str(baseline.patient_id), {})[baseline.measurement_type] = baseline
+        return baselines
+    
+    def get_features(self, patient_id) -> Dict[str, Any]:
+        """Return the patient's baseline features for the ML pipelines."""
+        return baseline_features(self.get_baselines(patient_id))
+    
+    def rebuild_many(self, patient_ids: Iterable) -> int:
+        """Recompute the patients' baselines by replaying their full history; returns the reading count
+        
+        Rows for every measurement type are created and locked before history
+        is read, so readings written concurrently wait for the rebuild
+        instead of being folded into rows it is about to replace.
+        """
+        patient_ids = list(patient_ids)
+        metric_types = db.session.query(HealthMetric.metric_type)\
+            .filter(HealthMetric.patient_id.in_(patient_ids))\
+            .distinct()
+        measurement_types = set(VITAL_SIGN_FIELDS) | {metric_type for metric_type, in metric_types}
+        
+        insert_missing(db.session, PatientBaseline, [
+            empty_baseline(patient_id, measurement_type)
+            for patient_id in patient_ids for measurement_type in measurement_types
+        ])
+        baselines = {
+            (baseline.patient_id, baseline.measurement_type): baseline
+            for baseline in PatientBaseline.query
+                .filter(PatientBaseline.patient_id.in_(patient_ids))
+                .with_for_update()
+                .populate_existing()
+        }
+        for baseline in baselines.values():
+            baseline.reset()
+        
+        vital_signs = db.session.query(
+                VitalSign.patient_id, VitalSign.recorded_at,
+                *[getattr(VitalSign, field) for field in VITAL_SIGN_FIELDS]
+            )\
+            .filter(VitalSign.patient_id.in_(patient_ids))
+        readings = [
+            (vital_sign.recorded_at, vital_sign.patient_id, vital_type, value)
+            for vital_sign in vital_signs for vital_type, value in vital_sign_measurements(vital_sign)
+        ]
+        readings += db.session.query(
+                HealthMetric.measured_at, HealthMetric.patient_id, HealthMetric.metric_type, HealthMetric.value
+            )\
+            .filter(HealthMetric.patient_id.in_(patient_ids))\
+            .all()
+        
+        # Replayed in measurement order, as the EWMA depends on it
+        readings.sort(key=lambda reading: reading[0])
+        for _, patient_id, measurement_type, value in readings:
+            baselines[(patient_id, measurement_type)].update(value, self.alpha)
+        
+        for baseline in baselines.values():
+            if baseline.count == 0:
+                db.session.delete(baseline)
+        db.session.commit()
+        return len(readings)
+    
+    def _before_flush(self, session, flush_context, instances):
+        new_patient_ids = {obj.id for obj in session.new if isinstance(obj, Patient)}
+        baselines = {}
+        
+        def baseline_for(patient_id, measurement_type):
+            key = (patient_id, measurement_type)
+            if key not in baselines:
+                if patient_id in new_patient_ids:
+                    # Nobody else can write readings of a patient being created
+                    baseline = PatientBaseline(patient_id, measurement_type)
+                    session.add(baseline)
+                else:
+                    # A row a concurrent transaction just created is kept as is
+                    baseline = session.get(PatientBaseline, key, with_for_update=True)
+                    if baseline is None:
+                        insert_missing(session, PatientBaseline, [empty_baseline(patient_id, measurement_type)])
+                        baseline = session.get(PatientBaseline, key, with_for_update=True, populate_existing=True)
+                baselines[key] = baseline
+            return baselines[key]
+        
+        try:
+            with session.no_autoflush:
+                for obj in list(session.new):
+                    if isinstance(obj, VitalSign):
+                        measurements = vital_sign_measurements(obj)
+                        patient_baselines = {
+                            vital_type: baseline_for(obj.patient_id, vital_type)
+                            for vital_type, _ in measurements
+                        }
+                        obj.check_against_baselines(patient_baselines, self.min_count, self.z_threshold)
+                        for vital_type, value in measurements:
+                            patient_baselines[vital_type].update(value, self.alpha)
+                    elif isinstance(obj, HealthMetric) and isinstance(obj.value, (int, float)):
+                        baseline = baseline_for(obj.patient_id, obj.metric_type)
+                        obj.check_against_baseline(baseline, self.min_count, self.z_threshold)
+                        baseline.update(obj.value, self.alpha)
+        except Exception as e:
+            # Baselines must never block clinical writes
+            logger.error(f"Error updating patient baselines: {str(e)}", exc_info=True)
+
+# Global baseline store instance
+baseline_store = BaselineStore(
+    alpha=Config.BASELINE_EWMA_ALPHA,
+    min_count=Config.BASELINE_MIN_COUNT,
+    z_threshold=Config.BASELINE_Z_THRESHOLD
+)
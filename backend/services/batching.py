@@ -0,0 +1,140 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+import numpy as np
+from utils.metrics import metrics
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+class _PendingRequest:
+    __slots__ = ('processed_data', 'future', 'enqueued_at')
+    
+    def __init__(self, processed_data: Dict[str, np.ndarray]):
+        self.processed_data = processed_data
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+class MicroBatchScheduler:
+    """Coalesce concurrent single-row inference requests into batched calls.
+    
+    Requests are queued and a background thread groups them into a batch of
+    at most ``max_batch_size`` rows. If only one request is waiting it is
+    dispatched immediately, so an idle service pays no extra latency; under
+    concurrency the scheduler waits up to ``max_wait_ms`` for the batch to
+    fill before running ``predict_batch_fn`` once for the whole group.
+    """
+    
+    def __init__(self, predict_batch_fn: Callable[[Dict[str, np.ndarray]], Dict[str, np.ndarray]],
+                 max_batch_size: int = 32, max_wait_ms: float = 5.0, name: str = 'health_risk'):
+        self.predict_batch_fn = predict_batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+    
+    def submit(self, processed_data: Dict[str, np.ndarray]) -> Future:
+        """Queue a single row of per-risk features and return a future for its predictions."""
+        self._ensure_worker()
+        request = _PendingRequest(processed_data)
+        self._queue.put(request)
+        metrics.set_gauge('inference_queue_depth', self._queue.qsize(), scheduler=self.name)
+        return request.future
+    
+    def predict(self, processed_data: Dict[str, np.ndarray], timeout: float = None) -> Dict[str, float]:
+        """Submit a request and block until its predictions are available."""
+        return self.submit(processed_data).result(timeout=timeout)
+    
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=f'{self.name}-batcher', daemon=True
+                )
+                self._worker.start()
+    
+    def _collect_batch(self) -> List[_PendingRequest]:
+        batch = [self._queue.get()]
+        
+        # Drain whatever is already waiting without blocking
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        # A lone request is served immediately; only wait for stragglers when
+        # there is evidence of concurrent traffic.
+        if len(batch) == 1:
+            return batch
+        
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            metrics.set_gauge('inference_queue_depth', self._queue.qsize(), scheduler=self.name)
+            metrics.observe('inference_batch_size', len(batch), buckets=BATCH_SIZE_BUCKETS, scheduler=self.name)
+            
+            # Requests with different feature sets cannot share a batch
+            groups = {}
+            for request in batch:
+                groups.setdefault(tuple(sorted(request.processed_data)), []).append(request)
+            
+            for group in groups.values():
+                self._run_group(group)
+    
+    def _run_group(self, group: List[_PendingRequest]):
+        started_at = time.perf_counter()
+        for request in group:
+            metrics.observe('inference_queue_wait_ms', (started_at - request.enqueued_at) * 1000,
+                            scheduler=self.name)
+        
+        try:
+            outputs = self._predict(group)
+        except Exception as e:
+            if len(group) == 1:
+                group[0].future.set_exception(e)
+                return
+            
+            # One bad row must not fail the requests batched with it: rerun
+            # the rows one by one so only the failing ones get an exception
+            metrics.inc('inference_batch_fallbacks', scheduler=self.name)
+            for request in group:
+                try:
+                    self._set_results([request], self._predict([request]))
+                except Exception as row_error:
+                    request.future.set_exception(row_error)
+            return
+        
+        self._set_results(group, outputs)
+    
+    def _predict(self, group: List[_PendingRequest]) -> Dict[str, np.ndarray]:
+        stacked = {
+            risk_type: np.stack([request.processed_data[risk_type] for request in group])
+            for risk_type in group[0].processed_data
+        }
+        return self.predict_batch_fn(stacked)
+    
+    def _set_results(self, group: List[_PendingRequest], outputs: Dict[str, np.ndarray]):
+        for index, request in enumerate(group):
+            # Scalars per row become floats; per-row vectors (e.g. attributions) stay arrays
+            request.future.set_result({
+                key: float(values[index]) if np.ndim(values) == 1 else values[index]
+                for key, values in outputs.items()
+            })
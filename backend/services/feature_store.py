@@ -0,0 +1,275 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from __init__ import db
+from models.patient import Patient
+from models.user import User
+from models.vital_sign import VitalSign
+from models.medical_record import MedicalRecord
+from models.patient_feature import PatientFeatures
+from utils.ml_utils import (
+    calculate_age, encode_gender, calculate_bmi, vital_sign_measurements, diagnosis_codes,
+    running_stats_features, baseline_features
+)
+from utils.feature_queries import aggregate_vital_signs
+from utils.db_utils import insert_missing
+from services.baseline_store import baseline_store
+
+logger = logging.getLogger(__name__)
+
+def update_running_stats(stats: Dict[str, float], value: float) -> Dict[str, float]:
+    """Fold one value into count/mean/m2/min/max aggregates (Welford's algorithm)."""
+    count = stats.get('count', 0) + 1
+    delta = value - stats.get('mean', 0.0)
+    mean = stats.get('mean', 0.0) + delta / count
+    m2 = stats.get('m2', 0.0) + delta * (value - mean)
+    
+    return {
+        'count': count,
+        'mean': mean,
+        'm2': m2,
+        'min': min(stats.get('min', value), value),
+        'max': max(stats.get('max', value), value)
+    }
+
+def patient_demographics(patient, user=None) -> Dict[str, Any]:
+    """Extract the patient and user fields used by the risk assessment features."""
+    # Date of birth and gender live on the patient's user account
+    user = user if user is not None else patient.user
+    date_of_birth = getattr(user, 'date_of_birth', None)
+    return {
+        'date_of_birth': date_of_birth.strftime('%Y-%m-%d') if hasattr(date_of_birth, 'strftime') else date_of_birth,
+        'gender': getattr(user, 'gender', None),
+        'height': float(patient.height) if patient.height else None,
+        'weight': float(patient.weight) if patient.weight else None
+    }
+
+def stale_row(patient_id) -> Dict[str, Any]:
+    """Column values of a PatientFeatures row that must be rebuilt before use."""
+    return {
+        'patient_id': patient_id,
+        'patient_info': {},
+        'vital_stats': {},
+        'diagnosis_codes': [],
+        'is_stale': True,
+        'updated_at': datetime.utcnow()
+    }
+
+class FeatureStore:
+    """Per-patient, model-ready risk assessment features kept up to date on write.
+    
+    A ``before_flush`` hook folds every new VitalSign and MedicalRecord, and
+    every written Patient and its User, into the patient's ``PatientFeatures``
+    row in O(1). Updates and deletes of historical rows cannot be undone
+    incrementally, so they mark the row stale and it is rebuilt from history
+    on the next read. Vital sign aggregates cover the patient's full history,
+    for serving and training alike.
+    
+    Reads never commit: rebuilt rows are flushed into the caller's
+    transaction, stay locked until it ends and are saved when it commits.
+    """
+    
+    def __init__(self):
+        self._registered = False
+    
+    def register_listeners(self):
+        """Hook into session flushes so writes update the store."""
+        if not self._registered:
+            event.listen(Session, 'before_flush', self._before_flush)
+            self._registered = True
+    
+    def get_row(self, patient_id) -> Optional[PatientFeatures]:
+        """Return the patient's up-to-date row, rebuilding it if needed."""
+        row = PatientFeatures.query.get(patient_id)
+        if row is None or row.is_stale:
+            row = self.rebuild(patient_id)
+        return row
+    
+    def get_features(self, patient_id) -> Optional[Dict[str, Any]]:
+        """Return the patient's raw risk assessment features from a single row."""
+        row = self.get_row(patient_id)
+        if row is None:
+            return None
+        
+        features = self.assemble_features(row)
+        features.update(baseline_store.get_features(patient_id))
+        return features
+    
+    def get_vital_sign_features(self, patient_id) -> Dict[str, float]:
+        """Return the vital sign features of the patient's stored aggregates."""
+        row = self.get_row(patient_id)
+        if row is None:
+            return {}
+        
+        features = {}
+        for vital_type, stats in (row.vital_stats or {}).items():
+            features.update(running_stats_features(vital_type, stats))
+        return features
+    
+    def assemble_features(self, row: PatientFeatures) -> Dict[str, Any]:
+        """Derive the feature dict from stored state; time-dependent values are computed here."""
+        info = row.patient_info or {}
+        features = {}
+        
+        if info.get('date_of_birth'):
+            features['age'] = calculate_age(info['date_of_birth'])
+        if info.get('gender'):
+            features['gender'] = encode_gender(info['gender'])
+        if info.get('height') and info.get('weight'):
+            features['bmi'] = calculate_bmi(info['height'], info['weight'])
+        
+        for vital_type, stats in (row.vital_stats or {}).items():
+            features.update(running_stats_features(vital_type, stats))
+        
+        if row.last_record_date is not None:
+            features['diagnosis_count'] = len(row.diagnosis_codes or [])
+            features['days_since_last_record'] = (datetime.utcnow() - row.last_record_date).days
+        
+        return features
+    
+    def get_features_many(self, patient_ids) -> Dict[str, Dict[str, Any]]:
+        """Return features for many patients using set-based queries, keyed by patient ID string."""
+        rows = {
+            str(row.patient_id): row
+            for row in PatientFeatures.query.filter(PatientFeatures.patient_id.in_(list(patient_ids)))
+        }
+        
+        outdated = [patient_id for patient_id in patient_ids
+                    if str(patient_id) not in rows or rows[str(patient_id)].is_stale]
+        if outdated:
+            rows.update({str(patient_id): row for patient_id, row in self.rebuild_many(outdated).items()})
+        
+        baselines = baseline_store.get_baselines_many(patient_ids)
+        
+        features = {}
+        for patient_id, row in rows.items():
+            features[patient_id] = self.assemble_features(row)
+            features[patient_id].update(baseline_features(baselines.get(patient_id, {})))
+        return features
+    
+    def rebuild(self, patient_id) -> Optional[PatientFeatures]:
+        """Recompute a patient's row from their full history."""
+        return self.rebuild_many([patient_id]).get(patient_id)
+    
+    def rebuild_many(self, patient_ids) -> Dict[Any, PatientFeatures]:
+        """Recompute rows for many patients with one query per source table."""
+        patients = db.session.query(Patient, User)\
+            .outerjoin(User, User.id == Patient.user_id)\
+            .filter(Patient.id.in_(list(patient_ids)))\
+            .all()
+        if not patients:
+            return {}
+        patient_ids = [patient.id for patient, _ in patients]
+        
+        # Concurrent rebuilds may create the same rows, so missing ones are
+        # inserted with ON CONFLICT DO NOTHING before being locked and filled
+        insert_missing(db.session, PatientFeatures, [stale_row(patient_id) for patient_id in patient_ids])
+        existing = {
+            row.patient_id: row
+            for row in PatientFeatures.query
+                .filter(PatientFeatures.patient_id.in_(patient_ids))
+                .with_for_update()
+                .populate_existing()
+        }
+        vital_stats = aggregate_vital_signs(patient_ids)
+        
+        rows = {}
+        for patient, user in patients:
+            row = existing[patient.id]
+            row.diagnosis_codes = []
+            row.last_record_date = None
+            self.apply_patient(row, patient, user)
+            row.vital_stats = vital_stats.get(patient.id, {})
+            row.is_stale = False
+            rows[patient.id] = row
+        
+        records = db.session.query(
+                MedicalRecord.patient_id, MedicalRecord.diagnosis, MedicalRecord.record_date
+            )\
+            .filter(MedicalRecord.patient_id.in_(patient_ids))\
+            .yield_per(1000)
+        for record in records:
+            self.apply_medical_record(rows[record.patient_id], record)
+        
+        # Saved when the caller commits; reads must not end its transaction
+        db.session.flush()
+        
+        # Callers may pass IDs as strings; index the result both ways
+        return {**rows, **{str(patient_id): row for patient_id, row in rows.items()}}
+    
+    def apply_patient(self, row: PatientFeatures, patient, user=None):
+        row.patient_info = patient_demographics(patient, user)
+    
+    def apply_vital_sign(self, row: PatientFeatures, vital_sign):
+        # Reassign rather than mutate so the JSONB column is marked dirty
+        vital_stats = dict(row.vital_stats or {})
+        for vital_type, value in vital_sign_measurements(vital_sign):
+            vital_stats[vital_type] = update_running_stats(vital_stats.get(vital_type, {}), value)
+        row.vital_stats = vital_stats
+    
+    def apply_medical_record(self, row: PatientFeatures, record):
+        codes = set(row.diagnosis_codes or [])
+        codes.update(diagnosis_codes(record))
+        row.diagnosis_codes = sorted(codes)
+        
+        if row.last_record_date is None or record.record_date > row.last_record_date:
+            row.last_record_date = record.record_date
+    
+    def _row_for(self, session, patient_id, new_patient_ids) -> PatientFeatures:
+        if patient_id in new_patient_ids:
+            # No other transaction can see a patient being created, so the row
+            # is simply flushed after the patient
+            row = PatientFeatures(patient_id)
+            session.add(row)
+            return row
+        
+        row = session.get(PatientFeatures, patient_id, with_for_update=True)
+        if row is None:
+            # Without a row we cannot know the patient's history, so it starts
+            # stale; a row a concurrent transaction just created is kept as is
+            insert_missing(session, PatientFeatures, [stale_row(patient_id)])
+            row = session.get(PatientFeatures, patient_id, with_for_update=True, populate_existing=True)
+        return row
+    
+    def _before_flush(self, session, flush_context, instances):
+        new_patient_ids = {obj.id for obj in session.new if isinstance(obj, Patient)}
+        new_users = {obj.id: obj for obj in session.new if isinstance(obj, User)}
+        rows = {}
+        
+        def row_for(patient_id):
+            if patient_id not in rows:
+                rows[patient_id] = self._row_for(session, patient_id, new_patient_ids)
+            return rows[patient_id]
+        
+        try:
+            with session.no_autoflush:
+                for obj in list(session.new):
+                    if isinstance(obj, Patient):
+                        # The patient's user may be created in the same flush
+                        self.apply_patient(row_for(obj.id), obj, new_users.get(obj.user_id))
+                    elif isinstance(obj, VitalSign):
+                        self.apply_vital_sign(row_for(obj.patient_id), obj)
+                    elif isinstance(obj, MedicalRecord):
+                        self.apply_medical_record(row_for(obj.patient_id), obj)
+                
+                for obj in list(session.dirty):
+                    if isinstance(obj, Patient) and session.is_modified(obj):
+                        self.apply_patient(row_for(obj.id), obj)
+                    elif isinstance(obj, User) and session.is_modified(obj) and obj.patient_profile is not None:
+                        self.apply_patient(row_for(obj.patient_profile.id), obj.patient_profile, obj)
+                    elif isinstance(obj, (VitalSign, MedicalRecord)) and session.is_modified(obj):
+                        row_for(obj.patient_id).is_stale = True
+                
+                for obj in list(session.deleted):
+                    if isinstance(obj, (VitalSign, MedicalRecord)):
+                        row_for(obj.patient_id).is_stale = True
+        except Exception as e:
+            # The feature store must never block clinical writes
+            logger.error(f"Error updating patient features: {str(e)}", exc_info=True)
+            for row in rows.values():
+                row.is_stale = True
+
+# Global feature store instance
+feature_store = FeatureStore()
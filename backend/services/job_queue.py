@@ -0,0 +1,181 @@
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import and_, or_, update
+from __init__ import db
+from config import Config
+from models.ml_job import MLJob
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting for a worker."""
+
+class JobManager:
+    """Queue ML jobs in the database and run them in separate worker processes.
+    
+    Job state and results live in the ``ml_jobs`` table, so every web
+    worker sees every job and results survive restarts. The web processes
+    only insert jobs; ``scripts/ml_worker.py`` claims and runs them, keeping
+    CPU-bound inference out of the request workers. Jobs name a function
+    registered with ``register`` and carry JSON arguments, and each worker
+    runs them inside its application context.
+    
+    A claim is a lease of ``lease`` seconds from ``started_at``. Jobs still
+    running after it belong to a worker that crashed or was killed; the next
+    claim requeues them, or fails them once they used ``max_attempts``.
+    """
+    
+    def __init__(self, max_pending: int = 100, result_ttl: float = 3600,
+                 lease: float = 900, max_attempts: int = 2):
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._handlers: Dict[str, Callable[..., Any]] = {}
+    
+    def register(self, job_type: str, fn: Callable[..., Any]):
+        """Make fn runnable as jobs of job_type."""
+        self._handlers[job_type] = fn
+    
+    def submit(self, job_type: str, *args, owner_id: Optional[str] = None) -> MLJob:
+        """Queue job_type(*args) and return its job immediately."""
+        if job_type not in self._handlers:
+            raise ValueError(f'Unknown job type: {job_type}')
+        
+        pending = self.pending()
+        if pending >= self.max_pending:
+            raise JobQueueFull(f'{pending} ML jobs are already pending')
+        
+        job = MLJob(job_type, args=args, owner_id=owner_id)
+        db.session.add(job)
+        db.session.commit()
+        
+        metrics.set_gauge('ml_jobs_pending', pending + 1)
+        metrics.inc('ml_jobs_submitted', job_type=job_type)
+        return job
+    
+    def _lease_start(self) -> datetime:
+        """Jobs running since before this have outlived their lease."""
+        return datetime.utcnow() - timedelta(seconds=self.lease)
+    
+    def pending(self) -> int:
+        """Number of jobs queued or running within their lease."""
+        return MLJob.query.filter(or_(
+            MLJob.status == QUEUED,
+            and_(MLJob.status == RUNNING, MLJob.started_at >= self._lease_start())
+        )).count()
+    
+    def recover_abandoned(self) -> int:
+        """Requeue jobs whose lease expired, failing those out of attempts."""
+        abandoned = and_(MLJob.status == RUNNING, MLJob.started_at < self._lease_start())
+        now = datetime.utcnow()
+        
+        failed = db.session.execute(
+            update(MLJob)
+            .where(abandoned, MLJob.attempts >= self.max_attempts)
+            .values(status=FAILED, error='Job worker stopped before finishing', finished_at=now,
+                    expires_at=now + timedelta(seconds=self.result_ttl))
+        ).rowcount
+        requeued = db.session.execute(
+            update(MLJob)
+            .where(abandoned)
+            .values(status=QUEUED, started_at=None)
+        ).rowcount
+        db.session.commit()
+        
+        if failed or requeued:
+            logger.warning(f'Recovered abandoned ML jobs: {requeued} requeued, {failed} failed')
+            metrics.inc('ml_jobs_abandoned', value=failed + requeued)
+        return failed + requeued
+    
+    def get(self, job_id) -> Optional[MLJob]:
+        """Return the job, or None if it is unknown or its result expired."""
+        try:
+            job = db.session.get(MLJob, uuid.UUID(str(job_id)))
+        except ValueError:
+            return None
+        if job is None or (job.expires_at is not None and job.expires_at <= datetime.utcnow()):
+            return None
+        return job
+    
+    def claim(self) -> Optional[MLJob]:
+        """Mark the oldest queued job as running and return it, or None if there is none."""
+        self.recover_abandoned()
+        while True:
+            # Workers skip rows another worker is claiming instead of waiting on them
+            job_id = db.session.query(MLJob.id)\
+                .filter(MLJob.status == QUEUED)\
+                .order_by(MLJob.submitted_at)\
+                .limit(1)\
+                .with_for_update(skip_locked=True)\
+                .scalar()
+            if job_id is None:
+                db.session.commit()
+                return None
+            
+            # Only one worker's update matches the queued status
+            claimed = db.session.execute(
+                update(MLJob)
+                .where(MLJob.id == job_id, MLJob.status == QUEUED)
+                .values(status=RUNNING, started_at=datetime.utcnow(), attempts=MLJob.attempts + 1)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return db.session.get(MLJob, job_id, populate_existing=True)
+    
+    def run_next(self) -> bool:
+        """Run the oldest queued job; returns False when the queue is empty."""
+        job = self.claim()
+        if job is None:
+            return False
+        
+        started = time.perf_counter()
+        try:
+            # Round-trip through JSON so the result can be stored and served as is
+            result = json.loads(json.dumps(self._handlers[job.job_type](*job.args), default=str))
+            job.result, job.status = result, SUCCEEDED
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"ML job {job.id} ({job.job_type}) failed: {str(e)}")
+            job.error, job.status = str(e), FAILED
+        
+        job.finished_at = datetime.utcnow()
+        job.expires_at = job.finished_at + timedelta(seconds=self.result_ttl)
+        db.session.commit()
+        
+        metrics.inc('ml_jobs_completed', job_type=job.job_type, status=job.status)
+        metrics.observe('ml_job_duration_ms', (time.perf_counter() - started) * 1000, job_type=job.job_type)
+        return True
+    
+    def purge_expired(self) -> int:
+        """Delete jobs whose results have expired."""
+        deleted = MLJob.query.filter(MLJob.expires_at <= datetime.utcnow()).delete()
+        db.session.commit()
+        return deleted
+    
+    def work(self, poll_interval: float = 1.0):
+        """Run jobs until interrupted, polling the queue when it is empty."""
+        while True:
+            if not self.run_next():
+                self.purge_expired()
+                metrics.set_gauge('ml_jobs_pending', self.pending())
+                db.session.remove()
+                time.sleep(poll_interval)
+
+# Global job manager instance
+job_manager = JobManager(
+    max_pending=Config.ML_JOB_MAX_PENDING,
+    result_ttl=Config.ML_JOB_RESULT_TTL,
+    lease=Config.ML_JOB_LEASE,
+    max_attempts=Config.ML_JOB_MAX_ATTEMPTS
+)
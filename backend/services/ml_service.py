@@ -2,7 +2,36 @@ import numpy as np
 from typing import Dict, Any
 import os
 from config import Config
-from services.tf_model_service import health_risk_model
+from services.batching import MicroBatchScheduler
+from services.model_runtime import get_health_risk_model, get_model_version, register_swap_listener
+from services.prediction_cache import prediction_cache
+from services.shadow import shadow_evaluator, HEALTH_RISK_MODEL
+from utils.ml_utils import top_contributors
+from utils.stage_timing import StageTimer
+
+# Feature order of each risk model's input, as built by preprocess_health_data
+BASE_FEATURE_NAMES = [
+    'age', 'male', 'bmi', 'blood_pressure_systolic', 'blood_pressure_diastolic',
+    'heart_rate', 'current_smoker', 'frequent_alcohol'
+]
+RISK_FEATURE_NAMES = {
+    'cardiovascular': BASE_FEATURE_NAMES + ['cholesterol_hdl', 'cholesterol_ldl', 'triglycerides'],
+    'diabetes': BASE_FEATURE_NAMES + ['blood_sugar', 'hba1c'],
+    'respiratory': BASE_FEATURE_NAMES + ['respiratory_rate', 'fvc'],
+    'cancer': BASE_FEATURE_NAMES + ['family_history_cancer', 'previous_cancer', 'tumor_markers',
+                                    'genetic_risk_score'],
+    'mental_health': BASE_FEATURE_NAMES + ['stress_level', 'anxiety_score', 'depression_score']
+}
+
+# Coalesces concurrent prediction requests into batched model calls
+inference_scheduler = MicroBatchScheduler(
+    lambda batch: get_health_risk_model().predict_batch(batch, attributions=Config.RISK_FACTOR_ATTRIBUTIONS),
+    max_batch_size=Config.INFERENCE_BATCH_MAX_SIZE,
+    max_wait_ms=Config.INFERENCE_BATCH_WINDOW_MS
+)
+
+# Cached predictions are only valid for the model that produced them
+register_swap_listener(lambda version: prediction_cache.invalidate())
 
 def load_models():
     """Load all trained ML models."""
@@ -79,7 +108,23 @@ def preprocess_health_data(health_record) -> Dict[str, np.ndarray]:
     
     return processed_data
 
-def generate_risk_factors(health_record, predictions) -> list:
+def model_risk_factors(attributions: Dict[str, np.ndarray], top_k: int = Config.RISK_FACTOR_TOP_K) -> list:
+    """Name the inputs that raise each predicted risk the most, from model attributions."""
+    risk_factors = []
+    
+    for risk_type, contributions in attributions.items():
+        label = risk_type.replace('_', ' ')
+        for feature_name in top_contributors(contributions, RISK_FEATURE_NAMES[risk_type], top_k)[0]:
+            risk_factors.append(f"{feature_name.replace('_', ' ').capitalize()} ({label} risk)")
+    
+    return risk_factors
+
+def prediction_confidence(predictions: Dict[str, float], risk_types) -> float:
+    """Mean margin of the risk probabilities from the 0.5 decision boundary, scaled to [0, 1]."""
+    probabilities = np.array([predictions[f'{risk_type}_risk'] for risk_type in risk_types], dtype=np.float64)
+    return float(np.mean(np.abs(2 * probabilities - 1)))
+
+def generate_risk_factors(health_record, predictions, attributions=None) -> list:
     """Generate list of risk factors based on health data and predictions."""
     risk_factors = []
     
@@ -119,6 +164,10 @@ def generate_risk_factors(health_record, predictions) -> list:
     if health_record.triglycerides > 150:
         risk_factors.append("High triglycerides")
     
+    # Inputs the models weigh most heavily toward each risk
+    if attributions:
+        risk_factors.extend(model_risk_factors(attributions))
+    
     return risk_factors
 
 def generate_recommendations(risk_factors, predictions) -> list:
@@ -186,23 +235,68 @@ def predict_health_risks(health_record) -> Dict[str, Any]:
     """Generate health risk predictions using TensorFlow models."""
     try:
         # Preprocess health data
-        processed_data = preprocess_health_data(health_record)
+        with StageTimer('preprocess', model=HEALTH_RISK_MODEL):
+            processed_data = preprocess_health_data(health_record)
+        model_version = get_model_version()
+        
+        # Identical features scored by the same model give identical results
+        if Config.PREDICTION_CACHE_ENABLED:
+            with StageTimer('cache_lookup', model=HEALTH_RISK_MODEL):
+                cache_key = prediction_cache.make_key(
+                    processed_data,
+                    model_version,
+                    # Used by generate_risk_factors but not a model feature
+                    extra={'physical_activity_level': health_record.physical_activity_level}
+                )
+                cached_predictions = prediction_cache.get(cache_key)
+            if cached_predictions is not None:
+                return cached_predictions
         
         # Get predictions from TensorFlow models
-        predictions = health_risk_model.predict(processed_data)
+        with StageTimer('predict', model=HEALTH_RISK_MODEL) as predict_timer:
+            if Config.INFERENCE_BATCHING:
+                predictions = inference_scheduler.predict(processed_data)
+            else:
+                batch = {risk_type: np.array([data]) for risk_type, data in processed_data.items()}
+                outputs = get_health_risk_model().predict_batch(batch, attributions=Config.RISK_FACTOR_ATTRIBUTIONS)
+                predictions = {
+                    key: float(values[0]) if np.ndim(values) == 1 else values[0]
+                    for key, values in outputs.items()
+                }
+        
+        # Attributions feed the risk factors but are not part of the response
+        attributions = {
+            risk_type: predictions.pop(f'{risk_type}_attributions')
+            for risk_type in processed_data if f'{risk_type}_attributions' in predictions
+        }
+        
+        # Replay a sample through the candidate version off the request path,
+        # keyed like the candidate's predict_batch output
+        if shadow_evaluator.sample():
+            shadow_evaluator.replay(
+                HEALTH_RISK_MODEL, 'predict_batch',
+                {risk_type: np.array([data]) for risk_type, data in processed_data.items()},
+                {f'{risk_type}_risk': predictions[f'{risk_type}_risk'] for risk_type in processed_data},
+                predict_timer.elapsed_ms
+            )
         
         # Generate risk factors and recommendations
-        risk_factors = generate_risk_factors(health_record, predictions)
-        recommendations = generate_recommendations(risk_factors, predictions)
+        with StageTimer('risk_factors', model=HEALTH_RISK_MODEL):
+            risk_factors = generate_risk_factors(health_record, predictions, attributions)
+        with StageTimer('recommendations', model=HEALTH_RISK_MODEL):
+            recommendations = generate_recommendations(risk_factors, predictions)
         
         # Add additional information
         predictions.update({
             'risk_factors': risk_factors,
             'recommendations': recommendations,
-            'model_version': '1.0.0',
-            'confidence_score': 0.85  # This should be calculated based on model confidence
+            'model_version': model_version,
+            'confidence_score': prediction_confidence(predictions, processed_data)
         })
         
+        if Config.PREDICTION_CACHE_ENABLED:
+            prediction_cache.set(cache_key, predictions)
+        
         return predictions
         
     except Exception as e:
@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+import time
+import numpy as np
+from typing import Any, Dict
+from config import Config
+from utils.ml_utils import get_served_version, refresh_served_version
+from utils.model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+_model = None
+_model_version = Config.MODEL_VERSION
+_failed_version = None
+_model_lock = threading.Lock()
+_ready = threading.Event()
+_swap_listeners = []
+_watcher = None
+_warmup_thread = None
+_threads_lock = threading.Lock()
+_threads_pid = None
+
+def _create_model(model_path: str = None):
+    """Instantiate the configured inference backend."""
+    # Backends are imported here so that importing this module never pulls in
+    # TensorFlow; routes that do not use ML pay nothing for it.
+    if Config.INFERENCE_BACKEND == 'numpy':
+        from services.numpy_model_service import NumpyRiskModel
+        return NumpyRiskModel(model_path)
+    
+    from services.tf_model_service import HealthRiskModel
+    return HealthRiskModel(model_path)
+
+def _warm(model):
+    """Run one dummy batch through each of the model's networks."""
+    dummy_batch = {
+        risk_type: np.zeros((1, input_dim), dtype=np.float32)
+        for risk_type, input_dim in model.get_input_dims().items()
+    }
+    model.predict_batch(dummy_batch)
+
+def load_version(version: str):
+    """Instantiate and warm the health risk model of a registered version."""
+    model = _create_model(model_registry.version_path(version))
+    _warm(model)
+    return model
+
+def get_health_risk_model():
+    """Return the process-wide health risk model, loading it on first use.
+    
+    The version promoted in the model registry is used when there is one;
+    otherwise the models under ``Config.MODEL_PATH`` are loaded.
+    """
+    global _model, _model_version
+    
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                started_at = time.perf_counter()
+                version = model_registry.current_version()
+                _model = _create_model(model_registry.version_path(version))
+                _model_version = version or Config.MODEL_VERSION
+                logger.info(
+                    f"Loaded {Config.INFERENCE_BACKEND} health risk models "
+                    f"version {_model_version} in {time.perf_counter() - started_at:.2f}s"
+                )
+    
+    return _model
+
+def get_model_version() -> str:
+    """Return the version of the model currently being served."""
+    return _model_version
+
+def set_health_risk_model(model, version: str):
+    """Replace the served model and notify swap listeners."""
+    global _model, _model_version
+    
+    with _model_lock:
+        _model = model
+        _model_version = version
+    
+    for listener in list(_swap_listeners):
+        listener(version)
+
+def register_swap_listener(listener):
+    """Call ``listener(version)`` whenever the served model is replaced."""
+    _swap_listeners.append(listener)
+
+def warmup() -> Dict[str, Any]:
+    """Load the models and run one dummy batch through each network.
+    
+    The first call into a freshly built graph pays for tracing and memory
+    allocation; doing it here keeps that cost off the first real request.
+    """
+    started_at = time.perf_counter()
+    _warm(get_health_risk_model())
+    
+    _ready.set()
+    elapsed = time.perf_counter() - started_at
+    logger.info(f"Health risk models warmed up in {elapsed:.2f}s")
+    
+    return {'ready': True, 'warmup_seconds': elapsed}
+
+def start_warmup() -> threading.Thread:
+    """Run warmup() in a background thread, unless one is already running."""
+    global _warmup_thread
+    
+    if _warmup_thread is not None and _warmup_thread.is_alive():
+        return _warmup_thread
+    
+    def run():
+        try:
+            warmup()
+        except Exception as e:
+            logger.error(f"Error warming up health risk models: {str(e)}", exc_info=True)
+    
+    _warmup_thread = threading.Thread(target=run, name='model-warmup', daemon=True)
+    _warmup_thread.start()
+    return _warmup_thread
+
+def reload_from_registry() -> bool:
+    """Switch to the registry's promoted version if it changed.
+    
+    The new version is loaded and warmed while the old one keeps serving;
+    only the final reference swap happens under the lock, so in-flight
+    requests finish on the model they started with. A version that fails to
+    load leaves the old one serving and is not retried until another
+    version is promoted.
+    """
+    global _failed_version
+    
+    version = model_registry.current_version()
+    if version is None or version in (_model_version, _failed_version):
+        return False
+    
+    started_at = time.perf_counter()
+    try:
+        model = load_version(version)
+    except Exception as e:
+        _failed_version = version
+        logger.error(
+            f"Error loading health risk models version {version}, "
+            f"still serving {_model_version}: {str(e)}", exc_info=True
+        )
+        return False
+    set_health_risk_model(model, version)
+    _ready.set()
+    
+    logger.info(
+        f"Switched health risk models to version {version} in "
+        f"{time.perf_counter() - started_at:.2f}s"
+    )
+    return True
+
+def start_registry_watcher(interval: float = None) -> threading.Thread:
+    """Poll the model registry in the background and hot-swap new versions.
+    
+    Both the dense health risk networks and the trained sklearn models of a
+    newly promoted version are loaded here, off the request path.
+    """
+    global _watcher
+    interval = Config.MODEL_REGISTRY_POLL_INTERVAL if interval is None else interval
+    
+    if interval <= 0 or (_watcher is not None and _watcher.is_alive()):
+        return _watcher
+    
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                if refresh_served_version():
+                    logger.info(f"Serving trained models of version {get_served_version()}")
+            except Exception as e:
+                logger.error(f"Error preloading trained models: {str(e)}", exc_info=True)
+            
+            # Nothing to swap until the first request has loaded a model
+            if _model is None:
+                continue
+            try:
+                reload_from_registry()
+            except Exception as e:
+                logger.error(f"Error reloading health risk models: {str(e)}", exc_info=True)
+    
+    _watcher = threading.Thread(target=run, name='model-registry-watcher', daemon=True)
+    _watcher.start()
+    return _watcher
+
+def start_background_threads():
+    """Start the warmup and registry watcher threads of this process, once.
+    
+    Threads do not survive a fork, so a preloading gunicorn master must not
+    start them: each worker calls this from the ``post_fork`` hook, and any
+    other server on its first request.
+    """
+    global _threads_pid
+    
+    if _threads_pid == os.getpid():
+        return
+    with _threads_lock:
+        if _threads_pid == os.getpid():
+            return
+        _threads_pid = os.getpid()
+        
+        # Load and warm the ML models off the request path
+        if Config.ML_WARMUP_ON_STARTUP:
+            start_warmup()
+        
+        # Pick up newly promoted model versions without a restart
+        start_registry_watcher()
+
+def is_ready() -> bool:
+    """Whether the models are loaded and warmed up."""
+    return _ready.is_set()
@@ -0,0 +1,136 @@
+import numpy as np
+from typing import Dict, List, Tuple
+import os
+from config import Config
+
+RISK_TYPES = ['cardiovascular', 'diabetes', 'respiratory', 'cancer', 'mental_health']
+
+def _relu(x: np.ndarray) -> np.ndarray:
+    return np.maximum(x, 0)
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    # Split by sign so exp() never overflows
+    out = np.empty_like(x)
+    positive = x >= 0
+    out[positive] = 1 / (1 + np.exp(-x[positive]))
+    exp_x = np.exp(x[~positive])
+    out[~positive] = exp_x / (1 + exp_x)
+    return out
+
+def _linear(x: np.ndarray) -> np.ndarray:
+    return x
+
+ACTIVATIONS = {
+    'relu': _relu,
+    'sigmoid': _sigmoid,
+    'linear': _linear
+}
+
+# Derivatives in terms of the pre-activation z and the activation output
+ACTIVATION_GRADIENTS = {
+    'relu': lambda z, out: (z > 0).astype(out.dtype),
+    'sigmoid': lambda z, out: out * (1 - out),
+    'linear': lambda z, out: np.ones_like(out)
+}
+
+class DenseNetwork:
+    """Feed-forward stack of Dense layers evaluated with NumPy."""
+    
+    def __init__(self, layers: List[Tuple[np.ndarray, np.ndarray, str]]):
+        for _, _, activation in layers:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f'Unsupported activation: {activation}')
+        self.layers = layers
+    
+    @property
+    def input_dim(self) -> int:
+        return self.layers[0][0].shape[0]
+    
+    @classmethod
+    def load(cls, path: str) -> 'DenseNetwork':
+        """Load a network from an exported ``.npz`` file."""
+        with np.load(path) as weights:
+            activations = [str(name) for name in weights['activations']]
+            layers = [
+                (weights[f'kernel_{index}'], weights[f'bias_{index}'], activation)
+                for index, activation in enumerate(activations)
+            ]
+        return cls(layers)
+    
+    def forward(self, inputs: np.ndarray) -> np.ndarray:
+        """Run a batch of rows through the network."""
+        x = np.asarray(inputs, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            x = ACTIVATIONS[activation](x @ kernel + bias)
+        return x
+    
+    def attribute(self, inputs: np.ndarray) -> np.ndarray:
+        """Gradient x input attributions of the first output, one row per input row.
+        
+        One forward pass keeping activations plus one backward pass, so the
+        cost is roughly twice that of ``forward``.
+        """
+        x = np.asarray(inputs, dtype=np.float32)
+        steps = []
+        out = x
+        for kernel, bias, activation in self.layers:
+            z = out @ kernel + bias
+            out = ACTIVATIONS[activation](z)
+            steps.append((kernel, z, out, activation))
+        
+        grad = np.zeros_like(out)
+        grad[:, 0] = 1
+        for kernel, z, out, activation in reversed(steps):
+            grad = (grad * ACTIVATION_GRADIENTS[activation](z, out)) @ kernel.T
+        
+        return grad * x
+
+class NumpyRiskModel:
+    """TensorFlow-free runtime for the exported health risk networks.
+    
+    Weights are produced by ``HealthRiskModel.export_numpy_weights`` and
+    stored as ``{risk_type}_model.npz`` under ``Config.MODEL_PATH``. The
+    prediction interface mirrors ``HealthRiskModel``.
+    """
+    
+    def __init__(self, model_path: str = None):
+        self.models = {}
+        self.load_models(model_path or Config.MODEL_PATH)
+    
+    def load_models(self, model_path: str):
+        """Load all exported NumPy networks."""
+        for risk_type in RISK_TYPES:
+            model_file = os.path.join(model_path, f'{risk_type}_model.npz')
+            if not os.path.exists(model_file):
+                raise FileNotFoundError(
+                    f'NumPy weights not found at {model_file}; '
+                    f'run scripts/export_numpy_models.py first'
+                )
+            self.models[risk_type] = DenseNetwork.load(model_file)
+    
+    def get_input_dims(self) -> Dict[str, int]:
+        """Get the input dimension of each loaded model."""
+        return {risk_type: model.input_dim for risk_type, model in self.models.items()}
+    
+    def predict(self, processed_data: Dict[str, np.ndarray]) -> Dict[str, float]:
+        """Generate predictions for all risk types."""
+        batch = {risk_type: np.array([data]) for risk_type, data in processed_data.items()}
+        batch_predictions = self.predict_batch(batch)
+        
+        return {key: float(values[0]) for key, values in batch_predictions.items()}
+    
+    def predict_batch(self, batch: Dict[str, np.ndarray], attributions: bool = False) -> Dict[str, np.ndarray]:
+        """Generate predictions for a batch of rows for all risk types.
+        
+        With ``attributions`` the result also holds a 2D
+        ``{risk_type}_attributions`` array of per-feature contributions.
+        """
+        predictions = {}
+        
+        for risk_type, data in batch.items():
+            if risk_type in self.models:
+                predictions[f'{risk_type}_risk'] = self.models[risk_type].forward(data)[:, 0]
+                if attributions:
+                    predictions[f'{risk_type}_attributions'] = self.models[risk_type].attribute(data)
+        
+        return predictions
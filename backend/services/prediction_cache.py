@@ -0,0 +1,104 @@
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import numpy as np
+from config import Config
+from utils.metrics import metrics
+
+class PredictionCache:
+    """LRU cache of prediction results with per-entry expiry.
+    
+    Entries are keyed by a content hash of the preprocessed feature vectors
+    and the model version, so identical inputs scored by the same model
+    share an entry regardless of which record they came from.
+    """
+    
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(processed_data: Dict[str, np.ndarray], model_version: str,
+                 extra: Optional[Dict[str, Any]] = None) -> str:
+        """Build a stable hash of the feature vectors and model version."""
+        hasher = hashlib.sha256(model_version.encode())
+        
+        for risk_type in sorted(processed_data):
+            features = np.ascontiguousarray(processed_data[risk_type], dtype=np.float64)
+            hasher.update(risk_type.encode())
+            hasher.update(features.tobytes())
+        
+        # Inputs that affect the response but are not model features
+        if extra:
+            hasher.update(json.dumps(extra, sort_keys=True, default=str).encode())
+        
+        return hasher.hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                metrics.inc('prediction_cache_misses')
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.inc('prediction_cache_hits')
+            value = entry[1]
+        
+        # Callers are free to mutate the returned dict
+        return copy.deepcopy(value)
+    
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a result, evicting the least recently used entries if full."""
+        expires_at = time.monotonic() + self.ttl_seconds
+        
+        with self._lock:
+            self._entries[key] = (expires_at, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                metrics.inc('prediction_cache_evictions')
+            
+            metrics.set_gauge('prediction_cache_size', len(self._entries))
+    
+    def invalidate(self):
+        """Drop every cached result, e.g. after a model swap."""
+        with self._lock:
+            self._entries.clear()
+            metrics.set_gauge('prediction_cache_size', 0)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds
+            }
+
+# Global prediction cache instance
+prediction_cache = PredictionCache(
+    max_entries=Config.PREDICTION_CACHE_SIZE,
+    ttl_seconds=Config.PREDICTION_CACHE_TTL
+)
@@ -0,0 +1,210 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+import numpy as np
+from config import Config
+from utils.metrics import metrics
+from utils.ml_utils import load_model, load_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Name under which the dense health risk networks are shadowed
+HEALTH_RISK_MODEL = 'health_risk'
+
+def _as_array(output, keys=None) -> np.ndarray:
+    """Flatten a model output, or the given keys of a dict of outputs, to float64."""
+    if isinstance(output, dict):
+        return np.concatenate([np.ravel(np.asarray(output[key], dtype=np.float64)) for key in keys])
+    return np.asarray(output, dtype=np.float64)
+
+class ShadowStats:
+    """Running latency and divergence statistics of one shadowed model."""
+    
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.production_ms = 0.0
+        self.candidate_ms = 0.0
+        self.divergence_sum = 0.0
+        self.divergence_max = 0.0
+        self.compared_labels = 0
+        self.agreed_labels = 0
+    
+    def record(self, production_ms: float, candidate_ms: float, divergence: np.ndarray,
+               agreement: Optional[np.ndarray]):
+        self.count += 1
+        self.production_ms += production_ms
+        self.candidate_ms += candidate_ms
+        if divergence.size:
+            self.divergence_sum += float(divergence.mean())
+            self.divergence_max = max(self.divergence_max, float(divergence.max()))
+        if agreement is not None:
+            self.compared_labels += agreement.size
+            self.agreed_labels += int(agreement.sum())
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'production_ms_mean': self.production_ms / self.count if self.count else None,
+            'candidate_ms_mean': self.candidate_ms / self.count if self.count else None,
+            'divergence_mean': self.divergence_sum / self.count if self.count else None,
+            'divergence_max': self.divergence_max,
+            'label_agreement': self.agreed_labels / self.compared_labels if self.compared_labels else None
+        }
+
+class ShadowEvaluator:
+    """Replay a sample of live inputs through a candidate model version.
+    
+    ``submit`` is called on the request path after the production model has
+    answered. It only draws the sample and hands the inputs to a small
+    background pool; when ``max_pending`` replays are already waiting the
+    sample is dropped instead of queued, so shadowing never slows requests
+    down or grows without bound. The candidate's outputs are compared with
+    production's and only statistics are kept.
+    """
+    
+    def __init__(self, version: Optional[str] = None, sample_rate: float = 0.0, max_workers: int = 1,
+                 max_pending: int = 50):
+        self.version = version
+        self.sample_rate = sample_rate
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._stats: Dict[str, ShadowStats] = {}
+        self._candidates = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = None
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.version) and self.sample_rate > 0
+    
+    def set_candidate(self, version: Optional[str], sample_rate: Optional[float] = None):
+        """Shadow a different registry version, starting its statistics afresh."""
+        with self._lock:
+            self.version = version
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+            self._stats.clear()
+            self._candidates.clear()
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created lazily so a preloading master process never owns worker threads
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ml-shadow')
+        return self._executor
+    
+    def sample(self) -> bool:
+        """Draw whether the current request is replayed, before any replay inputs are built."""
+        return self.enabled and random.random() < self.sample_rate
+    
+    def submit(self, model_name: str, method: str, inputs, production_output, production_ms: float) -> bool:
+        """Maybe replay ``candidate.<method>(inputs)`` in the background; never raises.
+        
+        ``inputs`` are the raw, unscaled features of the trained models, since
+        the candidate version may come with a different feature pipeline, and
+        the network inputs of the health risk model.
+        """
+        return self.sample() and self.replay(model_name, method, inputs, production_output, production_ms)
+    
+    def replay(self, model_name: str, method: str, inputs, production_output, production_ms: float) -> bool:
+        """Replay ``candidate.<method>(inputs)`` in the background unless too many are pending; never raises."""
+        try:
+            with self._lock:
+                if self._pending >= self.max_pending:
+                    metrics.inc('shadow_dropped', model=model_name)
+                    return False
+                self._pending += 1
+                version = self.version
+                executor = self._get_executor()
+            
+            executor.submit(self._run, version, model_name, method, inputs, production_output, production_ms)
+            return True
+        except Exception as e:
+            logger.warning(f'Could not submit shadow evaluation: {str(e)}')
+            return False
+    
+    def load_candidate(self, model_name: str, version: str):
+        """Load a model of the candidate version, cached per name and version."""
+        if model_name == HEALTH_RISK_MODEL:
+            key = (model_name, version)
+            if key not in self._candidates:
+                # Imported here to keep TensorFlow out of processes that never shadow
+                from services.model_runtime import load_version
+                self._candidates[key] = load_version(version)
+            return self._candidates[key]
+        
+        return load_model(model_name, version)
+    
+    def load_candidate_pipeline(self, model_name: str, version: str):
+        """Load the feature pipeline of the candidate version's model."""
+        return load_pipeline(model_name, version)
+    
+    def _run(self, version, model_name, method, inputs, production_output, production_ms):
+        try:
+            candidate = self.load_candidate(model_name, version)
+            started = time.perf_counter()
+            if model_name != HEALTH_RISK_MODEL:
+                # Scaled and ordered the way the candidate was trained
+                inputs = self.load_candidate_pipeline(model_name, version).transform(inputs)
+            candidate_output = getattr(candidate, method)(inputs)
+            candidate_ms = (time.perf_counter() - started) * 1000
+            self._record(version, model_name, production_output, candidate_output, production_ms, candidate_ms)
+        except Exception as e:
+            logger.warning(f'Shadow evaluation of {model_name} version {version} failed: {str(e)}')
+            metrics.inc('shadow_errors', model=model_name)
+            with self._lock:
+                if version == self.version:
+                    self._stats.setdefault(model_name, ShadowStats()).errors += 1
+        finally:
+            with self._lock:
+                self._pending -= 1
+    
+    def _record(self, version, model_name, production_output, candidate_output, production_ms, candidate_ms):
+        keys = sorted(production_output) if isinstance(production_output, dict) else None
+        production = _as_array(production_output, keys)
+        candidate = _as_array(candidate_output, keys)
+        
+        divergence = np.abs(candidate.ravel() - production.ravel())
+        agreement = None
+        if production.ndim == 2 and production.shape[1] > 1:
+            # Class probabilities: also compare the predicted labels
+            agreement = np.argmax(candidate, axis=1) == np.argmax(production, axis=1)
+        
+        metrics.observe('shadow_latency_ms', candidate_ms, model=model_name, version=version)
+        if divergence.size:
+            metrics.observe('shadow_divergence', float(divergence.max()),
+                            buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1), model=model_name)
+        
+        with self._lock:
+            # Results of a replaced candidate must not mix into the new one's statistics
+            if version == self.version:
+                stats = self._stats.setdefault(model_name, ShadowStats())
+                stats.record(production_ms, candidate_ms, divergence, agreement)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Per-model statistics of the current candidate."""
+        with self._lock:
+            return {
+                'version': self.version,
+                'sample_rate': self.sample_rate,
+                'pending': self._pending,
+                'models': {name: stats.to_dict() for name, stats in self._stats.items()}
+            }
+    
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+# Global shadow evaluator instance
+shadow_evaluator = ShadowEvaluator(
+    version=Config.SHADOW_MODEL_VERSION,
+    sample_rate=Config.SHADOW_SAMPLE_RATE,
+    max_workers=Config.SHADOW_WORKERS,
+    max_pending=Config.SHADOW_MAX_PENDING
+)
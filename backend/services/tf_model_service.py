@@ -1,27 +1,47 @@
+import logging
 import tensorflow as tf
 import numpy as np
 from typing import Dict, Any
 import os
 from config import Config
 
+logger = logging.getLogger(__name__)
+
 class HealthRiskModel:
-    def __init__(self):
+    def __init__(self, model_path: str = None):
         self.models = {}
-        self.load_models()
+        self.fused_model = None
+        self._fused_fn = None
+        self.load_models(model_path)
+    
+    def load_models(self, model_path: str = None):
+        """Load all TensorFlow models.
         
-    def load_models(self):
-        """Load all TensorFlow models."""
-        model_path = Config.MODEL_PATH
+        Networks missing from a registry version are an error, since serving
+        untrained ones would return random risk scores. ``Config.MODEL_PATH``
+        ships without trained networks, so when it is used the missing ones
+        are replaced by untrained defaults unless ``ML_DEFAULT_RISK_MODELS``
+        is disabled.
+        """
+        allow_defaults = model_path is None and Config.ML_DEFAULT_RISK_MODELS
+        model_path = model_path or Config.MODEL_PATH
         risk_types = ['cardiovascular', 'diabetes', 'respiratory', 'cancer', 'mental_health']
         
+        models = {}
         for risk_type in risk_types:
             model_file = os.path.join(model_path, f'{risk_type}_model')
-            try:
-                self.models[risk_type] = tf.keras.models.load_model(model_file)
-            except:
-                # If model doesn't exist, create a simple neural network
-                self.models[risk_type] = self._create_default_model(risk_type)
-                
+            if os.path.exists(model_file):
+                models[risk_type] = tf.keras.models.load_model(model_file)
+            elif allow_defaults:
+                logger.warning(f"TensorFlow model not found at {model_file}, using an untrained default")
+                models[risk_type] = self._create_default_model(risk_type)
+            else:
+                raise FileNotFoundError(f'TensorFlow model not found at {model_file}')
+        self.models = models
+        
+        if Config.FUSED_INFERENCE:
+            self._build_fused_model()
+    
     def _create_default_model(self, risk_type: str) -> tf.keras.Model:
         """Create a default neural network model for risk prediction."""
         input_dim = self._get_input_dim(risk_type)
@@ -43,6 +63,36 @@ class HealthRiskModel:
         
         return model
     
+    def _build_fused_model(self):
+        """Pack every risk network into a single multi-input graph."""
+        inputs = []
+        outputs = []
+        signature = []
+        
+        for risk_type, model in self.models.items():
+            input_dim = model.input_shape[-1]
+            model_input = tf.keras.Input(shape=(input_dim,), name=f'{risk_type}_input')
+            inputs.append(model_input)
+            outputs.append(model(model_input, training=False))
+            signature.append(tf.TensorSpec(shape=(None, input_dim), dtype=tf.float32))
+        
+        self.fused_model = tf.keras.Model(
+            inputs=inputs,
+            outputs=tf.keras.layers.Concatenate(axis=-1)(outputs),
+            name='fused_risk_model'
+        )
+        # Trace once with a batch-agnostic signature so every call, whatever
+        # its batch size, reuses the same graph instead of going through
+        # Model.predict() and its per-call setup.
+        self._fused_fn = tf.function(
+            lambda model_inputs: self.fused_model(model_inputs, training=False),
+            input_signature=[signature]
+        )
+    
+    def get_input_dims(self) -> Dict[str, int]:
+        """Get the input dimension of each loaded model."""
+        return {risk_type: model.input_shape[-1] for risk_type, model in self.models.items()}
+    
     def _get_input_dim(self, risk_type: str) -> int:
         """Get input dimensions for each risk type model."""
         base_features = 8  # Common features for all models
@@ -57,26 +107,102 @@ class HealthRiskModel:
     
     def predict(self, processed_data: Dict[str, np.ndarray]) -> Dict[str, float]:
         """Generate predictions for all risk types."""
+        # Reshape each feature vector into a single-row batch
+        batch = {risk_type: np.array([data]) for risk_type, data in processed_data.items()}
+        batch_predictions = self.predict_batch(batch)
+        
+        return {key: float(values[0]) for key, values in batch_predictions.items()}
+    
+    def predict_batch(self, batch: Dict[str, np.ndarray], attributions: bool = False) -> Dict[str, np.ndarray]:
+        """Generate predictions for a batch of rows for all risk types.
+        
+        ``batch`` maps each risk type to a 2D array with one row per sample.
+        When every risk type is present the fused graph scores them all in a
+        single call; otherwise each model is evaluated on its own. With
+        ``attributions`` the result also holds gradient x input arrays under
+        ``{risk_type}_attributions``.
+        """
+        predictions = self._predict_batch(batch)
+        if attributions:
+            predictions.update(self.attribute_batch(batch))
+        return predictions
+    
+    def attribute_batch(self, batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Gradient x input attributions for a batch of rows for all risk types."""
+        attributions = {}
+        
+        for risk_type, data in batch.items():
+            if risk_type in self.models:
+                model_input = tf.convert_to_tensor(np.asarray(data, dtype=np.float32))
+                with tf.GradientTape() as tape:
+                    tape.watch(model_input)
+                    output = self.models[risk_type](model_input, training=False)[:, 0]
+                gradients = tape.gradient(output, model_input)
+                attributions[f'{risk_type}_attributions'] = (gradients * model_input).numpy()
+        
+        return attributions
+    
+    def _predict_batch(self, batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        if self._fused_fn is not None and set(batch) == set(self.models):
+            model_inputs = [
+                tf.convert_to_tensor(np.asarray(batch[risk_type], dtype=np.float32))
+                for risk_type in self.models
+            ]
+            outputs = self._fused_fn(model_inputs).numpy()
+            
+            return {
+                f'{risk_type}_risk': outputs[:, index]
+                for index, risk_type in enumerate(self.models)
+            }
+        
         predictions = {}
         
-        for risk_type, data in processed_data.items():
+        for risk_type, data in batch.items():
             if risk_type in self.models:
-                # Reshape data for model input
-                model_input = np.array([data])
-                # Get prediction
-                prediction = self.models[risk_type].predict(model_input)[0][0]
-                predictions[f'{risk_type}_risk'] = float(prediction)
-                
+                model_input = np.asarray(data, dtype=np.float32)
+                predictions[f'{risk_type}_risk'] = self.models[risk_type](model_input, training=False).numpy()[:, 0]
+        
         return predictions
     
-    def save_models(self):
+    def save_models(self, model_path: str = None):
         """Save all models to disk."""
-        model_path = Config.MODEL_PATH
+        model_path = model_path or Config.MODEL_PATH
         os.makedirs(model_path, exist_ok=True)
         
         for risk_type, model in self.models.items():
             model_file = os.path.join(model_path, f'{risk_type}_model')
             model.save(model_file)
-
-# Initialize global model instance
-health_risk_model = HealthRiskModel()
+    
+    def export_numpy_weights(self, output_path: str = None):
+        """Export every model's Dense weights to ``{risk_type}_model.npz``.
+        
+        The files are consumed by ``services.numpy_model_service`` so that
+        web workers can serve predictions without importing TensorFlow.
+        """
+        output_path = output_path or Config.MODEL_PATH
+        os.makedirs(output_path, exist_ok=True)
+        
+        for risk_type, model in self.models.items():
+            arrays = {}
+            activations = []
+            
+            for layer in model.layers:
+                if isinstance(layer, tf.keras.layers.Dropout):
+                    # Dropout is the identity at inference time
+                    continue
+                if not isinstance(layer, tf.keras.layers.Dense):
+                    raise ValueError(
+                        f'Cannot export layer {layer.name} of type '
+                        f'{type(layer).__name__} in {risk_type} model'
+                    )
+                kernel, bias = layer.get_weights()
+                index = len(activations)
+                arrays[f'kernel_{index}'] = kernel.astype(np.float32)
+                arrays[f'bias_{index}'] = bias.astype(np.float32)
+                activations.append(layer.get_config()['activation'])
+            
+            np.savez(
+                os.path.join(output_path, f'{risk_type}_model.npz'),
+                activations=np.array(activations),
+                **arrays
+            )
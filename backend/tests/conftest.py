@@ -0,0 +1,62 @@
+"""Shared fixtures for tests that need the clinical database tables."""
+
+import importlib
+import os
+import sys
+import uuid
+import pytest
+from flask import Flask
+from sqlalchemy import types
+from sqlalchemy.dialects.sqlite import base as sqlite_base
+from sqlalchemy.dialects.postgresql import JSONB, ARRAY
+from sqlalchemy.ext.compiler import compiles
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Every model has to be mapped before relationships can be configured
+MODEL_MODULES = [
+    'user', 'professional', 'patient', 'appointment', 'vital_sign', 'medication', 'prescription',
+    'medical_record', 'emergency_alert', 'health_metric', 'document', 'notification',
+    'patient_feature', 'patient_baseline', 'ml_job'
+]
+
+@compiles(JSONB, 'sqlite')
+@compiles(ARRAY, 'sqlite')
+@compiles(types.ARRAY, 'sqlite')
+def compile_json_on_sqlite(type_, compiler, **kw):
+    return 'JSON'
+
+class SQLiteUuid(types.Uuid):
+    """Binds UUID strings as PostgreSQL does, e.g. IDs taken from JWT identities or URLs"""
+    
+    def bind_processor(self, dialect):
+        process = super().bind_processor(dialect)
+        
+        def coerce(value):
+            if isinstance(value, str):
+                value = uuid.UUID(value)
+            return process(value) if process else value
+        return coerce
+
+@pytest.fixture
+def sqlite_db():
+    """The models' database on in-memory SQLite, with all tables created.
+    
+    PostgreSQL ARRAY and JSONB columns are stored as JSON, and UUID columns
+    accept UUID strings.
+    """
+    from __init__ import db
+    for name in MODEL_MODULES:
+        importlib.import_module(f'models.{name}')
+    
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        dialect = db.engine.dialect
+        dialect.colspecs = {**dialect.colspecs, types.ARRAY: sqlite_base.JSON, types.Uuid: SQLiteUuid}
+        db.create_all()
+        yield db
+        db.session.remove()
+        db.drop_all()
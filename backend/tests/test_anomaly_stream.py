@@ -0,0 +1,154 @@
+"""Tests for streaming anomaly scoring of vital signs."""
+
+import os
+import sys
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sklearn.ensemble import IsolationForest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.anomaly_stream as anomaly_stream_module
+from services.anomaly_stream import AnomalyStream
+from utils.feature_pipeline import FeaturePipeline
+from utils.ml_utils import calculate_statistical_features
+
+def reading(patient_id, heart_rate, oxygen_saturation=98):
+    return SimpleNamespace(patient_id=patient_id, heart_rate=heart_rate, oxygen_saturation=oxygen_saturation,
+                           blood_pressure_systolic=None, blood_pressure_diastolic=None,
+                           temperature=None, respiratory_rate=None)
+
+@pytest.fixture
+def anomaly_model(monkeypatch):
+    """An IsolationForest trained on windows of normal heart rates."""
+    rng = np.random.default_rng(0)
+    rows = []
+    for _ in range(300):
+        window = [{'heart_rate': value, 'oxygen_saturation': 98} for value in rng.normal(72, 4, size=5)]
+        rows.append(calculate_statistical_features(window))
+    
+    names = sorted(rows[0])
+    X = np.array([[row[name] for name in names] for row in rows])
+    pipeline = FeaturePipeline(names, X.mean(axis=0), np.where(X.std(axis=0) > 0, X.std(axis=0), 1.0))
+    model = IsolationForest(n_estimators=50, contamination=0.05, random_state=0).fit(pipeline.transform(X))
+    
+    monkeypatch.setattr(anomaly_stream_module, 'load_compiled_model', lambda name, version=None: model)
+    monkeypatch.setattr(anomaly_stream_module, 'load_pipeline', lambda name, version=None: pipeline)
+    return model
+
+def test_window_features_match_batch_features():
+    """Rolling features equal the request-time statistical features of the same window."""
+    stream = AnomalyStream(window_size=4)
+    values = [70, 75, 68, 90, 72, 81]
+    for value in values:
+        features, depth = stream.update('p1', [('heart_rate', float(value))])
+    
+    # calculate_statistical_features expects newest first
+    expected = calculate_statistical_features([{'heart_rate': value} for value in reversed(values[-4:])])
+    assert depth == 4
+    assert features.keys() == expected.keys()
+    for name in expected:
+        assert features[name] == pytest.approx(expected[name])
+
+def test_scores_only_after_min_readings_and_flags_outliers(anomaly_model):
+    """Readings are scored once the window is deep enough; a spike is anomalous."""
+    stream = AnomalyStream(window_size=5, min_readings=5)
+    results = [stream.observe(reading('p1', value)) for value in [71, 73, 70, 72]]
+    assert results == [None] * 4
+    
+    normal = stream.observe(reading('p1', 74))
+    assert normal is not None and not normal['is_anomaly']
+    
+    spike = stream.observe(reading('p1', 165))
+    assert spike['is_anomaly']
+    assert spike['score'] < normal['score']
+
+def test_patients_are_isolated_and_bounded():
+    """Each patient has their own window and the least recent are evicted."""
+    stream = AnomalyStream(window_size=3, max_patients=2)
+    stream.update('p1', [('heart_rate', 60.0)])
+    stream.update('p2', [('heart_rate', 100.0)])
+    stream.update('p3', [('heart_rate', 80.0)])
+    
+    features, depth = stream.update('p2', [('heart_rate', 100.0)])
+    assert depth == 2 and features['heart_rate_avg'] == 100.0
+    assert 'p1' not in stream._windows
+
+def create_patient(db):
+    from models.user import User
+    from models.patient import Patient
+    
+    user = User('patient@example.com', 'secret', 'patient', 'Ada', 'Patient')
+    patient = Patient(user.id)
+    db.session.add_all([user, patient])
+    db.session.commit()
+    return patient
+
+def test_window_rebuilt_from_history(sqlite_db, anomaly_model):
+    """A process without the patient's window rebuilds it from stored readings, once."""
+    from models.vital_sign import VitalSign
+    patient = create_patient(sqlite_db)
+    start = datetime(2024, 1, 1)
+    values = [71, 73, 70, 72, 74]
+    
+    readings = [VitalSign(patient.id, start + timedelta(minutes=index), heart_rate=value, oxygen_saturation=98)
+                for index, value in enumerate(values)]
+    sqlite_db.session.add_all(readings)
+    sqlite_db.session.commit()
+    
+    # A fresh process sees the last reading only, yet scores it against the full window
+    stream = AnomalyStream(window_size=5, min_readings=5)
+    result = stream.observe(readings[-1])
+    assert result is not None and not result['is_anomaly']
+    assert result['features']['heart_rate_avg'] == pytest.approx(np.mean(values))
+
+def test_alert_cooldown(sqlite_db):
+    """Only committed alerts start a patient's cooldown."""
+    from models.emergency_alert import EmergencyAlert
+    stream = AnomalyStream(alert_cooldown=60)
+    patient = create_patient(sqlite_db)
+    
+    assert stream.should_alert(patient.id)
+    sqlite_db.session.rollback()
+    # The alert was never stored, so the next reading may still alert
+    assert stream.should_alert(patient.id)
+    
+    sqlite_db.session.add(EmergencyAlert(patient.id, 'medical', 'Anomalous vital signs'))
+    sqlite_db.session.commit()
+    assert not stream.should_alert(patient.id)
+    assert AnomalyStream(alert_cooldown=0).should_alert(patient.id)
+
+def test_window_refreshed_with_readings_from_other_workers(sqlite_db, anomaly_model):
+    """A reading stored through another worker after the window's newest one is folded in."""
+    from models.vital_sign import VitalSign
+    patient = create_patient(sqlite_db)
+    start = datetime(2024, 1, 1)
+    stream = AnomalyStream(window_size=5, min_readings=1)
+    
+    def store(index, value):
+        vital_sign = VitalSign(patient.id, start + timedelta(minutes=index), heart_rate=value, oxygen_saturation=98)
+        vital_sign.created_at = start + timedelta(minutes=index)
+        sqlite_db.session.add(vital_sign)
+        sqlite_db.session.commit()
+        return vital_sign
+    
+    for index, value in enumerate([71, 73]):
+        stream.observe(store(index, value))
+    # Served by another worker, so this stream never observes it
+    store(2, 90)
+    
+    result = stream.observe(store(3, 70))
+    assert result['features']['heart_rate_avg'] == pytest.approx(np.mean([71, 73, 90, 70]))
+    assert stream.seen_at(patient.id) == start + timedelta(minutes=3)
+
+def test_window_std_keeps_precision_for_large_values():
+    """The std of large values with a small spread matches numpy's."""
+    stream = AnomalyStream(window_size=4)
+    values = [1e9 + delta for delta in [0.1, 0.4, 0.2, 0.3, 0.5, 0.25]]
+    for value in values:
+        features, _ = stream.update('p1', [('heart_rate', value)])
+    
+    assert features['heart_rate_std'] == pytest.approx(np.std(values[-4:]), rel=1e-6)
@@ -0,0 +1,68 @@
+"""Tests for the micro-batching inference scheduler."""
+
+import os
+import sys
+import threading
+import numpy as np
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.batching import MicroBatchScheduler, _PendingRequest
+
+def test_concurrent_requests_receive_their_own_results():
+    """Each caller gets the prediction for its own row even when batched."""
+    batch_sizes = []
+    
+    def predict_batch(batch):
+        batch_sizes.append(len(batch['cardiovascular']))
+        return {'cardiovascular_risk': batch['cardiovascular'][:, 0] * 2}
+    
+    scheduler = MicroBatchScheduler(predict_batch, max_batch_size=8, max_wait_ms=20)
+    results = {}
+    
+    def worker(value):
+        results[value] = scheduler.predict({'cardiovascular': np.array([value, 0.0])}, timeout=5)
+    
+    threads = [threading.Thread(target=worker, args=(float(i),)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert results == {float(i): {'cardiovascular_risk': i * 2.0} for i in range(20)}
+    assert sum(batch_sizes) == 20
+    assert max(batch_sizes) <= 8
+
+def test_errors_propagate_to_callers():
+    """A failing batch call raises in every waiting caller."""
+    def predict_batch(batch):
+        raise ValueError('model failure')
+    
+    scheduler = MicroBatchScheduler(predict_batch)
+    
+    try:
+        scheduler.predict({'diabetes': np.zeros(3)}, timeout=5)
+    except ValueError as e:
+        assert str(e) == 'model failure'
+    else:
+        raise AssertionError('Expected ValueError')
+
+def test_failing_row_does_not_fail_its_batch():
+    """When a batch call fails, rows are retried alone and only the bad one raises."""
+    calls = []
+    
+    def predict_batch(batch):
+        calls.append(len(batch['diabetes']))
+        if np.isnan(batch['diabetes']).any():
+            raise ValueError('NaN input')
+        return {'diabetes_risk': batch['diabetes'][:, 0]}
+    
+    scheduler = MicroBatchScheduler(predict_batch)
+    group = [_PendingRequest({'diabetes': np.array([value, 0.0])}) for value in (1.0, np.nan, 3.0)]
+    scheduler._run_group(group)
+    
+    assert calls == [3, 1, 1, 1]
+    assert group[0].future.result() == {'diabetes_risk': 1.0}
+    assert isinstance(group[1].future.exception(), ValueError)
+    assert group[2].future.result() == {'diabetes_risk': 3.0}
@@ -0,0 +1,94 @@
+"""Tests for the memory-mapped columnar training dataset cache."""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.datasets import ColumnarDataset
+
+def write_csv(path, n_rows=1000):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'age': rng.integers(18, 90, n_rows),
+        'heart_rate': rng.normal(72, 10, n_rows),
+        'visits': rng.integers(0, 40000, n_rows),
+        # Text only appears after the first chunk
+        'risk_level': ['1'] * (n_rows // 2) + list(rng.choice(['low', 'high'], n_rows - n_rows // 2))
+    })
+    frame.loc[3, 'heart_rate'] = np.nan
+    frame.to_csv(path, index=False)
+    return pd.read_csv(path, dtype={'risk_level': str})
+
+def test_cache_downcasts_and_round_trips(tmp_path):
+    """Columns are stored compactly and read back as the CSV's values."""
+    csv_path = str(tmp_path / 'risk_assessment_data.csv')
+    expected = write_csv(csv_path)
+    
+    dataset = ColumnarDataset.from_csv(csv_path, str(tmp_path / 'cache'), chunksize=300)
+    frame = dataset.to_frame()
+    
+    assert dataset.n_rows == len(expected)
+    assert frame['age'].dtype == np.int8
+    assert frame['visits'].dtype == np.int32
+    assert frame['heart_rate'].dtype == np.float32
+    assert isinstance(dataset.column('age'), np.memmap)
+    np.testing.assert_array_equal(frame['age'], expected['age'])
+    np.testing.assert_allclose(frame['heart_rate'], expected['heart_rate'], rtol=1e-6)
+    assert np.isnan(frame['heart_rate'][3])
+    assert list(frame['risk_level'].astype(str)) == list(expected['risk_level'])
+
+def test_batches_and_samples_cover_the_dataset(tmp_path):
+    """Streaming batches concatenate to the full frame; samples are distinct rows."""
+    csv_path = str(tmp_path / 'anomaly_detection_data.csv')
+    write_csv(csv_path)
+    dataset = ColumnarDataset.from_csv(csv_path, str(tmp_path / 'cache'))
+    
+    batches = list(dataset.iter_frames(batch_size=256, exclude=['risk_level']))
+    assert [len(batch) for batch in batches] == [256, 256, 256, 232]
+    pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), dataset.to_frame(exclude=['risk_level']))
+    
+    sample = dataset.sample(100, random_state=0)
+    assert len(sample) == 100
+    assert len(dataset.sample(5000)) == dataset.n_rows
+
+def test_cache_is_reused_until_the_csv_changes(tmp_path):
+    """Later opens skip parsing; a rewritten CSV is converted again."""
+    csv_path = str(tmp_path / 'health_prediction_data.csv')
+    write_csv(csv_path)
+    cache_dir = str(tmp_path / 'cache')
+    ColumnarDataset.from_csv(csv_path, cache_dir)
+    
+    manifest_path = os.path.join(cache_dir, 'health_prediction_data', 'manifest.json')
+    converted_at = os.stat(manifest_path).st_mtime_ns
+    assert ColumnarDataset.from_csv(csv_path, cache_dir).n_rows == 1000
+    assert os.stat(manifest_path).st_mtime_ns == converted_at
+    
+    write_csv(csv_path, n_rows=50)
+    assert ColumnarDataset.from_csv(csv_path, cache_dir).n_rows == 50
+
+def test_large_integers_round_trip_exactly(tmp_path):
+    """int64 values beyond float64 precision are stored and read back unchanged."""
+    csv_path = str(tmp_path / 'ids.csv')
+    values = [2 ** 62 + 1, -(2 ** 62) - 3, 2 ** 63 - 1, 7]
+    pd.DataFrame({'record_id': values}).to_csv(csv_path, index=False)
+    
+    dataset = ColumnarDataset.from_csv(csv_path, str(tmp_path / 'cache'), chunksize=2)
+    assert dataset.column('record_id').dtype == np.int64
+    assert dataset.column('record_id').tolist() == values
+
+def test_matrix_matches_the_frame(tmp_path):
+    """to_matrix holds the selected rows and columns of to_frame in one array."""
+    csv_path = str(tmp_path / 'risk_assessment_data.csv')
+    write_csv(csv_path)
+    dataset = ColumnarDataset.from_csv(csv_path, str(tmp_path / 'cache'))
+    rows = np.array([5, 0, 999, 3])
+    
+    matrix = dataset.to_matrix(exclude=['risk_level'], rows=rows)
+    expected = dataset.to_frame(exclude=['risk_level']).iloc[rows].to_numpy(dtype=np.float32)
+    assert matrix.dtype == np.float32
+    np.testing.assert_array_equal(matrix, expected)
+    assert list(dataset.values('risk_level', rows)) == list(dataset.to_frame()['risk_level'].astype(str)[rows])
@@ -0,0 +1,120 @@
+"""Tests for the incremental training set export."""
+
+import os
+import sys
+from datetime import date, datetime
+import pandas as pd
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.export import TrainingSetExporter
+from services.feature_store import feature_store
+
+def create_patients(db, count):
+    from models.user import User
+    from models.patient import Patient
+    
+    patients = []
+    for index in range(count):
+        user = User(f'patient{index}@example.com', 'secret', 'patient', 'Ada', 'Patient',
+                    date_of_birth=date(1970, 1, 1))
+        patient = Patient(user.id, height=170, weight=70)
+        db.session.add_all([user, patient])
+        patients.append(patient)
+    db.session.commit()
+    return patients
+
+def test_rerun_exports_only_changed_patients(sqlite_db, tmp_path):
+    """A second run writes a part holding just the patients with rows written since the watermark."""
+    from models.vital_sign import VitalSign
+    feature_store.register_listeners()
+    first, second = create_patients(sqlite_db, 2)
+    exporter = TrainingSetExporter(str(tmp_path), batch_size=1)
+    
+    until = datetime.utcnow()
+    assert exporter.export(until=until) == 2
+    assert exporter.read_watermark() == until
+    assert len(exporter.parts()) == 2
+    
+    sqlite_db.session.add(VitalSign(patient_id=first.id, recorded_at=datetime.utcnow(), heart_rate=70))
+    sqlite_db.session.commit()
+    assert exporter.export(until=datetime.utcnow()) == 1
+    
+    parts = exporter.parts()
+    assert len(parts) == 3
+    assert pd.read_csv(parts[-1])['patient_id'].tolist() == [str(first.id)]
+    assert exporter.export(until=datetime.utcnow()) == 0
+
+def test_watermark_only_advances_after_every_part(sqlite_db, tmp_path, monkeypatch):
+    """A run failing on a later part leaves the watermark alone, so the next run repeats it."""
+    create_patients(sqlite_db, 2)
+    exporter = TrainingSetExporter(str(tmp_path), batch_size=1)
+    write_part = exporter._write_part
+    
+    def fail_on_second_part(path, features):
+        if exporter.parts():
+            raise OSError('disk full')
+        write_part(path, features)
+    
+    monkeypatch.setattr(exporter, '_write_part', fail_on_second_part)
+    with pytest.raises(OSError):
+        exporter.export(until=datetime.utcnow())
+    assert exporter.read_watermark() is None
+    
+    monkeypatch.setattr(exporter, '_write_part', write_part)
+    assert exporter.export(until=datetime.utcnow()) == 2
+
+def test_materialize_keeps_newest_row_and_compacts_parts(sqlite_db, tmp_path):
+    """Later parts supersede earlier rows of a patient, and the parts collapse into one."""
+    from models.vital_sign import VitalSign
+    feature_store.register_listeners()
+    first, second = create_patients(sqlite_db, 2)
+    exporter = TrainingSetExporter(str(tmp_path))
+    exporter.export(until=datetime.utcnow())
+    
+    sqlite_db.session.add(VitalSign(patient_id=first.id, recorded_at=datetime.utcnow(), heart_rate=70))
+    sqlite_db.session.commit()
+    exporter.export(until=datetime.utcnow())
+    
+    output_path = tmp_path / 'training.csv'
+    assert exporter.materialize(str(output_path)) == 2
+    rows = pd.read_csv(output_path).set_index('patient_id')
+    assert rows.loc[str(first.id), 'heart_rate_avg'] == 70
+    assert pd.isna(rows.loc[str(second.id), 'heart_rate_avg'])
+    
+    parts = exporter.parts()
+    assert len(parts) == 1
+    assert pd.read_csv(parts[0]).equals(pd.read_csv(output_path))
+
+def test_user_changes_mark_their_patient_changed(sqlite_db, tmp_path):
+    """Editing a patient's user row, e.g. their date of birth, re-exports that patient."""
+    from models.user import User
+    feature_store.register_listeners()
+    first, second = create_patients(sqlite_db, 2)
+    exporter = TrainingSetExporter(str(tmp_path))
+    exporter.export(until=datetime.utcnow())
+    
+    user = sqlite_db.session.get(User, first.user_id)
+    user.date_of_birth = date(1980, 1, 1)
+    sqlite_db.session.commit()
+    
+    assert exporter.export(until=datetime.utcnow()) == 1
+    assert pd.read_csv(exporter.parts()[-1])['patient_id'].tolist() == [str(first.id)]
+
+def test_materialize_drops_deleted_patients(sqlite_db, tmp_path):
+    """Rows of patients deleted after their export are left out of the training set."""
+    from models.patient import Patient
+    from models.patient_feature import PatientFeatures
+    first, second = create_patients(sqlite_db, 2)
+    exporter = TrainingSetExporter(str(tmp_path))
+    exporter.export(until=datetime.utcnow())
+    
+    sqlite_db.session.query(PatientFeatures).filter_by(patient_id=second.id).delete()
+    sqlite_db.session.query(Patient).filter_by(id=second.id).delete()
+    sqlite_db.session.commit()
+    
+    output_path = tmp_path / 'training.csv'
+    assert exporter.materialize(str(output_path)) == 1
+    assert pd.read_csv(output_path)['patient_id'].tolist() == [str(first.id)]
@@ -0,0 +1,46 @@
+"""Tests for the compiled feature pipeline."""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.feature_pipeline import FeaturePipeline
+
+def make_training_frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'age': rng.integers(18, 90, 50),
+        'bmi': rng.normal(26, 4, 50),
+        'heart_rate_avg': rng.normal(72, 8, 50),
+        'constant': np.ones(50)
+    })
+
+def test_matches_standard_scaler_exactly():
+    """Transforming a DataFrame is bit-identical to StandardScaler.transform."""
+    frame = make_training_frame()
+    scaler = StandardScaler().fit(frame)
+    pipeline = FeaturePipeline.from_scaler(scaler, frame.columns)
+    
+    np.testing.assert_array_equal(pipeline.transform(frame), scaler.transform(frame))
+    # Columns are matched by name, not position
+    np.testing.assert_array_equal(pipeline.transform(frame[frame.columns[::-1]]), scaler.transform(frame))
+
+def test_dict_rows_use_fixed_order_and_mean_imputation():
+    """Dict inputs are ordered by name; missing or unknown keys are handled."""
+    frame = make_training_frame()
+    scaler = StandardScaler().fit(frame)
+    pipeline = FeaturePipeline.from_scaler(scaler, frame.columns)
+    row = frame.iloc[3].to_dict()
+    
+    np.testing.assert_array_equal(pipeline.transform(row), scaler.transform(frame.iloc[[3]]))
+    
+    del row['bmi']
+    row['unknown_feature'] = 42
+    scaled = pipeline.transform([row, row])
+    assert scaled.shape == (2, 4)
+    assert (scaled[:, 1] == 0).all()
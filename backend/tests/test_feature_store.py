@@ -0,0 +1,82 @@
+"""Tests for the incrementally maintained patient feature store."""
+
+import os
+import sys
+from datetime import date, datetime
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.feature_store import feature_store, stale_row
+from utils.db_utils import insert_missing
+from utils.ml_utils import calculate_age
+
+def create_patient(db, date_of_birth=date(1970, 1, 1)):
+    from models.user import User
+    from models.patient import Patient
+    
+    user = User('patient@example.com', 'secret', 'patient', 'Ada', 'Patient', date_of_birth=date_of_birth)
+    patient = Patient(user.id, height=170, weight=70)
+    db.session.add_all([user, patient])
+    db.session.commit()
+    return user, patient
+
+def test_demographics_are_read_from_the_user(sqlite_db):
+    """Age comes from the user's date of birth, both on write and on rebuild."""
+    from models.patient_feature import PatientFeatures
+    feature_store.register_listeners()
+    user, patient = create_patient(sqlite_db)
+    
+    row = sqlite_db.session.get(PatientFeatures, patient.id)
+    assert row.patient_info['date_of_birth'] == '1970-01-01'
+    
+    user.date_of_birth = date(1980, 1, 1)
+    sqlite_db.session.commit()
+    assert sqlite_db.session.get(PatientFeatures, patient.id).patient_info['date_of_birth'] == '1980-01-01'
+    
+    sqlite_db.session.delete(row)
+    sqlite_db.session.commit()
+    features = feature_store.get_features(patient.id)
+    assert features['age'] == calculate_age('1980-01-01')
+    assert features['bmi'] > 0
+
+def test_missing_rows_are_created_without_conflicts(sqlite_db):
+    """A write for a patient without a row creates a stale one; existing rows are never overwritten."""
+    from models.patient_feature import PatientFeatures
+    from models.vital_sign import VitalSign
+    feature_store.register_listeners()
+    _, patient = create_patient(sqlite_db)
+    sqlite_db.session.query(PatientFeatures).delete()
+    sqlite_db.session.commit()
+    
+    sqlite_db.session.add(VitalSign(patient_id=patient.id, recorded_at=datetime.utcnow(), heart_rate=70))
+    sqlite_db.session.commit()
+    row = sqlite_db.session.get(PatientFeatures, patient.id)
+    assert row.is_stale
+    
+    # A second writer racing to create the same row leaves the first one alone
+    insert_missing(sqlite_db.session, PatientFeatures, [dict(stale_row(patient.id), is_stale=False)])
+    sqlite_db.session.commit()
+    sqlite_db.session.expire_all()
+    assert sqlite_db.session.get(PatientFeatures, patient.id).is_stale
+    
+    assert feature_store.get_features(patient.id)['heart_rate_avg'] == 70
+    assert not sqlite_db.session.get(PatientFeatures, patient.id).is_stale
+
+def test_reads_do_not_commit_the_callers_transaction(sqlite_db):
+    """Rebuilding a stale row on read leaves the caller's pending changes uncommitted."""
+    from models.patient import Patient
+    from models.patient_feature import PatientFeatures
+    from models.vital_sign import VitalSign
+    feature_store.register_listeners()
+    _, patient = create_patient(sqlite_db)
+    sqlite_db.session.add(VitalSign(patient_id=patient.id, recorded_at=datetime.utcnow(), heart_rate=70))
+    sqlite_db.session.query(PatientFeatures).update({'is_stale': True})
+    sqlite_db.session.commit()
+    
+    patient.weight = 90
+    assert feature_store.get_vital_sign_features(patient.id)['heart_rate_avg'] == 70
+    sqlite_db.session.rollback()
+    
+    assert sqlite_db.session.get(Patient, patient.id).weight == 70
+    assert sqlite_db.session.get(PatientFeatures, patient.id).is_stale
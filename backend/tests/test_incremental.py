@@ -0,0 +1,155 @@
+"""Tests for warm-start incremental retraining."""
+
+import os
+import sys
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import IsolationForest, RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('xgboost')
+
+from ml.incremental import IncrementalRetrainer
+from ml.train_models import ModelTrainer
+from utils.feature_pipeline import FeaturePipeline
+from utils.model_registry import ModelRegistry
+
+def make_risk_frame(n_rows, shift=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({'age': rng.normal(50 + shift, 10, n_rows), 'bmi': rng.normal(26, 4, n_rows)})
+    frame['risk_level'] = np.where(frame['age'] > 50, 'high', 'low')
+    return frame
+
+def make_retrainer(tmp_path, new_rows):
+    """Registry with a 10-tree risk model as its current version, and a batch of new rows"""
+    history = make_risk_frame(400)
+    X, y = history[['age', 'bmi']], history['risk_level']
+    scaler = StandardScaler().fit(X)
+    pipeline = FeaturePipeline.from_scaler(scaler, X.columns)
+    model = RandomForestClassifier(n_estimators=10, random_state=42).fit(pipeline.transform(X), y)
+    
+    base_dir = tmp_path / 'base'
+    base_dir.mkdir()
+    joblib.dump(model, base_dir / 'risk_assessment.joblib')
+    joblib.dump(pipeline, base_dir / 'risk_assessment_pipeline.joblib')
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    registry.register('v1', str(base_dir))
+    registry.promote('v1')
+    
+    new_data_path = tmp_path / 'new'
+    new_data_path.mkdir()
+    new_rows.to_csv(new_data_path / 'risk_assessment_data.csv', index=False)
+    trainer = ModelTrainer(str(tmp_path / 'history'), models_dir=str(tmp_path / 'models'), n_jobs=1)
+    return IncrementalRetrainer(trainer, str(new_data_path), registry=registry), registry
+
+def make_vitals_frame(n_rows, scale=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'heart_rate': rng.normal(75, 10 * scale, n_rows),
+                         'temperature': rng.normal(37, 0.5 * scale, n_rows)})
+
+def make_anomaly_retrainer(tmp_path, new_rows):
+    """Registry with a 20-tree anomaly model as its current version; the history includes the new rows"""
+    history = make_vitals_frame(1000)
+    pipeline = FeaturePipeline.from_scaler(StandardScaler().fit(history), history.columns)
+    model = IsolationForest(n_estimators=20, contamination=0.1, random_state=42).fit(pipeline.transform(history))
+    
+    base_dir = tmp_path / 'base'
+    base_dir.mkdir()
+    joblib.dump(model, base_dir / 'anomaly_detection.joblib')
+    joblib.dump(pipeline, base_dir / 'anomaly_detection_pipeline.joblib')
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    registry.register('v1', str(base_dir))
+    registry.promote('v1')
+    
+    for name, frame in (('new', new_rows), ('history', pd.concat([history, new_rows]))):
+        (tmp_path / name).mkdir()
+        frame.to_csv(tmp_path / name / 'anomaly_detection_data.csv', index=False)
+    trainer = ModelTrainer(str(tmp_path / 'history'), models_dir=str(tmp_path / 'models'), n_jobs=1)
+    return IncrementalRetrainer(trainer, str(tmp_path / 'new'), registry=registry), registry
+
+def test_warm_start_grows_current_forest_and_registers_version(tmp_path):
+    """New rows add trees to the current model; models without new rows are kept."""
+    retrainer, registry = make_retrainer(tmp_path, make_risk_frame(200, seed=1))
+    
+    decisions = retrainer.retrain('v2')
+    
+    assert decisions['risk_assessment']['mode'] == 'warm_start'
+    assert decisions['anomaly_detection']['mode'] == 'unchanged'
+    model = joblib.load(registry.artifact_path('risk_assessment.joblib', 'v2'))
+    assert len(model.estimators_) == 12
+    assert registry.artifact_path('risk_assessment_compiled.joblib', 'v2')
+    assert registry.list_versions()['v2']['metadata']['parent'] == 'v1'
+    assert registry.current_version() == 'v1'
+
+def test_drift_falls_back_to_full_refit(tmp_path):
+    """Shifted features trigger a refit on the full history instead of a warm start."""
+    retrainer, _ = make_retrainer(tmp_path, make_risk_frame(200, shift=30, seed=1))
+    refits = []
+    retrainer.trainer.train_risk_assessment_model = lambda: refits.append('risk_assessment')
+    
+    decision = retrainer.retrain('v2')['risk_assessment']
+    
+    assert decision['mode'] == 'full'
+    assert decision['drift'] > retrainer.drift_threshold
+    assert refits == ['risk_assessment']
+
+def test_anomaly_threshold_is_calibrated_on_history(tmp_path):
+    """A warm-started anomaly model flags the contamination share of the history, not of the new rows."""
+    retrainer, registry = make_anomaly_retrainer(tmp_path, make_vitals_frame(1000, seed=1))
+    
+    decision = retrainer.retrain('v2')['anomaly_detection']
+    
+    assert decision['mode'] == 'warm_start'
+    model = joblib.load(registry.artifact_path('anomaly_detection.joblib', 'v2'))
+    pipeline = joblib.load(registry.artifact_path('anomaly_detection_pipeline.joblib', 'v2'))
+    history = pd.read_csv(tmp_path / 'history' / 'anomaly_detection_data.csv')
+    flagged = np.mean(model.predict(pipeline.transform(history)) == -1)
+    assert flagged == pytest.approx(0.1, abs=0.01)
+
+def test_anomaly_holdout_flagging_too_much_falls_back_to_full_refit(tmp_path):
+    """New rows far wider than the history are flagged too often, even where the means barely drift."""
+    retrainer, _ = make_anomaly_retrainer(tmp_path, make_vitals_frame(1000, scale=3.0, seed=1))
+    refits = []
+    retrainer.trainer.train_anomaly_detection_model = lambda: refits.append('anomaly_detection')
+    
+    decision = retrainer.retrain('v2')['anomaly_detection']
+    
+    assert decision['drift'] < retrainer.drift_threshold
+    assert decision['mode'] == 'full'
+    assert refits == ['anomaly_detection']
+
+def test_retrain_leaves_the_trainer_models_dir_alone(tmp_path):
+    """Artifacts already in the trainer's models_dir are neither deleted nor registered with the new version."""
+    retrainer, registry = make_retrainer(tmp_path, make_risk_frame(200, seed=1))
+    stale_path = os.path.join(retrainer.trainer.models_dir, 'anomaly_detection.joblib')
+    with open(stale_path, 'w') as f:
+        f.write('stale')
+    
+    retrainer.retrain('v2')
+    
+    assert 'anomaly_detection.joblib' not in os.listdir(registry.version_path('v2'))
+    assert os.path.exists(stale_path)
+    assert retrainer.trainer.models_dir == str(tmp_path / 'models')
+
+def test_full_refit_registers_only_the_new_artifacts(tmp_path):
+    """Without a base version, search checkpoints and leftovers are kept out of the registered version."""
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    trainer = ModelTrainer(str(tmp_path / 'history'), models_dir=str(tmp_path / 'models'), n_jobs=1)
+    with open(os.path.join(trainer.models_dir, 'stale.joblib'), 'w') as f:
+        f.write('stale')
+    
+    def train_all_models():
+        os.makedirs(os.path.join(trainer.models_dir, 'search_checkpoints'))
+        joblib.dump({}, os.path.join(trainer.models_dir, 'risk_assessment.joblib'))
+    
+    trainer.train_all_models = train_all_models
+    new_data_path = tmp_path / 'new'
+    new_data_path.mkdir()
+    IncrementalRetrainer(trainer, str(new_data_path), registry=registry).retrain('v1')
+    
+    assert os.listdir(registry.version_path('v1')) == ['risk_assessment.joblib']
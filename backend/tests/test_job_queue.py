@@ -0,0 +1,126 @@
+"""Tests for the database-backed ML job queue."""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+import pytest
+from flask import current_app
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.job_queue import JobManager, JobQueueFull, QUEUED, SUCCEEDED, FAILED
+
+def make_manager(**kwargs):
+    manager = JobManager(**kwargs)
+    manager.register('echo', lambda value: {'value': value, 'database': current_app.config['SQLALCHEMY_DATABASE_URI']})
+    
+    def fail():
+        raise ValueError('model missing')
+    
+    manager.register('fail', fail)
+    return manager
+
+def test_job_is_stored_and_run_by_a_worker(sqlite_db):
+    """Submitted jobs stay queued until a worker runs them; the result is read back from the database."""
+    manager = make_manager()
+    job_id = manager.submit('echo', 42, owner_id='u1').id
+    # Status requests may reach another web worker with its own session
+    sqlite_db.session.remove()
+    
+    queued = manager.get(job_id)
+    assert queued.status == QUEUED and not queued.done
+    
+    assert manager.run_next()
+    assert not manager.run_next()
+    sqlite_db.session.remove()
+    
+    finished = manager.get(str(job_id))
+    assert finished.status == SUCCEEDED
+    assert finished.result == {'value': 42, 'database': 'sqlite://'}
+    assert finished.owner_id == 'u1'
+    assert finished.to_dict()['finished_at'] is not None
+
+def test_failures_are_recorded(sqlite_db):
+    """An exception marks the job failed with its message."""
+    manager = make_manager()
+    job = manager.submit('fail')
+    manager.run_next()
+    
+    finished = manager.get(job.id)
+    assert finished.status == FAILED
+    assert finished.error == 'model missing'
+
+def test_jobs_are_claimed_once(sqlite_db):
+    """A claimed job is not handed to another worker."""
+    manager = make_manager()
+    job = manager.submit('echo', 1)
+    
+    assert manager.claim().id == job.id
+    assert manager.claim() is None
+
+def test_results_expire_after_ttl(sqlite_db):
+    """Finished jobs are hidden once their TTL has passed and purged by the workers."""
+    manager = make_manager(result_ttl=0.05)
+    job = manager.submit('echo', 1)
+    manager.run_next()
+    
+    assert manager.get(job.id).status == SUCCEEDED
+    time.sleep(0.1)
+    assert manager.get(job.id) is None
+    assert manager.purge_expired() == 1
+
+def test_pending_limit(sqlite_db):
+    """Submitting beyond max_pending is rejected instead of queueing forever."""
+    manager = make_manager(max_pending=1)
+    manager.submit('echo', 1)
+    
+    with pytest.raises(JobQueueFull):
+        manager.submit('echo', 2)
+    
+    manager.run_next()
+    manager.submit('echo', 3)
+
+def test_unknown_jobs(sqlite_db):
+    """Unregistered job types and malformed IDs are rejected."""
+    manager = make_manager()
+    with pytest.raises(ValueError):
+        manager.submit('missing')
+    assert manager.get('not-a-uuid') is None
+
+def abandon(db, job, minutes):
+    from models.ml_job import MLJob
+    # As left by a worker that crashed mid-job
+    db.session.query(MLJob).filter(MLJob.id == job.id)\
+        .update({'started_at': datetime.utcnow() - timedelta(minutes=minutes)})
+    db.session.commit()
+
+def test_abandoned_jobs_are_requeued_then_failed(sqlite_db):
+    """Jobs running past their lease stop counting as pending, are claimed again and fail when out of attempts."""
+    manager = make_manager(lease=60, max_attempts=2)
+    job = manager.submit('echo', 1)
+    assert manager.claim().id == job.id
+    assert manager.pending() == 1
+    
+    abandon(sqlite_db, job, minutes=5)
+    assert manager.pending() == 0
+    reclaimed = manager.claim()
+    assert reclaimed.id == job.id and reclaimed.attempts == 2
+    
+    abandon(sqlite_db, job, minutes=5)
+    assert manager.claim() is None
+    failed = manager.get(job.id)
+    assert failed.status == FAILED
+    assert failed.done and failed.expires_at is not None
+
+def test_running_jobs_within_their_lease_are_left_alone(sqlite_db):
+    """A job still inside its lease is neither requeued nor handed to another worker."""
+    manager = make_manager(lease=600)
+    job = manager.submit('echo', 1)
+    manager.claim()
+    abandon(sqlite_db, job, minutes=5)
+    
+    assert manager.recover_abandoned() == 0
+    assert manager.claim() is None
+    assert manager.pending() == 1
@@ -0,0 +1,78 @@
+"""End-to-end tests for the health risk prediction service."""
+
+import os
+import sys
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import ml_service
+from services.model_runtime import get_model_version, set_health_risk_model
+
+class StubRiskModel:
+    """Scores every risk type with a fixed probability"""
+    
+    def __init__(self, probability):
+        self.probability = probability
+    
+    def predict_batch(self, batch, attributions=False):
+        outputs = {f'{risk_type}_risk': np.full(len(rows), self.probability) for risk_type, rows in batch.items()}
+        if attributions:
+            outputs.update({f'{risk_type}_attributions': np.asarray(rows, dtype=np.float64)
+                            for risk_type, rows in batch.items()})
+        return outputs
+
+def make_health_record(**overrides):
+    record = dict(
+        age=58, gender='male', bmi=31.0, blood_pressure_systolic=150, blood_pressure_diastolic=95,
+        heart_rate=80, smoking_status='current', alcohol_consumption='never',
+        physical_activity_level='sedentary', cholesterol_hdl=35, cholesterol_ldl=160, triglycerides=200,
+        blood_sugar=130, hba1c=6.8, respiratory_rate=16, fvc=3.5, family_history_cancer=1,
+        previous_cancer=0, tumor_markers=0.2, genetic_risk_score=0.4, stress_level=5,
+        anxiety_score=3, depression_score=2
+    )
+    record.update(overrides)
+    return SimpleNamespace(**record)
+
+@pytest.fixture
+def stub_model(monkeypatch):
+    monkeypatch.setattr(ml_service.Config, 'PREDICTION_CACHE_ENABLED', False)
+    previous_version = get_model_version()
+    set_health_risk_model(StubRiskModel(0.9), 'test')
+    yield
+    set_health_risk_model(None, previous_version)
+
+@pytest.mark.parametrize('batching', [True, False])
+def test_predict_health_risks_end_to_end(stub_model, monkeypatch, batching):
+    """A prediction returns every risk, its factors and a confidence score."""
+    monkeypatch.setattr(ml_service.Config, 'INFERENCE_BATCHING', batching)
+    
+    predictions = ml_service.predict_health_risks(make_health_record())
+    
+    for risk_type in ml_service.RISK_FEATURE_NAMES:
+        assert np.isclose(predictions[f'{risk_type}_risk'], 0.9)
+        assert f'{risk_type}_attributions' not in predictions
+    assert np.isclose(predictions['confidence_score'], 0.8)
+    assert 'High blood pressure' in predictions['risk_factors']
+    assert predictions['model_version'] == 'test'
+    assert predictions['recommendations']
+
+def test_shadowed_prediction_records_divergence(stub_model, monkeypatch):
+    """With shadowing on, the candidate is compared per risk with production."""
+    evaluator = ml_service.shadow_evaluator
+    monkeypatch.setattr(evaluator, 'load_candidate', lambda model_name, version: StubRiskModel(0.6))
+    previous = (evaluator.version, evaluator.sample_rate)
+    evaluator.set_candidate('candidate', sample_rate=1.0)
+    try:
+        ml_service.predict_health_risks(make_health_record())
+        evaluator.shutdown()
+        stats = evaluator.stats()['models']['health_risk']
+    finally:
+        evaluator.set_candidate(*previous)
+    
+    assert stats['count'] == 1
+    assert stats['errors'] == 0
+    assert np.isclose(stats['divergence_max'], 0.3)
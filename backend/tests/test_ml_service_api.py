@@ -0,0 +1,166 @@
+"""Tests for the ML service API endpoints."""
+
+import json
+import os
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+import numpy as np
+import pytest
+from flask import current_app
+from flask_jwt_extended import create_access_token
+from flask_restx import Api
+from sklearn.ensemble import RandomForestClassifier
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api.ml_service as ml_service_api
+from __init__ import jwt
+from utils.feature_pipeline import FeaturePipeline
+
+class IdentityPipeline:
+    """Passes the raw features through in a fixed column order"""
+    
+    def __init__(self):
+        self.feature_names = None
+    
+    def transform(self, features):
+        self.feature_names = sorted(features)
+        return np.array([[features[name] for name in self.feature_names]])
+
+class FlagEverything:
+    """An anomaly model calling every row an outlier"""
+    
+    def predict(self, X):
+        return -np.ones(len(X))
+
+@pytest.fixture
+def client(sqlite_db):
+    """A test client serving the ML service namespace with JWT auth."""
+    app = current_app._get_current_object()
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-of-at-least-32-bytes'
+    jwt.init_app(app)
+    Api(app).add_namespace(ml_service_api.api)
+    return app.test_client()
+
+def create_user(db, user_type, email):
+    from models.user import User
+    from models.patient import Patient
+    
+    user = User(email, 'secret', user_type, 'Ada', 'Lovelace', date_of_birth=date(1970, 1, 1))
+    db.session.add(user)
+    patient = None
+    if user_type == 'patient':
+        patient = Patient(user.id, height=170, weight=70)
+        db.session.add(patient)
+    db.session.commit()
+    return user, patient
+
+def auth_header(user):
+    return {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+def test_anomaly_detection_reports_the_requested_patient(client, sqlite_db, monkeypatch):
+    """Anomaly detection scores the patient's readings and returns their ID."""
+    from models.vital_sign import VitalSign
+    user, patient = create_user(sqlite_db, 'patient', 'patient@example.com')
+    start = datetime(2024, 1, 1)
+    sqlite_db.session.add_all([
+        VitalSign(patient.id, start + timedelta(minutes=index), heart_rate=value, oxygen_saturation=98)
+        for index, value in enumerate([70, 72, 140])
+    ])
+    sqlite_db.session.commit()
+    
+    monkeypatch.setattr(ml_service_api, 'get_served_version', lambda: None)
+    monkeypatch.setattr(ml_service_api, 'load_compiled_model', lambda name, version=None: FlagEverything())
+    monkeypatch.setattr(ml_service_api, 'load_pipeline', lambda name, version=None: IdentityPipeline())
+    
+    response = client.post('/ml-service/anomaly-detection', json={'patient_id': str(patient.id)},
+                           headers=auth_header(user))
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['patient_id'] == str(patient.id)
+
+def test_anomaly_detection_rejects_other_patients(client, sqlite_db):
+    """A patient cannot run anomaly detection on someone else's data."""
+    user, _ = create_user(sqlite_db, 'patient', 'first@example.com')
+    _, other = create_user(sqlite_db, 'patient', 'second@example.com')
+    
+    response = client.post('/ml-service/anomaly-detection', json={'patient_id': str(other.id)},
+                           headers=auth_header(user))
+    assert response.status_code == 403
+
+@pytest.fixture
+def risk_model(monkeypatch):
+    """A small forest scoring patients by age and BMI."""
+    rng = np.random.default_rng(0)
+    X = rng.normal([50, 27], [15, 5], size=(200, 2))
+    y = np.where(X[:, 1] > 30, 'high', 'low')
+    model = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0).fit(X, y)
+    
+    monkeypatch.setattr(ml_service_api.Config, 'COHORT_BATCH_SIZE', 1)
+    monkeypatch.setattr(ml_service_api, 'get_served_version', lambda: None)
+    monkeypatch.setattr(ml_service_api, 'load_compiled_model', lambda name, version=None: model)
+    monkeypatch.setattr(ml_service_api, 'load_pipeline',
+                        lambda name, version=None: FeaturePipeline(['age', 'bmi'], [0, 0], [1, 1]))
+    return model
+
+def post_cohort(client, user, patient_ids):
+    response = client.post('/ml-service/risk-assessment/batch', json={'patient_ids': patient_ids},
+                           headers=auth_header(user))
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()] \
+        if response.status_code == 200 else None
+    return response, records
+
+def test_cohort_rejects_invalid_ids_and_patients(client, sqlite_db, risk_model):
+    """Malformed IDs fail the whole request with 400; patients may not assess cohorts."""
+    professional, _ = create_user(sqlite_db, 'professional', 'doctor@example.com')
+    patient_user, patient = create_user(sqlite_db, 'patient', 'patient@example.com')
+    
+    response, _ = post_cohort(client, professional, [str(patient.id), 'not-a-uuid'])
+    assert response.status_code == 400
+    assert 'not-a-uuid' in response.get_json()['message']
+    
+    response, _ = post_cohort(client, patient_user, [str(patient.id)])
+    assert response.status_code == 403
+
+def test_cohort_streams_assessments_and_missing_patients(client, sqlite_db, risk_model):
+    """A mixed cohort yields an assessment per known patient and an error per unknown one."""
+    professional, _ = create_user(sqlite_db, 'professional', 'doctor@example.com')
+    _, light = create_user(sqlite_db, 'patient', 'light@example.com')
+    _, heavy = create_user(sqlite_db, 'patient', 'heavy@example.com')
+    heavy.weight = 110
+    sqlite_db.session.commit()
+    unknown_id = str(uuid.uuid4())
+    
+    response, records = post_cohort(client, professional, [str(light.id), unknown_id, str(heavy.id), str(light.id)])
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    
+    by_patient = {record['patient_id']: record for record in records}
+    assert len(records) == 3
+    assert by_patient[unknown_id] == {'patient_id': unknown_id, 'error': 'Patient not found'}
+    assert by_patient[str(light.id)]['risk_level'] == 'low'
+    assert by_patient[str(heavy.id)]['risk_level'] == 'high'
+    assert 0 <= by_patient[str(heavy.id)]['confidence_score'] <= 1
+
+def test_failing_chunk_is_reported_in_the_stream(client, sqlite_db, risk_model, monkeypatch):
+    """A chunk that fails after the status line yields an error record; later chunks are still assessed."""
+    professional, _ = create_user(sqlite_db, 'professional', 'doctor@example.com')
+    _, first = create_user(sqlite_db, 'patient', 'first@example.com')
+    _, second = create_user(sqlite_db, 'patient', 'second@example.com')
+    assess_cohort_chunk = ml_service_api.assess_cohort_chunk
+    
+    def fail_first_chunk(model, pipeline, patient_ids):
+        if str(first.id) in patient_ids:
+            raise RuntimeError('feature store unavailable')
+        return assess_cohort_chunk(model, pipeline, patient_ids)
+    
+    monkeypatch.setattr(ml_service_api, 'assess_cohort_chunk', fail_first_chunk)
+    response, records = post_cohort(client, professional, [str(first.id), str(second.id)])
+    
+    assert response.status_code == 200
+    assert records[0] == {
+        'patient_ids': [str(first.id)],
+        'error': 'Error performing risk assessment: feature store unavailable'
+    }
+    assert records[1]['patient_id'] == str(second.id) and 'risk_level' in records[1]
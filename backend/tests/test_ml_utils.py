@@ -0,0 +1,61 @@
+"""Tests for ML feature extraction helpers."""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ml_utils import process_vital_signs, running_stats_features
+
+def test_process_vital_signs_matches_per_type_statistics():
+    """Vectorized aggregates equal per-type NumPy statistics."""
+    rng = np.random.default_rng(0)
+    readings = [
+        {'measurement_type': vital_type, 'value': float(value)}
+        for vital_type, value in zip(
+            rng.choice(['heart_rate', 'temperature', 'oxygen_saturation'], 200),
+            rng.normal(70, 10, 200)
+        )
+    ]
+    
+    features = process_vital_signs(readings)
+    
+    for vital_type in ['heart_rate', 'temperature', 'oxygen_saturation']:
+        values = [r['value'] for r in readings if r['measurement_type'] == vital_type]
+        assert features[f'{vital_type}_avg'] == pytest.approx(np.mean(values))
+        assert features[f'{vital_type}_std'] == pytest.approx(np.std(values))
+        assert features[f'{vital_type}_min'] == np.min(values)
+        assert features[f'{vital_type}_max'] == np.max(values)
+
+def test_process_vital_signs_reads_wide_rows():
+    """Rows with one column per vital contribute every non-null column."""
+    rows = [
+        {'heart_rate': 60, 'temperature': 36.5, 'oxygen_saturation': None},
+        {'heart_rate': 80, 'temperature': None, 'oxygen_saturation': 97}
+    ]
+    
+    features = process_vital_signs(rows)
+    
+    assert features['heart_rate_avg'] == 70
+    assert features['heart_rate_std'] == 10
+    assert features['temperature_min'] == 36.5
+    assert features['oxygen_saturation_max'] == 97
+    assert process_vital_signs([]) == {}
+
+def test_running_stats_features_match_batch_features():
+    """Aggregates in count/mean/m2 form give the same features as raw readings."""
+    values = np.array([72.0, 80.0, 65.0, 90.0])
+    stats = {
+        'count': len(values),
+        'mean': values.mean(),
+        'm2': ((values - values.mean()) ** 2).sum(),
+        'min': values.min(),
+        'max': values.max()
+    }
+    
+    expected = process_vital_signs([{'heart_rate': value} for value in values])
+    
+    assert running_stats_features('heart_rate', stats) == pytest.approx(expected)
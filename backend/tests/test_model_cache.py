@@ -0,0 +1,87 @@
+"""Tests for the process-resident model cache."""
+
+import os
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.model_cache import ModelCache
+
+class CountingLoader:
+    """Loader that reads the file's text and counts how often it is called."""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def __call__(self, path):
+        self.calls += 1
+        with open(path) as f:
+            return f.read()
+
+def write(path, content, mtime=None):
+    with open(path, 'w') as f:
+        f.write(content)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+def test_loads_once_and_reloads_on_content_change(tmp_path):
+    """Unchanged artifacts are served from memory; changed ones are reloaded."""
+    loader = CountingLoader()
+    cache = ModelCache(check_interval=0, loader=loader)
+    path = write(tmp_path / 'model.joblib', 'v1', mtime=1000)
+    
+    assert cache.get('model', lambda: path) == 'v1'
+    assert cache.get('model', lambda: path) == 'v1'
+    assert loader.calls == 1
+    
+    # Touching the file without changing it does not force a reload
+    os.utime(path, (2000, 2000))
+    assert cache.get('model', lambda: path) == 'v1'
+    assert loader.calls == 1
+    
+    write(path, 'v2', mtime=3000)
+    assert cache.get('model', lambda: path) == 'v2'
+    assert loader.calls == 2
+
+def test_skips_filesystem_within_check_interval(tmp_path):
+    """Lookups inside the check interval do not resolve or stat the path."""
+    cache = ModelCache(check_interval=60, loader=CountingLoader())
+    path = write(tmp_path / 'model.joblib', 'v1')
+    resolved = []
+    
+    def resolve():
+        resolved.append(time.monotonic())
+        return path
+    
+    for _ in range(5):
+        cache.get('model', resolve)
+    
+    assert len(resolved) == 1
+
+def test_evicts_least_recently_used(tmp_path):
+    """The byte cap evicts the least recently used model first."""
+    cache = ModelCache(max_bytes=10, check_interval=60, loader=CountingLoader())
+    paths = {name: write(tmp_path / f'{name}.joblib', 'x' * 4) for name in 'abc'}
+    
+    cache.get('a', lambda: paths['a'])
+    cache.get('b', lambda: paths['b'])
+    cache.get('a', lambda: paths['a'])
+    cache.get('c', lambda: paths['c'])
+    
+    assert cache.stats()['models'] == ['a', 'c']
+    assert cache.stats()['total_bytes'] == 8
+
+def test_preload_skips_missing_artifacts(tmp_path):
+    """Preloading loads what exists and ignores missing artifacts."""
+    loader = CountingLoader()
+    cache = ModelCache(check_interval=60, loader=loader)
+    write(tmp_path / 'a.joblib', 'a')
+    
+    loaded = cache.preload(['a', 'b'], lambda name: str(tmp_path / f'{name}.joblib'))
+    
+    assert loaded == ['a']
+    assert cache.get('a', lambda: str(tmp_path / 'a.joblib')) == 'a'
+    assert loader.calls == 1
@@ -0,0 +1,79 @@
+"""Tests for the versioned model registry."""
+
+import os
+import sys
+import joblib
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import ml_utils
+from utils.model_cache import ModelCache
+from utils.model_registry import ModelRegistry
+
+def make_artifacts(path, content):
+    """Create a directory with a single artifact file."""
+    os.makedirs(path)
+    with open(os.path.join(path, 'risk_assessment.joblib'), 'w') as f:
+        f.write(content)
+    return str(path)
+
+def test_register_and_promote(tmp_path):
+    """Promoting switches the current version and keeps the previous one."""
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    registry.register('1.0.0', make_artifacts(tmp_path / 'v1', 'one'))
+    registry.register('1.1.0', make_artifacts(tmp_path / 'v2', 'two'))
+    
+    assert registry.current_version() is None
+    assert registry.artifact_path('risk_assessment.joblib') is None
+    
+    registry.promote('1.0.0')
+    registry.promote('1.1.0')
+    manifest = registry.read_manifest()
+    
+    assert manifest['current'] == '1.1.0'
+    assert manifest['previous'] == '1.0.0'
+    with open(registry.artifact_path('risk_assessment.joblib')) as f:
+        assert f.read() == 'two'
+
+def test_rejects_unknown_and_duplicate_versions(tmp_path):
+    """Versions are immutable once registered and must exist to be promoted."""
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    registry.register('1.0.0', make_artifacts(tmp_path / 'v1', 'one'))
+    
+    with pytest.raises(ValueError):
+        registry.register('1.0.0', make_artifacts(tmp_path / 'v1b', 'again'))
+    with pytest.raises(ValueError):
+        registry.promote('2.0.0')
+
+def test_served_version_moves_only_after_preload(tmp_path, monkeypatch):
+    """Requests keep loading the old version's model and pipeline until the new one is preloaded."""
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    for version in ('1.0.0', '1.1.0'):
+        path = tmp_path / version
+        os.makedirs(path)
+        joblib.dump(f'model {version}', path / 'risk_assessment.joblib')
+        joblib.dump(f'pipeline {version}', path / 'risk_assessment_pipeline.joblib')
+        registry.register(version, str(path))
+    registry.promote('1.0.0')
+    
+    loads = []
+    cache = ModelCache(loader=lambda path: loads.append(path) or joblib.load(path))
+    monkeypatch.setattr(ml_utils, 'model_registry', registry)
+    monkeypatch.setattr(ml_utils, 'model_cache', cache)
+    monkeypatch.setattr(ml_utils, '_served_version', ml_utils._UNRESOLVED)
+    
+    version = ml_utils.get_served_version()
+    assert ml_utils.load_model('risk_assessment', version) == 'model 1.0.0'
+    
+    registry.promote('1.1.0')
+    assert ml_utils.get_served_version() == '1.0.0'
+    assert ml_utils.load_pipeline('risk_assessment', version) == 'pipeline 1.0.0'
+    
+    assert ml_utils.refresh_served_version()
+    assert not ml_utils.refresh_served_version()
+    loaded = len(loads)
+    assert ml_utils.load_model('risk_assessment') == 'model 1.1.0'
+    assert ml_utils.load_pipeline('risk_assessment') == 'pipeline 1.1.0'
+    assert len(loads) == loaded
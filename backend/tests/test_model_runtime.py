@@ -0,0 +1,112 @@
+"""Tests for the process-wide health risk model runtime."""
+
+import os
+import sys
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import model_runtime
+
+@pytest.fixture
+def started(monkeypatch):
+    """Record thread starts instead of starting threads."""
+    started = []
+    monkeypatch.setattr(model_runtime, '_threads_pid', None)
+    monkeypatch.setattr(model_runtime, 'start_warmup', lambda: started.append('warmup'))
+    monkeypatch.setattr(model_runtime, 'start_registry_watcher', lambda: started.append('watcher'))
+    monkeypatch.setattr(model_runtime.Config, 'ML_WARMUP_ON_STARTUP', True)
+    return started
+
+def test_background_threads_start_once_per_process(started, monkeypatch):
+    """Threads start on the first call in a process and again in each forked worker."""
+    model_runtime.start_background_threads()
+    model_runtime.start_background_threads()
+    assert started == ['warmup', 'watcher']
+    
+    # A forked worker has a new PID and none of the master's threads
+    monkeypatch.setattr(model_runtime.os, 'getpid', lambda: -1)
+    model_runtime.start_background_threads()
+    assert started == ['warmup', 'watcher'] * 2
+
+def test_failed_swap_keeps_serving_previous_model(monkeypatch):
+    """A promoted version that cannot be loaded leaves the current model in place and is not retried."""
+    current = object()
+    monkeypatch.setattr(model_runtime, '_model', current)
+    monkeypatch.setattr(model_runtime, '_model_version', 'v1')
+    monkeypatch.setattr(model_runtime, '_failed_version', None)
+    monkeypatch.setattr(model_runtime.model_registry, 'current_version', lambda: 'v2')
+    attempts = []
+    
+    def load_version(version):
+        attempts.append(version)
+        raise FileNotFoundError('cardiovascular_model.npz')
+    
+    monkeypatch.setattr(model_runtime, 'load_version', load_version)
+    
+    assert not model_runtime.reload_from_registry()
+    assert not model_runtime.reload_from_registry()
+    assert attempts == ['v2']
+    assert model_runtime.get_health_risk_model() is current
+    assert model_runtime.get_model_version() == 'v1'
+
+def test_missing_tensorflow_models_raise(tmp_path):
+    """Networks missing from a registry version are an error rather than silently untrained replacements."""
+    pytest.importorskip('tensorflow')
+    from services.tf_model_service import HealthRiskModel
+    
+    with pytest.raises(FileNotFoundError):
+        HealthRiskModel(str(tmp_path))
+
+def test_missing_default_models_fall_back_unless_disabled(tmp_path, monkeypatch):
+    """Without trained networks in MODEL_PATH, untrained defaults are built unless the flag is off."""
+    pytest.importorskip('tensorflow')
+    from services.tf_model_service import HealthRiskModel
+    monkeypatch.setattr(model_runtime.Config, 'MODEL_PATH', str(tmp_path))
+    
+    monkeypatch.setattr(model_runtime.Config, 'ML_DEFAULT_RISK_MODELS', True)
+    assert HealthRiskModel().get_input_dims()['cardiovascular'] == 11
+    
+    monkeypatch.setattr(model_runtime.Config, 'ML_DEFAULT_RISK_MODELS', False)
+    with pytest.raises(FileNotFoundError):
+        HealthRiskModel()
+
+class FakeModel:
+    def __init__(self):
+        self.batches = []
+    
+    def get_input_dims(self):
+        return {'cardiovascular': 3}
+    
+    def predict_batch(self, batch):
+        self.batches.append(batch)
+
+def test_ready_only_after_warmup(monkeypatch):
+    """Loading the model on first use is not enough; the process is ready once warmup has run."""
+    model = FakeModel()
+    monkeypatch.setattr(model_runtime, '_model', None)
+    monkeypatch.setattr(model_runtime, '_model_version', model_runtime._model_version)
+    monkeypatch.setattr(model_runtime, '_ready', model_runtime.threading.Event())
+    monkeypatch.setattr(model_runtime.model_registry, 'current_version', lambda: None)
+    monkeypatch.setattr(model_runtime, '_create_model', lambda model_path: model)
+    
+    model_runtime.get_health_risk_model()
+    assert not model_runtime.is_ready()
+    
+    model_runtime.warmup()
+    assert model_runtime.is_ready()
+    assert model.batches[0]['cardiovascular'].shape == (1, 3)
+
+def test_warmup_thread_starts_once_at_a_time(monkeypatch):
+    """Repeated readiness probes do not start a second warmup while one is running."""
+    release = model_runtime.threading.Event()
+    calls = []
+    monkeypatch.setattr(model_runtime, '_warmup_thread', None)
+    monkeypatch.setattr(model_runtime, 'warmup', lambda: (calls.append(1), release.wait(5)))
+    
+    thread = model_runtime.start_warmup()
+    assert model_runtime.start_warmup() is thread
+    release.set()
+    thread.join(5)
+    assert calls == [1]
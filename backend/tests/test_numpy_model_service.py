@@ -0,0 +1,85 @@
+"""Tests for the NumPy inference backend."""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.numpy_model_service import DenseNetwork, NumpyRiskModel, RISK_TYPES
+
+def write_network(path, input_dim, seed):
+    """Write a random 4-layer network in the export format."""
+    rng = np.random.default_rng(seed)
+    sizes = [input_dim, 64, 32, 16, 1]
+    arrays = {}
+    for index, (fan_in, fan_out) in enumerate(zip(sizes[:-1], sizes[1:])):
+        arrays[f'kernel_{index}'] = rng.normal(size=(fan_in, fan_out)).astype(np.float32)
+        arrays[f'bias_{index}'] = rng.normal(size=fan_out).astype(np.float32)
+    np.savez(path, activations=np.array(['relu', 'relu', 'relu', 'sigmoid']), **arrays)
+    return arrays
+
+def test_dense_network_matches_reference(tmp_path):
+    """Forward pass matches a straightforward float64 evaluation."""
+    path = tmp_path / 'cardiovascular_model.npz'
+    arrays = write_network(path, 11, seed=0)
+    network = DenseNetwork.load(str(path))
+    inputs = np.random.default_rng(1).normal(size=(5, 11))
+    
+    x = inputs
+    for index in range(4):
+        x = x @ arrays[f'kernel_{index}'].astype(np.float64) + arrays[f'bias_{index}']
+        x = np.maximum(x, 0) if index < 3 else 1 / (1 + np.exp(-x))
+    
+    np.testing.assert_allclose(network.forward(inputs), x, rtol=1e-4, atol=1e-6)
+
+def test_batch_and_single_predictions_agree(tmp_path):
+    """predict() returns the same values as the matching row of predict_batch()."""
+    for seed, risk_type in enumerate(RISK_TYPES):
+        write_network(tmp_path / f'{risk_type}_model.npz', 10, seed)
+    model = NumpyRiskModel(str(tmp_path))
+    batch = {risk_type: np.random.default_rng(7).normal(size=(3, 10)) for risk_type in RISK_TYPES}
+    
+    batch_predictions = model.predict_batch(batch)
+    single = model.predict({risk_type: rows[1] for risk_type, rows in batch.items()})
+    
+    for key, value in single.items():
+        assert value == pytest.approx(float(batch_predictions[key][1]))
+
+def test_attributions_are_gradient_times_input(tmp_path):
+    """attribute() equals a finite-difference gradient times the input."""
+    path = tmp_path / 'diabetes_model.npz'
+    arrays = write_network(path, 10, seed=4)
+    network = DenseNetwork.load(str(path))
+    inputs = np.random.default_rng(5).normal(size=(3, 10)).astype(np.float32)
+    
+    def reference(x):
+        for index in range(4):
+            x = x @ arrays[f'kernel_{index}'].astype(np.float64) + arrays[f'bias_{index}']
+            x = np.maximum(x, 0) if index < 3 else 1 / (1 + np.exp(-x))
+        return x[:, 0]
+    
+    step = 1e-6
+    gradient = np.stack([
+        (reference(inputs + step * unit) - reference(inputs - step * unit)) / (2 * step)
+        for unit in np.eye(inputs.shape[1])
+    ], axis=1)
+    
+    np.testing.assert_allclose(network.attribute(inputs), gradient * inputs, rtol=1e-3, atol=1e-6)
+
+def test_matches_keras_model(tmp_path):
+    """Exported weights reproduce the Keras outputs."""
+    tf = pytest.importorskip('tensorflow')
+    from services.tf_model_service import HealthRiskModel
+    
+    model = HealthRiskModel.__new__(HealthRiskModel)
+    model.models = {'diabetes': model._create_default_model('diabetes')}
+    model.export_numpy_weights(str(tmp_path))
+    inputs = np.random.default_rng(3).normal(size=(4, 10)).astype(np.float32)
+    
+    expected = model.models['diabetes'](inputs, training=False).numpy()
+    actual = DenseNetwork.load(str(tmp_path / 'diabetes_model.npz')).forward(inputs)
+    
+    np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-6)
@@ -0,0 +1,99 @@
+"""Tests for per-patient running baselines."""
+
+import os
+import sys
+import uuid
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.patient_baseline import PatientBaseline
+from models.vital_sign import VitalSign
+
+VALUES = [62.0, 58.0, 61.0, 65.0, 59.0, 60.0, 63.0, 57.0, 61.0, 60.0, 64.0, 59.0]
+
+def build_baseline(values, alpha=0.1):
+    baseline = PatientBaseline(uuid.uuid4(), 'heart_rate')
+    for value in values:
+        baseline.update(value, alpha)
+    return baseline
+
+def test_running_statistics_match_full_history():
+    """O(1) updates give the same mean, std and EWMA as recomputing over history."""
+    baseline = build_baseline(VALUES, alpha=0.2)
+    ewm = pd.Series(VALUES).ewm(alpha=0.2, adjust=False)
+    
+    assert baseline.count == len(VALUES)
+    assert baseline.mean == pytest.approx(np.mean(VALUES))
+    assert baseline.std == pytest.approx(np.std(VALUES, ddof=1))
+    assert baseline.ewma == pytest.approx(ewm.mean().iloc[-1])
+    assert baseline.ewm_std == pytest.approx(ewm.std(bias=True).iloc[-1])
+    assert baseline.last_value == VALUES[-1]
+
+def test_vital_sign_flagged_against_personal_baseline():
+    """A value inside population ranges is flagged when it is far from the patient's norm."""
+    baseline = build_baseline(VALUES)
+    vital_sign = VitalSign(patient_id=baseline.patient_id, recorded_at=datetime.utcnow(), heart_rate=92)
+    assert not vital_sign.is_abnormal
+    
+    # Immature baselines are ignored
+    assert not vital_sign.check_against_baselines({'heart_rate': build_baseline(VALUES[:3])}, 10, 3.0)
+    assert vital_sign.check_against_baselines({'heart_rate': baseline}, 10, 3.0)
+
+def test_usual_value_not_flagged():
+    """Values near the baseline mean keep the population-range result."""
+    baseline = build_baseline(VALUES)
+    vital_sign = VitalSign(patient_id=baseline.patient_id, recorded_at=datetime.utcnow(), heart_rate=61)
+    assert not vital_sign.check_against_baselines({'heart_rate': baseline}, 10, 3.0)
+
+def create_patient(db):
+    from models.user import User
+    from models.patient import Patient
+    
+    user = User('patient@example.com', 'secret', 'patient', 'Ada', 'Patient')
+    patient = Patient(user.id)
+    db.session.add_all([user, patient])
+    db.session.commit()
+    return patient
+
+def test_readings_create_missing_baselines(sqlite_db):
+    """A reading of an existing patient without baselines creates them instead of conflicting."""
+    from services.baseline_store import baseline_store
+    baseline_store.register_listeners()
+    patient = create_patient(sqlite_db)
+    
+    for value in VALUES[:2]:
+        sqlite_db.session.add(VitalSign(patient_id=patient.id, recorded_at=datetime.utcnow(), heart_rate=value))
+        sqlite_db.session.commit()
+    
+    baseline = baseline_store.get_baselines(patient.id)['heart_rate']
+    assert baseline.count == 2
+    assert baseline.mean == pytest.approx(np.mean(VALUES[:2]))
+
+def test_backfill_replays_history(sqlite_db):
+    """Rebuilding gives the same baselines as folding every reading in on write."""
+    from services.baseline_store import baseline_store
+    baseline_store.register_listeners()
+    patient = create_patient(sqlite_db)
+    
+    start = datetime(2024, 1, 1)
+    for index, value in enumerate(VALUES):
+        sqlite_db.session.add(VitalSign(patient_id=patient.id, recorded_at=start + timedelta(hours=index),
+                                        heart_rate=value))
+    sqlite_db.session.commit()
+    # History written before baselines were maintained
+    sqlite_db.session.query(PatientBaseline).delete()
+    sqlite_db.session.commit()
+    
+    assert baseline_store.rebuild_many([patient.id]) == len(VALUES)
+    baselines = baseline_store.get_baselines(patient.id)
+    expected = build_baseline(VALUES)
+    
+    assert list(baselines) == ['heart_rate']
+    assert baselines['heart_rate'].count == len(VALUES)
+    assert baselines['heart_rate'].std == pytest.approx(expected.std)
+    assert baselines['heart_rate'].ewma == pytest.approx(expected.ewma)
@@ -0,0 +1,56 @@
+"""Tests for the content-addressed prediction cache."""
+
+import os
+import sys
+import time
+import numpy as np
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.prediction_cache import PredictionCache
+
+FEATURES = {
+    'cardiovascular': np.array([45, 1, 27.5, 130, 85, 72, 0, 0, 50, 120, 140]),
+    'diabetes': np.array([45, 1, 27.5, 130, 85, 72, 0, 0, 98, 5.6])
+}
+
+def test_key_is_stable_and_version_sensitive():
+    """Equal features give equal keys; a new model version gives a new key."""
+    copied = {risk_type: values.tolist() for risk_type, values in reversed(FEATURES.items())}
+    
+    assert PredictionCache.make_key(FEATURES, '1.0.0') == PredictionCache.make_key(copied, '1.0.0')
+    assert PredictionCache.make_key(FEATURES, '1.0.0') != PredictionCache.make_key(FEATURES, '1.1.0')
+
+def test_hits_misses_and_lru_eviction():
+    """Least recently used entries are evicted first and counters are kept."""
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    cache.set('a', {'risk': 1})
+    cache.set('b', {'risk': 2})
+    assert cache.get('a') == {'risk': 1}
+    cache.set('c', {'risk': 3})
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == {'risk': 1}
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 1
+
+def test_ttl_and_invalidation():
+    """Expired entries and invalidated entries are not returned."""
+    cache = PredictionCache(max_entries=10, ttl_seconds=0.01)
+    cache.set('a', {'risk': 1})
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    
+    cache.ttl_seconds = 60
+    cache.set('b', {'risk': 2})
+    cache.invalidate()
+    assert cache.get('b') is None
+
+def test_returned_values_are_copies():
+    """Mutating a cached result does not corrupt the cache."""
+    cache = PredictionCache()
+    cache.set('a', {'risk_factors': ['Obesity']})
+    cache.get('a')['risk_factors'].append('Current smoker')
+    
+    assert cache.get('a') == {'risk_factors': ['Obesity']}
@@ -0,0 +1,78 @@
+"""Tests for the successive halving hyperparameter search."""
+
+import os
+import sys
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.search import SearchCheckpoint, SuccessiveHalvingSearch
+
+def make_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(240, 6))
+    y = (X[:, 0] + X[:, 1] * X[:, 2] + rng.normal(scale=0.3, size=len(X)) > 0).astype(int)
+    return X, y
+
+def make_search(checkpoint_path=None):
+    return SuccessiveHalvingSearch(
+        RandomForestClassifier(random_state=42),
+        {'max_depth': [2, 8, None], 'min_samples_leaf': [1, 4, 16]},
+        max_resource=36, min_resource=4, factor=3, cv=3,
+        checkpoint_path=checkpoint_path
+    )
+
+def test_rungs_eliminate_candidates_and_refit_best():
+    """Each rung keeps a third of the candidates with three times the trees."""
+    X, y = make_data()
+    search = make_search().fit(X, y)
+    
+    assert search.resources() == [4, 12, 36]
+    assert [len([r for r in search.results_ if r['rung'] == rung]) for rung in range(3)] == [9, 3, 1]
+    assert search.best_params_['n_estimators'] == 36
+    assert len(search.best_estimator_.estimators_) == 36
+    # 9 + 3 + 1 candidates, 3 folds each
+    assert search.n_fits_ == 39
+
+def test_warm_started_forest_matches_fresh_fit():
+    """Growing a forest rung by rung gives the trees a single larger fit would."""
+    X, y = make_data()
+    grown = RandomForestClassifier(n_estimators=4, warm_start=True, random_state=42).fit(X, y)
+    grown.set_params(n_estimators=12).fit(X, y)
+    fresh = RandomForestClassifier(n_estimators=12, random_state=42).fit(X, y)
+    
+    assert np.array_equal(grown.predict_proba(X), fresh.predict_proba(X))
+
+def test_checkpoint_resumes_without_refitting(tmp_path):
+    """A re-run on the same data reuses every fold score; other data does not."""
+    X, y = make_data()
+    checkpoint_path = str(tmp_path / 'search.jsonl')
+    first = make_search(checkpoint_path).fit(X, y)
+    
+    # Simulate a crash mid-write
+    with open(checkpoint_path, 'a') as f:
+        f.write('{"fingerprint": "trunc')
+    
+    resumed = make_search(checkpoint_path).fit(X, y)
+    assert resumed.n_fits_ == 0
+    assert resumed.n_reused_ == first.n_fits_
+    assert resumed.best_params_ == first.best_params_
+    assert resumed.results_ == first.results_
+    
+    changed = make_search(checkpoint_path).fit(X, 1 - y)
+    assert changed.n_reused_ == 0
+
+def test_torn_last_line_does_not_swallow_the_next_record(tmp_path):
+    """A record appended after a crash mid-write is read back on its own line."""
+    checkpoint_path = str(tmp_path / 'search.jsonl')
+    SearchCheckpoint(checkpoint_path, 'data').add('a', 4, 0, 0.5)
+    with open(checkpoint_path, 'a') as f:
+        f.write('{"fingerprint": "trunc')
+    
+    SearchCheckpoint(checkpoint_path, 'data').add('b', 4, 0, 0.75)
+    
+    reloaded = SearchCheckpoint(checkpoint_path, 'data')
+    assert reloaded.get('a', 4, 0) == 0.5
+    assert reloaded.get('b', 4, 0) == 0.75
@@ -0,0 +1,124 @@
+"""Tests for shadow-mode evaluation of candidate models."""
+
+import os
+import sys
+import threading
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.shadow import ShadowEvaluator
+from utils import ml_utils
+from utils.feature_pipeline import FeaturePipeline
+from utils.model_registry import ModelRegistry
+
+class FakeModel:
+    def __init__(self, offset, gate=None):
+        self.offset = offset
+        self.gate = gate
+    
+    def predict_proba(self, X):
+        if self.gate is not None:
+            self.gate.wait(5)
+        return np.clip(np.asarray(X) + self.offset, 0, 1)
+
+class IdentityPipeline:
+    def transform(self, X):
+        return X
+
+def make_evaluator(model, **kwargs):
+    evaluator = ShadowEvaluator(version='candidate', sample_rate=1.0, **kwargs)
+    evaluator.load_candidate = lambda model_name, version: model
+    evaluator.load_candidate_pipeline = lambda model_name, version: IdentityPipeline()
+    return evaluator
+
+def test_records_divergence_and_label_agreement():
+    """Candidate outputs are compared with production's per model."""
+    evaluator = make_evaluator(FakeModel(0.1))
+    production = np.array([[0.2, 0.8], [0.7, 0.3]])
+    
+    assert evaluator.submit('risk_assessment', 'predict_proba', production, production, 3.0)
+    evaluator.shutdown()
+    
+    stats = evaluator.stats()['models']['risk_assessment']
+    assert stats['count'] == 1
+    assert stats['production_ms_mean'] == 3.0
+    assert np.isclose(stats['divergence_max'], 0.1)
+    assert stats['label_agreement'] == 1.0
+
+def test_full_queue_drops_samples_instead_of_waiting():
+    """Submissions beyond max_pending are dropped without blocking."""
+    gate = threading.Event()
+    evaluator = make_evaluator(FakeModel(0.0, gate), max_workers=1, max_pending=2)
+    X = np.zeros((1, 2))
+    
+    submitted = [evaluator.submit('risk_assessment', 'predict_proba', X, X, 1.0) for _ in range(5)]
+    assert submitted == [True, True, False, False, False]
+    
+    gate.set()
+    evaluator.shutdown()
+    assert evaluator.stats()['models']['risk_assessment']['count'] == 2
+    assert evaluator.stats()['pending'] == 0
+
+def test_candidate_failures_never_reach_the_caller():
+    """A broken candidate only counts errors."""
+    def load_candidate(model_name, version):
+        raise FileNotFoundError(version)
+    
+    evaluator = ShadowEvaluator(version='missing', sample_rate=1.0)
+    evaluator.load_candidate = load_candidate
+    
+    assert evaluator.submit('anomaly_detection', 'predict', np.zeros((1, 2)), np.ones(1), 1.0)
+    evaluator.shutdown()
+    assert evaluator.stats()['models']['anomaly_detection']['errors'] == 1
+    
+    # Disabled when no candidate version is configured
+    assert not ShadowEvaluator(version=None, sample_rate=1.0).submit('x', 'predict', None, None, 0)
+
+def test_keyed_outputs_are_compared_per_risk():
+    """Dict outputs are matched by key, ignoring extra candidate outputs."""
+    class Candidate:
+        def predict_batch(self, batch):
+            return {'cardiovascular_risk': np.array([0.7]), 'diabetes_risk': np.array([0.2]),
+                    'cardiovascular_attributions': np.ones((1, 11))}
+    
+    evaluator = make_evaluator(Candidate())
+    production = {'cardiovascular_risk': 0.9, 'diabetes_risk': 0.2}
+    assert evaluator.sample()
+    assert evaluator.replay('health_risk', 'predict_batch', {}, production, 2.0)
+    evaluator.shutdown()
+    
+    stats = evaluator.stats()['models']['health_risk']
+    assert stats['errors'] == 0
+    assert np.isclose(stats['divergence_max'], 0.2)
+    assert not ShadowEvaluator(version='candidate', sample_rate=0.0).sample()
+
+def test_candidate_scales_raw_features_with_its_own_pipeline(tmp_path, monkeypatch):
+    """Raw features go through the candidate version's pipeline, not production's."""
+    rng = np.random.default_rng(0)
+    X = rng.normal([50, 26], [10, 4], size=(200, 2))
+    y = (X[:, 0] > 50).astype(int)
+    pipeline = FeaturePipeline.from_scaler(StandardScaler().fit(X), ['age', 'bmi'])
+    model = LogisticRegression().fit(pipeline.transform(X), y)
+    
+    version_dir = tmp_path / 'v2'
+    version_dir.mkdir()
+    joblib.dump(model, version_dir / 'risk_assessment.joblib')
+    joblib.dump(pipeline, version_dir / 'risk_assessment_pipeline.joblib')
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    registry.register('v2', str(version_dir))
+    monkeypatch.setattr(ml_utils, 'model_registry', registry)
+    
+    evaluator = ShadowEvaluator(version='v2', sample_rate=1.0)
+    raw = X[:5]
+    assert evaluator.submit('risk_assessment', 'predict_proba', raw,
+                            model.predict_proba(pipeline.transform(raw)), 1.0)
+    evaluator.shutdown()
+    
+    stats = evaluator.stats()['models']['risk_assessment']
+    assert stats['errors'] == 0
+    assert np.isclose(stats['divergence_max'], 0.0)
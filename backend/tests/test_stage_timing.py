@@ -0,0 +1,49 @@
+"""Tests for per-stage ML latency instrumentation."""
+
+import os
+import sys
+from flask import Flask
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from utils import stage_timing
+from utils.stage_timing import StageTimer
+from utils.metrics import metrics
+
+def make_app():
+    app = Flask(__name__)
+    stage_timing.init_app(app)
+    
+    @app.route('/predict')
+    def predict():
+        with StageTimer('db', model='test_model'):
+            pass
+        with StageTimer('predict', model='test_model'):
+            pass
+        return 'ok'
+    
+    return app
+
+def test_stages_recorded_as_histograms_per_model():
+    """Each stage lands in its own labelled histogram, also outside requests."""
+    with StageTimer('preprocess', model='histogram_model') as timer:
+        pass
+    
+    histograms = metrics.snapshot()['histograms']
+    assert timer.elapsed_ms >= 0
+    assert histograms['ml_stage_ms{model=histogram_model,stage=preprocess}']['count'] >= 1
+
+def test_server_timing_header_lists_stages_in_order(monkeypatch):
+    """The debug header carries the request's breakdown only when enabled."""
+    client = make_app().test_client()
+    
+    monkeypatch.setattr(Config, 'STAGE_TIMING_HEADER', False)
+    assert 'Server-Timing' not in client.get('/predict').headers
+    
+    monkeypatch.setattr(Config, 'STAGE_TIMING_HEADER', True)
+    header = client.get('/predict').headers['Server-Timing']
+    names = [entry.split(';')[0] for entry in header.split(', ')]
+    assert names == ['test_model.db', 'test_model.predict']
+    assert all(';dur=' in entry for entry in header.split(', '))
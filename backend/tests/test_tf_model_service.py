@@ -0,0 +1,52 @@
+"""Tests for the TensorFlow health risk networks."""
+
+import os
+import sys
+import numpy as np
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip('tensorflow')
+
+from config import Config
+from services.tf_model_service import HealthRiskModel
+
+@pytest.fixture
+def risk_model(tmp_path, monkeypatch):
+    """Untrained default networks with the fused graph built."""
+    monkeypatch.setattr(Config, 'MODEL_PATH', str(tmp_path))
+    monkeypatch.setattr(Config, 'ML_DEFAULT_RISK_MODELS', True)
+    monkeypatch.setattr(Config, 'FUSED_INFERENCE', True)
+    model = HealthRiskModel()
+    assert model._fused_fn is not None
+    return model
+
+def make_batch(model, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return {risk_type: rng.normal(size=(n_rows, input_dim)).astype(np.float32)
+            for risk_type, input_dim in model.get_input_dims().items()}
+
+@pytest.mark.parametrize('n_rows', [1, 7, 64])
+def test_fused_graph_matches_each_network(risk_model, n_rows):
+    """The single fused call scores every risk type as its own network does, at any batch size."""
+    batch = make_batch(risk_model, n_rows, seed=n_rows)
+    fused = risk_model.predict_batch(batch)
+    
+    for risk_type, network in risk_model.models.items():
+        expected = network(batch[risk_type], training=False).numpy()[:, 0]
+        assert fused[f'{risk_type}_risk'].shape == (n_rows,)
+        np.testing.assert_allclose(fused[f'{risk_type}_risk'], expected, rtol=1e-5, atol=1e-6)
+
+def test_partial_batches_match_the_fused_graph(risk_model):
+    """A batch missing a risk type takes the per-network path with the same scores."""
+    batch = make_batch(risk_model, 5)
+    fused = risk_model.predict_batch(batch)
+    
+    partial = {risk_type: rows for risk_type, rows in batch.items() if risk_type != 'cancer'}
+    separate = risk_model.predict_batch(partial)
+    
+    assert 'cancer_risk' not in separate
+    for key, values in separate.items():
+        np.testing.assert_allclose(values, fused[key], rtol=1e-5, atol=1e-6)
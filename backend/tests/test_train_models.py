@@ -0,0 +1,76 @@
+"""Tests for the parallel training orchestration."""
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.train_models import allocate_threads, ModelTrainer, TRAINING_JOBS
+
+WEIGHTS = {name: job[2] for name, job in TRAINING_JOBS.items()}
+
+@pytest.mark.parametrize('total_threads', [2, 5, 8, 9, 32])
+def test_threads_split_by_weight_without_oversubscribing(total_threads):
+    """Every job gets a thread and the total stays within budget when possible."""
+    threads = allocate_threads(WEIGHTS, total_threads)
+    
+    assert set(threads) == set(TRAINING_JOBS)
+    assert min(threads.values()) >= 1
+    assert sum(threads.values()) == max(total_threads, len(TRAINING_JOBS))
+    assert threads['risk_assessment'] >= threads['anomaly_detection']
+
+def test_scaled_split_matches_scaling_the_full_frame(tmp_path):
+    """Batched scaling from the memory-mapped columns equals scaling the loaded split."""
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'age': rng.integers(18, 90, 500),
+        'heart_rate': rng.normal(72, 10, 500),
+        'risk_level': rng.choice(['low', 'high'], 500)
+    })
+    frame.to_csv(tmp_path / 'risk_assessment_data.csv', index=False)
+    trainer = ModelTrainer(str(tmp_path), models_dir=str(tmp_path / 'models'))
+    
+    dataset = trainer.load_dataset('risk_assessment_data')
+    scaler, pipeline, X_train, X_test, y_train, y_test = trainer.load_scaled_split(dataset, 'risk_level', batch_size=64)
+    
+    X = dataset.to_frame(exclude=['risk_level'])
+    expected_train, expected_test, expected_y_train, _ = train_test_split(
+        X, frame['risk_level'], test_size=0.2, random_state=42
+    )
+    expected_scaler = StandardScaler().fit(expected_train)
+    assert pipeline.feature_names == ['age', 'heart_rate']
+    np.testing.assert_allclose(scaler.mean_, expected_scaler.mean_)
+    np.testing.assert_allclose(X_train, expected_scaler.transform(expected_train), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(X_test, expected_scaler.transform(expected_test), rtol=1e-5, atol=1e-6)
+    assert X_train.dtype == np.float32
+    assert list(y_train) == list(expected_y_train)
+
+def test_parallel_training_collects_artifacts_and_reports_failures(tmp_path):
+    """Spawned jobs train with their share of threads; one failing job fails the run without losing the others."""
+    import joblib
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({'heart_rate': rng.normal(72, 10, 200), 'vital_signs_target': rng.normal(size=200)})
+    for name in ('risk_assessment_data', 'health_prediction_data', 'anomaly_detection_data'):
+        frame.to_csv(tmp_path / f'{name}.csv', index=False)
+    trainer = ModelTrainer(str(tmp_path), models_dir=str(tmp_path / 'models'))
+    
+    jobs = {
+        'anomaly_detection': TRAINING_JOBS['anomaly_detection'][:2] + (3,),
+        # No such target column, so this job fails in its worker
+        'broken': ('train_health_prediction_target', ('missing',), 1)
+    }
+    with pytest.raises(RuntimeError, match='broken') as error:
+        trainer.train_all_models_parallel(total_threads=4, jobs=jobs)
+    assert 'anomaly_detection' not in str(error.value)
+    
+    model = joblib.load(tmp_path / 'models' / 'anomaly_detection.joblib')
+    assert model.n_jobs == 3
+    for artifact in ('anomaly_detection_pipeline', 'anomaly_detection_compiled'):
+        assert (tmp_path / 'models' / f'{artifact}.joblib').exists()
+    assert not (tmp_path / 'models' / 'health_prediction_missing.joblib').exists()
@@ -0,0 +1,115 @@
+"""Tests for the array-compiled tree ensemble evaluator."""
+
+import os
+import sys
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, IsolationForest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.tree_compiler import compile_forest
+from utils.ml_utils import tree_intervals, tree_agreement
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 8))
+    y = np.digitize(X[:, 0] + X[:, 1] ** 2 + rng.normal(scale=0.5, size=len(X)), [0.5, 2.0])
+    X_test = rng.normal(size=(200, 8))
+    return X, y, X_test
+
+def test_random_forest_is_bit_identical(data):
+    """Probabilities and labels match sklearn exactly, including missing values."""
+    X, y, X_test = data
+    model = RandomForestClassifier(n_estimators=40, random_state=0).fit(X, y)
+    compiled = compile_forest(model)
+    
+    X_missing = X_test.copy()
+    X_missing[::5, 2] = np.nan
+    cases = [X_test, X_test[:1]]
+    try:
+        model.predict(X_missing)
+        cases.append(X_missing)
+    except ValueError:
+        pass  # forests only accept missing values from scikit-learn 1.4
+    for inputs in cases:
+        assert np.array_equal(compiled.predict_proba(inputs), model.predict_proba(inputs))
+        assert np.array_equal(compiled.predict(inputs), model.predict(inputs))
+
+def test_contributions_decompose_probabilities(data):
+    """Bias plus per-feature contributions reconstructs sklearn's predict_proba."""
+    X, y, X_test = data
+    model = RandomForestClassifier(n_estimators=40, random_state=0).fit(X, y)
+    compiled = compile_forest(model)
+    
+    contributions = compiled.contributions(X_test)
+    assert contributions.shape == (len(X_test), X.shape[1], compiled.n_classes_)
+    reconstructed = compiled.bias + contributions.sum(axis=1)
+    # Compared with the sklearn model itself, so attributions are in probability units
+    np.testing.assert_allclose(reconstructed, model.predict_proba(X_test), atol=1e-12)
+    np.testing.assert_allclose(compiled.bias.sum(), 1.0)
+    
+    # The informative features carry most of the attribution
+    mean_magnitude = np.abs(contributions).sum(axis=2).mean(axis=0)
+    assert set(np.argsort(mean_magnitude)[-2:]) == {0, 1}
+
+def test_per_tree_intervals_match_estimators(data):
+    """The (rows x trees) matrix reproduces each estimator and predict_proba."""
+    X, y, X_test = data
+    model = RandomForestClassifier(n_estimators=40, min_samples_leaf=5, random_state=0).fit(X, y)
+    compiled = compile_forest(model)
+    
+    per_tree = compiled.per_tree_proba(X_test)
+    expected = np.stack([estimator.predict_proba(X_test.astype(np.float32)) for estimator in model.estimators_],
+                        axis=1)
+    assert per_tree.shape == (len(X_test), 40, compiled.n_classes_)
+    assert np.array_equal(per_tree, expected)
+    assert np.array_equal(compiled.proba_from_trees(per_tree), model.predict_proba(X_test))
+    
+    lower, upper = tree_intervals(per_tree, level=0.8)
+    np.testing.assert_allclose(lower, np.quantile(expected, 0.1, axis=1))
+    np.testing.assert_allclose(upper, np.quantile(expected, 0.9, axis=1))
+    
+    agreement = tree_agreement(per_tree, model.predict_proba(X_test).argmax(axis=1))
+    assert ((agreement > 0) & (agreement <= 1)).all()
+
+@pytest.mark.parametrize('max_features', [1.0, 0.5])
+def test_isolation_forest_is_bit_identical(data, max_features):
+    """Scores match sklearn exactly, also when trees see a feature subset."""
+    X, _, X_test = data
+    model = IsolationForest(n_estimators=40, max_features=max_features, random_state=0).fit(X)
+    compiled = compile_forest(model)
+    
+    assert np.array_equal(compiled.score_samples(X_test), model.score_samples(X_test))
+    assert np.array_equal(compiled.decision_function(X_test), model.decision_function(X_test))
+    assert np.array_equal(compiled.predict(X_test), model.predict(X_test))
+
+def test_stale_compiled_artifacts_are_not_served(data, monkeypatch):
+    """Artifacts from an older compiler format fall back to the sklearn model."""
+    from utils import ml_utils
+    X, y, _ = data
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    stale = compile_forest(model)
+    stale.format_version = 1
+    artifacts = {'risk_assessment': model, 'risk_assessment_compiled': stale}
+    monkeypatch.setattr(ml_utils.Config, 'COMPILED_TREES', True)
+    monkeypatch.setattr(ml_utils, 'resolve_model_path', lambda name, version=None: __file__)
+    monkeypatch.setattr(ml_utils, 'load_model', lambda name, version=None: artifacts.get(name))
+    
+    assert ml_utils.load_compiled_model('risk_assessment') is model
+    stale.format_version = compile_forest(model).format_version
+    assert ml_utils.load_compiled_model('risk_assessment') is stale
+
+def test_compiled_forest_memory_maps(data, tmp_path):
+    """Compiled artifacts load with mmap_mode like the other model files."""
+    X, y, X_test = data
+    compiled = compile_forest(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y))
+    path = tmp_path / 'risk_assessment_compiled.joblib'
+    joblib.dump(compiled, path, compress=0)
+    
+    loaded = joblib.load(path, mmap_mode='r')
+    assert isinstance(loaded.threshold, np.memmap)
+    assert np.array_equal(loaded.predict_proba(X_test), compiled.predict_proba(X_test))
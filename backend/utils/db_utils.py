@@ -0,0 +1,23 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING
+INSERT_CONSTRUCTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert
+}
+
+def insert_missing(session, model, rows):
+    """Insert rows whose primary key does not exist yet, leaving existing rows untouched
+    
+    Uses ``INSERT ... ON CONFLICT DO NOTHING`` so that concurrent transactions
+    creating the same row do not fail on the primary key; callers then load
+    the row, which exists either way.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    
+    dialect = session.get_bind().dialect.name
+    if dialect not in INSERT_CONSTRUCTS:
+        raise ValueError(f'Upserts are not supported on {dialect}')
+    session.execute(INSERT_CONSTRUCTS[dialect](model).values(rows).on_conflict_do_nothing())
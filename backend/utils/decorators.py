@@ -0,0 +1,24 @@
+from functools import wraps
+from flask_jwt_extended import get_jwt_identity
+from models.user import User
+
+def user_type_required(*user_types):
+    """Allow only users of the given types; admins are always allowed.
+    
+    Apply below ``jwt_required()`` so the JWT identity has been verified.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            user = User.query.get(get_jwt_identity())
+            if user is None or not user.is_active:
+                return {'message': 'User not found'}, 401
+            if user.user_type != 'admin' and user.user_type not in user_types:
+                return {'message': 'Permission denied'}, 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+admin_required = user_type_required('admin')
+professional_required = user_type_required('professional')
+patient_required = user_type_required('patient')
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+class FeaturePipeline:
+    """Fixed feature ordering plus standardization, applied with NumPy.
+    
+    Built from the scaler fitted at training time and saved next to the
+    model as ``{model_name}_pipeline.joblib``, so serving applies exactly the
+    transformation the model was trained with. Missing features are imputed
+    with the training mean, i.e. they standardize to zero.
+    """
+    
+    def __init__(self, feature_names, mean, scale):
+        self.feature_names = list(feature_names)
+        self.feature_index = {name: index for index, name in enumerate(self.feature_names)}
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+    
+    @classmethod
+    def from_scaler(cls, scaler, feature_names):
+        """Build a pipeline from a fitted StandardScaler"""
+        n_features = len(feature_names)
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+        return cls(feature_names, mean, scale)
+    
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+    
+    def vectorize(self, features):
+        """Order a dict of raw feature values into an unscaled 1D array"""
+        row = np.full(self.n_features, np.nan)
+        for name, value in features.items():
+            index = self.feature_index.get(name)
+            if index is not None and value is not None:
+                row[index] = value
+        return row
+    
+    def to_matrix(self, data):
+        """Arrange raw inputs as an unscaled 2D array in feature order
+        
+        Accepts a dict (one row), a list of dicts, a DataFrame (columns are
+        matched by name) or an array already in feature order.
+        """
+        if isinstance(data, dict):
+            return self.vectorize(data)[np.newaxis, :]
+        if isinstance(data, pd.DataFrame):
+            return data.reindex(columns=self.feature_names).to_numpy(dtype=np.float64)
+        if isinstance(data, (list, tuple)) and data and isinstance(data[0], dict):
+            return np.vstack([self.vectorize(row) for row in data])
+        return np.array(data, dtype=np.float64, ndmin=2)
+    
+    def transform(self, data):
+        """Standardize inputs into the model's feature space"""
+        X = self.to_matrix(data)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f'Expected {self.n_features} features, got {X.shape[1]}')
+        
+        missing = np.isnan(X)
+        if missing.any():
+            X = np.where(missing, self.mean, X)
+        
+        # Same operations, in the same order, as StandardScaler.transform
+        X = X - self.mean
+        X /= self.scale
+        return X
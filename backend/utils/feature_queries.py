@@ -0,0 +1,68 @@
+from sqlalchemy import Float, cast, func
+from __init__ import db
+from models.vital_sign import VitalSign
+from utils.ml_utils import VITAL_SIGN_FIELDS, running_stats_features
+
+def aggregate_vital_signs(patient_ids, recent_limit=None):
+    """Compute per-patient vital sign aggregates in one grouped SQL query
+    
+    Returns ``{patient_id: {vital_type: {count, mean, m2, min, max}}}``. With
+    ``recent_limit`` only each patient's most recent readings are included.
+    No ORM objects are loaded; the database does the scan and grouping.
+    """
+    columns = [VitalSign.patient_id.label('patient_id')]
+    columns += [cast(getattr(VitalSign, field), Float).label(field) for field in VITAL_SIGN_FIELDS]
+    
+    if recent_limit:
+        columns.append(func.row_number().over(
+            partition_by=VitalSign.patient_id,
+            order_by=VitalSign.recorded_at.desc()
+        ).label('recency_rank'))
+    
+    readings = db.session.query(*columns)\
+        .filter(VitalSign.patient_id.in_(list(patient_ids)))\
+        .subquery()
+    
+    aggregates = [readings.c.patient_id]
+    for field in VITAL_SIGN_FIELDS:
+        value = readings.c[field]
+        aggregates += [
+            func.count(value),
+            func.avg(value),
+            func.avg(value * value),
+            func.min(value),
+            func.max(value)
+        ]
+    
+    query = db.session.query(*aggregates).select_from(readings)
+    if recent_limit:
+        query = query.filter(readings.c.recency_rank <= recent_limit)
+    
+    results = {}
+    for row in query.group_by(readings.c.patient_id):
+        patient_stats = {}
+        for index, field in enumerate(VITAL_SIGN_FIELDS):
+            count, mean, mean_sq, minimum, maximum = row[1 + index * 5:6 + index * 5]
+            if not count:
+                continue
+            mean = float(mean)
+            patient_stats[field] = {
+                'count': count,
+                'mean': mean,
+                # Population variance from E[x^2] - E[x]^2, clamped for rounding
+                'm2': count * max(float(mean_sq) - mean * mean, 0.0),
+                'min': float(minimum),
+                'max': float(maximum)
+            }
+        results[row[0]] = patient_stats
+    
+    return results
+
+def query_vital_sign_features(patient_ids, recent_limit=100):
+    """Get process_vital_signs-style features for each patient from SQL aggregates"""
+    features = {}
+    for patient_id, patient_stats in aggregate_vital_signs(patient_ids, recent_limit).items():
+        features[patient_id] = {}
+        for vital_type, stats in patient_stats.items():
+            features[patient_id].update(running_stats_features(vital_type, stats))
+    return features
@@ -0,0 +1,89 @@
+import threading
+from collections import defaultdict
+
+# Default histogram buckets, suitable for millisecond latencies and batch sizes
+DEFAULT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+class Histogram:
+    """Cumulative fixed-bucket histogram."""
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, value):
+        """Record a single observation"""
+        self.count += 1
+        self.sum += value
+        for index, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                self.bucket_counts[index] += 1
+                return
+        self.bucket_counts[-1] += 1
+    
+    def snapshot(self):
+        """Return histogram state as a JSON-serializable dict"""
+        cumulative = 0
+        buckets = {}
+        for upper_bound, bucket_count in zip(self.buckets + ('+Inf',), self.bucket_counts):
+            cumulative += bucket_count
+            buckets[str(upper_bound)] = cumulative
+        
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'buckets': buckets
+        }
+
+class MetricsRegistry:
+    """Thread-safe, process-local store of counters, gauges and histograms."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._gauges = {}
+        self._histograms = {}
+    
+    @staticmethod
+    def _key(name, labels):
+        if not labels:
+            return name
+        label_str = ','.join(f'{key}={labels[key]}' for key in sorted(labels))
+        return f'{name}{{{label_str}}}'
+    
+    def inc(self, name, value=1, **labels):
+        """Increment a counter"""
+        with self._lock:
+            self._counters[self._key(name, labels)] += value
+    
+    def set_gauge(self, name, value, **labels):
+        """Set a gauge to the given value"""
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+    
+    def observe(self, name, value, buckets=DEFAULT_BUCKETS, **labels):
+        """Record an observation in a histogram"""
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+    
+    def snapshot(self):
+        """Return all metrics as a JSON-serializable dict"""
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'gauges': dict(self._gauges),
+                'histograms': {
+                    key: histogram.snapshot()
+                    for key, histogram in self._histograms.items()
+                }
+            }
+
+# Global metrics registry
+metrics = MetricsRegistry()
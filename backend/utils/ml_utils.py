@@ -1,23 +1,121 @@
+import os
 import joblib
 import numpy as np
-import pandas as pd
-from sklearn.preprocessing import StandardScaler
 from datetime import datetime, timedelta
+from config import Config
+from utils.model_registry import model_registry
+from utils.model_cache import model_cache
+from utils.tree_compiler import COMPILED_FORMAT_VERSION
 
-def load_model(model_name):
-    """Load ML model from file"""
+# Registry version the trained models are served from, once resolved
+_UNRESOLVED = object()
+_served_version = _UNRESOLVED
+
+def get_served_version():
+    """Get the registry version the trained models are served from, or None without a registry
+    
+    It is resolved on first use and afterwards only moved by
+    ``refresh_served_version`` once the new version's models are loaded.
+    Requests resolve it once and load every artifact from that version, so
+    a model is never paired with another version's pipeline.
+    """
+    global _served_version
+    if _served_version is _UNRESOLVED:
+        _served_version = model_registry.current_version()
+    return _served_version
+
+def refresh_served_version():
+    """Preload the models of a newly promoted registry version, then serve from it
+    
+    Returns whether the served version changed. Called from the registry
+    watcher thread, so requests never load a new version synchronously.
+    """
+    global _served_version
+    version = model_registry.current_version()
+    if version is None or version == get_served_version():
+        return False
+    
+    # Nothing is frozen: this process is already serving, not about to fork
+    preload_models(version=version, freeze=False)
+    _served_version = version
+    return True
+
+def resolve_model_path(model_name, version=None):
+    """Get the artifact path for a model in a registry version (the served one by default)
+    
+    Without a model registry, models are read from the ``models`` directory.
+    """
+    version = version or get_served_version()
+    if version is None:
+        return f'models/{model_name}.joblib'
+    
+    registry_path = model_registry.artifact_path(f'{model_name}.joblib', version)
+    if registry_path is None:
+        raise FileNotFoundError(f'Model version {version} has no {model_name} artifact')
+    return registry_path
+
+# Models served by the ML API, preloaded before workers fork
+SERVED_MODELS = [
+    'risk_assessment',
+    'health_prediction_vital_signs',
+    'health_prediction_lab_results',
+    'anomaly_detection',
+    'risk_assessment_compiled',
+    'anomaly_detection_compiled',
+    'risk_assessment_pipeline',
+    'health_prediction_vital_signs_pipeline',
+    'health_prediction_lab_results_pipeline',
+    'anomaly_detection_pipeline',
+    'health_prediction_vital_signs_intervals',
+    'health_prediction_lab_results_intervals'
+]
+
+def _cache_name(model_name, version):
+    return model_name if version is None else f'{model_name}@{version}'
+
+def preload_models(model_names=SERVED_MODELS, version=None, freeze=True):
+    """Load served models of a registry version (the served one by default) into the process-wide cache"""
+    version = version or get_served_version()
+    model_names = {_cache_name(model_name, version): model_name for model_name in model_names}
+    return model_cache.preload(
+        list(model_names),
+        lambda cache_name: resolve_model_path(model_names[cache_name], version),
+        freeze=freeze
+    )
+
+def load_model(model_name, version=None):
+    """Load ML model from file, from a registry version (the served one by default)"""
+    version = version or get_served_version()
     try:
-        model_path = f'models/{model_name}.joblib'
-        return joblib.load(model_path)
+        return model_cache.get(_cache_name(model_name, version), lambda: resolve_model_path(model_name, version))
     except Exception as e:
         raise Exception(f'Error loading model {model_name}: {str(e)}')
 
-def preprocess_data(data, model_type):
+def load_compiled_model(model_name, version=None):
+    """Load the array-compiled form of a tree ensemble, falling back to the sklearn model"""
+    version = version or get_served_version()
+    if Config.COMPILED_TREES:
+        try:
+            compiled_path = resolve_model_path(f'{model_name}_compiled', version)
+        except FileNotFoundError:
+            compiled_path = None
+        if compiled_path is not None and os.path.exists(compiled_path):
+            compiled = load_model(f'{model_name}_compiled', version)
+            # Artifacts exported by an older compiler must be re-exported first
+            if getattr(compiled, 'format_version', 1) == COMPILED_FORMAT_VERSION:
+                return compiled
+    return load_model(model_name, version)
+
+def load_pipeline(model_name, version=None):
+    """Load the feature pipeline saved alongside a trained model"""
+    return load_model(f'{model_name}_pipeline', version)
+
+def preprocess_data(data, model_type, prediction_type=None):
     """Preprocess data for ML models"""
     if model_type == 'risk_assessment':
         return preprocess_risk_assessment_data(data)
     elif model_type == 'health_prediction':
-        return preprocess_prediction_data(data)
+        return preprocess_prediction_data(data, prediction_type)
     elif model_type == 'anomaly_detection':
         return preprocess_anomaly_detection_data(data)
     else:
@@ -25,6 +123,13 @@ def preprocess_data(data, model_type):
 
 def preprocess_risk_assessment_data(data):
     """Preprocess data for risk assessment model"""
+    features = build_risk_assessment_features(data)
+    
+    # Order, impute and scale with the parameters saved at training time
+    return load_pipeline('risk_assessment').transform(features)
+
+def build_risk_assessment_features(data):
+    """Extract raw (unscaled) risk assessment features from gathered patient data"""
     # Extract relevant features
     features = {
         'age': calculate_age(data['patient_info']['date_of_birth']),
@@ -32,51 +137,48 @@ def preprocess_risk_assessment_data(data):
         'bmi': calculate_bmi(data['patient_info']['height'], data['patient_info']['weight'])
     }
     
-    # Process vital signs
-    vital_signs = process_vital_signs(data['vital_signs'])
-    features.update(vital_signs)
+    # Process vital signs, preferring aggregates computed by the database
+    if 'vital_sign_features' in data:
+        features.update(data['vital_sign_features'])
+    else:
+        features.update(process_vital_signs(data['vital_signs']))
     
     # Process medical records
     medical_features = process_medical_records(data['medical_records'])
     features.update(medical_features)
     
-    # Convert to DataFrame and handle missing values
-    df = pd.DataFrame([features])
-    df = handle_missing_values(df)
-    
-    # Scale features
-    scaler = StandardScaler()
-    scaled_features = scaler.fit_transform(df)
+    # Personal baselines maintained on write
+    features.update(data.get('baseline_features', {}))
     
-    return scaled_features
+    return features
 
-def preprocess_prediction_data(data):
+def preprocess_prediction_data(data, prediction_type):
     """Preprocess data for health prediction model"""
+    # Scale features
+    return load_pipeline(f'health_prediction_{prediction_type}').transform(build_prediction_features(data))
+
+def build_prediction_features(data):
+    """Extract raw (unscaled) health prediction features from gathered patient data"""
     # Create time series features
     time_series = create_time_series_features(data)
     
     # Handle missing values and interpolate
-    time_series = handle_missing_values(time_series, method='interpolate')
-    
-    # Scale features
-    scaler = StandardScaler()
-    scaled_features = scaler.fit_transform(time_series)
-    
-    return scaled_features
+    return handle_missing_values(time_series, method='interpolate')
 
 def preprocess_anomaly_detection_data(data):
     """Preprocess data for anomaly detection model"""
+    # Scale features
+    return load_pipeline('anomaly_detection').transform(build_anomaly_detection_features(data))
+
+def build_anomaly_detection_features(data):
+    """Extract raw (unscaled) anomaly detection features from gathered patient data"""
     # Extract recent measurements
     recent_data = extract_recent_measurements(data)
     
     # Calculate statistical features
     statistical_features = calculate_statistical_features(recent_data)
-    
-    # Scale features
-    scaler = StandardScaler()
-    scaled_features = scaler.fit_transform(statistical_features)
-    
-    return scaled_features
+    statistical_features.update(data.get('baseline_features', {}))
+    return statistical_features
 
 def calculate_age(date_of_birth):
     """Calculate age from date of birth"""
@@ -97,6 +199,36 @@ def calculate_bmi(height, weight):
     height_m = height / 100  # Convert cm to m
     return weight / (height_m ** 2)
 
+# Measurement columns of the VitalSign model
+VITAL_SIGN_FIELDS = [
+    'heart_rate',
+    'blood_pressure_systolic',
+    'blood_pressure_diastolic',
+    'temperature',
+    'respiratory_rate',
+    'oxygen_saturation'
+]
+
+def vital_sign_measurements(vital_sign):
+    """Get (measurement_type, value) pairs from a vital sign row or dict"""
+    if isinstance(vital_sign, dict):
+        get = vital_sign.get
+    else:
+        get = lambda field: getattr(vital_sign, field, None)
+    
+    # Single-measurement readings carry their type explicitly
+    if get('measurement_type') is not None and get('value') is not None:
+        return [(get('measurement_type'), float(get('value')))]
+    
+    return [(field, float(get(field))) for field in VITAL_SIGN_FIELDS if get(field) is not None]
+
+def diagnosis_codes(record):
+    """Get the diagnosis codes of a medical record row or dict"""
+    diagnosis = record.get('diagnosis') if isinstance(record, dict) else record.diagnosis
+    if not diagnosis:
+        return []
+    return list(diagnosis.get('codes', []))
+
 def process_vital_signs(vital_signs):
     """Process vital signs data"""
     vital_features = {}
@@ -104,19 +236,90 @@ def process_vital_signs(vital_signs):
     if not vital_signs:
         return vital_features
     
-    # Calculate average values for each vital sign type
-    vital_types = set(v['measurement_type'] for v in vital_signs)
+    # Flatten readings into columns: one pass over the input
+    vital_types = []
+    values = []
+    for vital_sign in vital_signs:
+        for vital_type, value in vital_sign_measurements(vital_sign):
+            vital_types.append(vital_type)
+            values.append(value)
     
-    for vital_type in vital_types:
-        type_readings = [v['value'] for v in vital_signs if v['measurement_type'] == vital_type]
-        if type_readings:
-            vital_features[f'{vital_type}_avg'] = np.mean(type_readings)
-            vital_features[f'{vital_type}_std'] = np.std(type_readings)
-            vital_features[f'{vital_type}_min'] = np.min(type_readings)
-            vital_features[f'{vital_type}_max'] = np.max(type_readings)
+    if not values:
+        return vital_features
+    
+    # Vectorized group-by on measurement type
+    type_names, type_index = np.unique(vital_types, return_inverse=True)
+    values = np.asarray(values, dtype=np.float64)
+    counts = np.bincount(type_index)
+    means = np.bincount(type_index, weights=values) / counts
+    deviations = values - means[type_index]
+    stds = np.sqrt(np.bincount(type_index, weights=deviations * deviations) / counts)
+    
+    # Min/max over contiguous runs of each type
+    order = np.argsort(type_index, kind='stable')
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    mins = np.minimum.reduceat(values[order], starts)
+    maxs = np.maximum.reduceat(values[order], starts)
+    
+    # Calculate average values for each vital sign type
+    for index, vital_type in enumerate(type_names):
+        vital_features[f'{vital_type}_avg'] = means[index]
+        vital_features[f'{vital_type}_std'] = stds[index]
+        vital_features[f'{vital_type}_min'] = mins[index]
+        vital_features[f'{vital_type}_max'] = maxs[index]
     
     return vital_features
 
+def running_stats_features(vital_type, stats):
+    """Turn count/mean/m2/min/max aggregates into process_vital_signs features"""
+    return {
+        f'{vital_type}_avg': stats['mean'],
+        f'{vital_type}_std': float(np.sqrt(stats['m2'] / stats['count'])),
+        f'{vital_type}_min': stats['min'],
+        f'{vital_type}_max': stats['max']
+    }
+
+def baseline_features(baselines):
+    """Turn per-type PatientBaseline rows into model features"""
+    features = {}
+    for measurement_type, baseline in baselines.items():
+        features[f'{measurement_type}_baseline_mean'] = baseline.mean
+        features[f'{measurement_type}_baseline_std'] = baseline.std
+        features[f'{measurement_type}_ewma'] = baseline.ewma
+        features[f'{measurement_type}_ewm_std'] = baseline.ewm_std
+    return features
+
+def top_contributors(contributions, feature_names, top_k=5):
+    """Name the features with the largest positive contributions, per row
+    
+    ``contributions`` has one row per prediction and one column per feature.
+    """
+    contributions = np.atleast_2d(contributions)
+    ranked = np.argsort(-contributions, axis=1, kind='stable')[:, :top_k]
+    
+    return [
+        [feature_names[index] for index in row_ranking if row_contributions[index] > 0]
+        for row_ranking, row_contributions in zip(ranked, contributions)
+    ]
+
+def interval_quantiles(level=Config.CONFIDENCE_INTERVAL_LEVEL):
+    """Lower and upper quantiles of a central interval at the given level"""
+    tail = (1 - level) / 2
+    return tail, 1 - tail
+
+def tree_intervals(per_tree, level=Config.CONFIDENCE_INTERVAL_LEVEL):
+    """Central interval of per-tree predictions for every row at once
+    
+    ``per_tree`` has shape (n_samples, n_trees, ...); quantiles are taken
+    across the tree axis in one call and returned as (lower, upper).
+    """
+    lower, upper = np.quantile(per_tree, interval_quantiles(level), axis=1)
+    return lower, upper
+
+def tree_agreement(per_tree, predicted):
+    """Fraction of trees whose own most probable class is each row's prediction"""
+    return (np.argmax(per_tree, axis=2) == np.asarray(predicted)[:, np.newaxis]).mean(axis=1)
+
 def process_medical_records(records):
     """Process medical records data"""
     features = {}
@@ -125,13 +328,12 @@ def process_medical_records(records):
         return features
     
     # Extract diagnosis codes
-    diagnosis_codes = []
+    codes = []
     for record in records:
-        if record.get('diagnosis'):
-            diagnosis_codes.extend(record['diagnosis'].get('codes', []))
+        codes.extend(diagnosis_codes(record))
     
     # Count unique diagnoses
-    features['diagnosis_count'] = len(set(diagnosis_codes))
+    features['diagnosis_count'] = len(set(codes))
     
     # Calculate recency of last record
     latest_record = max(records, key=lambda x: x['record_date'])
@@ -145,15 +347,21 @@ def create_time_series_features(data):
     # Implementation for time series feature creation
     pass
 
-def extract_recent_measurements(data):
+def extract_recent_measurements(data, window_size=Config.ANOMALY_WINDOW_SIZE):
     """Extract recent measurements for anomaly detection"""
-    # Implementation for recent measurement extraction
-    pass
+    # Vital signs are ordered newest first
+    return data.get('vital_signs', [])[:window_size]
 
 def calculate_statistical_features(data):
     """Calculate statistical features for data"""
-    # Implementation for statistical feature calculation
-    pass
+    features = process_vital_signs(data)
+    
+    # The newest reading of each type, as seen by the streaming scorer
+    for vital_sign in reversed(data):
+        for vital_type, value in vital_sign_measurements(vital_sign):
+            features[f'{vital_type}_latest'] = value
+    
+    return features
 
 def handle_missing_values(df, method='mean'):
     """Handle missing values in DataFrame"""
@@ -0,0 +1,154 @@
+import gc
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+import joblib
+from config import Config
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def file_checksum(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+class _CacheEntry:
+    __slots__ = ('model', 'path', 'signature', 'checksum', 'size', 'checked_at')
+    
+    def __init__(self, model, path, signature, checksum, size):
+        self.model = model
+        self.path = path
+        self.signature = signature
+        self.checksum = checksum
+        self.size = size
+        self.checked_at = time.monotonic()
+
+class ModelCache:
+    """Process-resident cache of deserialized models.
+    
+    Entries are revalidated against the artifact on disk at most once every
+    ``check_interval`` seconds, so steady-state lookups never touch the
+    filesystem. A changed mtime or size triggers a checksum comparison and
+    the model is only reloaded when the content actually changed. Entries
+    are evicted least recently used first once the artifacts' on-disk size
+    exceeds ``max_bytes``.
+    """
+    
+    def __init__(self, max_bytes=1 << 30, check_interval=10.0, loader=joblib.load):
+        self.max_bytes = max_bytes
+        self.check_interval = check_interval
+        self.loader = loader
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self.total_bytes = 0
+    
+    def get(self, name, resolve_path):
+        """Return the model ``name``, loading it from ``resolve_path()`` if needed"""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and time.monotonic() - entry.checked_at < self.check_interval:
+                self._entries.move_to_end(name)
+                metrics.inc('model_cache_hits', model=name)
+                return entry.model
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        
+        # One loader per model; concurrent callers wait for its result
+        with load_lock:
+            path = resolve_path()
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            
+            with self._lock:
+                entry = self._entries.get(name)
+            
+            if entry is not None and entry.path == path:
+                if entry.signature == signature or entry.checksum == file_checksum(path):
+                    entry.signature = signature
+                    entry.checked_at = time.monotonic()
+                    metrics.inc('model_cache_hits', model=name)
+                    return entry.model
+            
+            return self._load(name, path, signature, stat.st_size)
+    
+    def _load(self, name, path, signature, size):
+        started_at = time.perf_counter()
+        checksum = file_checksum(path)
+        model = self.loader(path)
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        
+        metrics.inc('model_cache_loads', model=name)
+        metrics.observe('model_load_ms', elapsed_ms, model=name)
+        logger.info(f"Loaded model {name} from {path} in {elapsed_ms:.1f}ms")
+        
+        with self._lock:
+            previous = self._entries.pop(name, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            
+            self._entries[name] = _CacheEntry(model, path, signature, checksum, size)
+            self.total_bytes += size
+            
+            # Always keep the entry just loaded, even if it alone exceeds the cap
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                evicted_name, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+                metrics.inc('model_cache_evictions', model=evicted_name)
+            
+            metrics.set_gauge('model_cache_bytes', self.total_bytes)
+        
+        return model
+    
+    def preload(self, names, resolve_path, freeze=True):
+        """Load models ahead of time, e.g. in a server master before forking
+        
+        ``resolve_path(name)`` maps a model name to its artifact path. Missing
+        artifacts are skipped with a warning. With ``freeze``, every tracked
+        object is then moved to the GC's permanent generation so that
+        collections in forked workers do not write to, and therefore copy,
+        the shared pages.
+        """
+        loaded = []
+        for name in names:
+            try:
+                self.get(name, partial(resolve_path, name))
+                loaded.append(name)
+            except FileNotFoundError:
+                logger.warning(f"Skipping preload of model {name}: artifact not found")
+        
+        if freeze:
+            gc.collect()
+            gc.freeze()
+        return loaded
+    
+    def clear(self):
+        """Drop every cached model"""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+            metrics.set_gauge('model_cache_bytes', 0)
+    
+    def stats(self):
+        """Get the cached model names and total size"""
+        with self._lock:
+            return {
+                'models': list(self._entries),
+                'total_bytes': self.total_bytes,
+                'max_bytes': self.max_bytes
+            }
+
+# Global model cache instance. Uncompressed joblib artifacts are memory-mapped
+# so their large arrays are backed by the page cache instead of private memory.
+model_cache = ModelCache(
+    max_bytes=Config.MODEL_CACHE_MAX_MB * 1024 * 1024,
+    check_interval=Config.MODEL_CACHE_CHECK_INTERVAL,
+    loader=partial(joblib.load, mmap_mode=Config.MODEL_MMAP_MODE or None)
+)
@@ -0,0 +1,116 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from config import Config
+
+MANIFEST_NAME = 'manifest.json'
+
+class ModelRegistry:
+    """Versioned store of model artifacts with an atomically updated manifest.
+    
+    Layout under ``root``::
+    
+        manifest.json              {"current": ..., "previous": ..., "versions": {...}}
+        versions/<version>/...     artifact files for that version
+    
+    Readers only ever see a complete manifest: it is rewritten to a temporary
+    file and moved into place with ``os.replace``.
+    """
+    
+    def __init__(self, root=None):
+        self.root = root or Config.MODEL_REGISTRY_PATH
+        self.manifest_path = os.path.join(self.root, MANIFEST_NAME)
+    
+    def read_manifest(self):
+        """Load the manifest, or an empty one if the registry is new"""
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'current': None, 'previous': None, 'versions': {}}
+    
+    def _write_manifest(self, manifest):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.manifest-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.manifest_path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    
+    def version_path(self, version=None):
+        """Directory holding a version's artifacts (the current one by default)"""
+        version = version or self.current_version()
+        if version is None:
+            return None
+        return os.path.join(self.root, 'versions', version)
+    
+    def current_version(self):
+        """Version currently promoted for serving"""
+        return self.read_manifest().get('current')
+    
+    def list_versions(self):
+        """Registered versions with their metadata"""
+        return self.read_manifest()['versions']
+    
+    def register(self, version, source_path, metadata=None, ignore=None):
+        """Copy a directory (or single file) of artifacts into the registry
+        
+        ``ignore`` is a ``shutil.copytree`` ignore callable for files in the
+        directory that are not artifacts.
+        """
+        manifest = self.read_manifest()
+        if version in manifest['versions']:
+            raise ValueError(f'Model version {version} is already registered')
+        
+        target_path = self.version_path(version)
+        # Stage inside the registry so the final rename stays on one filesystem
+        os.makedirs(self.root, exist_ok=True)
+        staging_path = tempfile.mkdtemp(dir=self.root, prefix=f'.staging-{version}-')
+        try:
+            if os.path.isdir(source_path):
+                shutil.copytree(source_path, staging_path, dirs_exist_ok=True, ignore=ignore)
+            else:
+                shutil.copy2(source_path, staging_path)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            os.replace(staging_path, target_path)
+        except Exception:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            raise
+        
+        manifest['versions'][version] = {
+            'registered_at': datetime.utcnow().isoformat(),
+            'files': sorted(os.listdir(target_path)),
+            'metadata': metadata or {}
+        }
+        self._write_manifest(manifest)
+        return target_path
+    
+    def promote(self, version):
+        """Make ``version`` the one served by all workers"""
+        manifest = self.read_manifest()
+        if version not in manifest['versions']:
+            raise ValueError(f'Unknown model version: {version}')
+        
+        if manifest.get('current') != version:
+            manifest['previous'] = manifest.get('current')
+            manifest['current'] = version
+            manifest['promoted_at'] = datetime.utcnow().isoformat()
+            self._write_manifest(manifest)
+    
+    def artifact_path(self, filename, version=None):
+        """Path of an artifact in the given (or current) version, if present"""
+        version_path = self.version_path(version)
+        if version_path is None:
+            return None
+        path = os.path.join(version_path, filename)
+        return path if os.path.exists(path) else None
+
+# Global registry rooted at Config.MODEL_REGISTRY_PATH
+model_registry = ModelRegistry()
@@ -0,0 +1,49 @@
+import time
+from flask import g, has_request_context
+from config import Config
+from utils.metrics import metrics
+
+# Histogram buckets for single stages, finer than request-level latencies
+STAGE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+class StageTimer:
+    """Time one stage of ML request handling.
+    
+    Each timed block is recorded in the ``ml_stage_ms`` histogram labelled by
+    model and stage and, inside a request, appended to the request's stage
+    breakdown. ``elapsed_ms`` is available once the block has exited.
+    """
+    
+    def __init__(self, stage: str, model: str = 'none'):
+        self.stage = stage
+        self.model = model
+        self.elapsed_ms = None
+    
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.elapsed_ms = (time.perf_counter() - self._started) * 1000
+        metrics.observe('ml_stage_ms', self.elapsed_ms, buckets=STAGE_BUCKETS, model=self.model, stage=self.stage)
+        if has_request_context():
+            g.setdefault('stage_timings', []).append((f'{self.model}.{self.stage}', self.elapsed_ms))
+        return False
+
+def stage_timings():
+    """Stages timed so far in the current request, in order"""
+    return g.get('stage_timings', []) if has_request_context() else []
+
+def format_server_timing(timings):
+    """Render timings as a Server-Timing header value"""
+    return ', '.join(f'{name};dur={elapsed_ms:.2f}' for name, elapsed_ms in timings)
+
+def init_app(app):
+    """Attach the per-request stage breakdown as a Server-Timing header when enabled"""
+    @app.after_request
+    def add_stage_timing_header(response):
+        if Config.STAGE_TIMING_HEADER:
+            timings = stage_timings()
+            if timings:
+                response.headers['Server-Timing'] = format_server_timing(timings)
+        return response
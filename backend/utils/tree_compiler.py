@@ -0,0 +1,259 @@
+import weakref
+import numpy as np
+from sklearn.ensemble import IsolationForest, RandomForestClassifier
+
+# Bumped whenever compiled artifacts change meaning; older ones are not served
+COMPILED_FORMAT_VERSION = 2
+
+def average_path_length(n_samples):
+    """Expected path length of an unsuccessful BST search over n samples, as sklearn's IsolationForest uses"""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    lengths = np.zeros(n_samples.shape)
+    lengths[n_samples == 2] = 1.0
+    larger = n_samples > 2
+    lengths[larger] = (
+        2.0 * (np.log(n_samples[larger] - 1.0) + np.euler_gamma)
+        - 2.0 * (n_samples[larger] - 1.0) / n_samples[larger]
+    )
+    return lengths
+
+def node_depths(tree):
+    """Depth of every node of a fitted tree, counting the root as 1"""
+    depths = np.zeros(tree.node_count, dtype=np.float64)
+    depths[0] = 1.0
+    level = np.array([0])
+    while level.size:
+        # Step one level down from every internal node
+        level = level[tree.children_left[level] != -1]
+        children = np.concatenate([tree.children_left[level], tree.children_right[level]])
+        depths[children] = np.tile(depths[level], 2) + 1.0
+        level = children
+    return depths
+
+def class_distributions(tree, n_classes):
+    """Per-node class fractions of a fitted classification tree
+    
+    Before scikit-learn 1.4 ``tree_.value`` holds weighted class counts that
+    predict_proba divides by their sum; later versions store the fractions
+    and return them as they are. Both are reproduced exactly.
+    """
+    value = tree.value[:, 0, :n_classes]
+    normalizer = value.sum(axis=1)[:, np.newaxis]
+    if np.allclose(normalizer, 1.0):
+        return value.copy()
+    normalizer[normalizer == 0.0] = 1.0
+    return value / normalizer
+
+class CompiledForest:
+    """A tree ensemble flattened into contiguous node arrays.
+    
+    Node ``i`` of the ensemble tests ``X[:, feature[i]] <= threshold[i]`` and
+    continues at ``left[i]`` or ``right[i]``; leaves point to themselves.
+    ``apply`` advances every (row, tree) pair one level per step with NumPy
+    gathers instead of looping over estimators in Python, dropping pairs as
+    they reach a leaf. Inputs are rounded to float32 first, as sklearn does,
+    so the comparisons and therefore the leaves reached are exactly sklearn's.
+    """
+    
+    def __init__(self, trees, features=None):
+        self.format_version = COMPILED_FORMAT_VERSION
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+        self.n_trees = len(trees)
+        self.n_nodes = int(offsets[-1])
+        self.roots = offsets[:-1].astype(np.intp)
+        
+        self.feature = np.zeros(self.n_nodes, dtype=np.intp)
+        self.threshold = np.zeros(self.n_nodes, dtype=np.float64)
+        self.left = np.zeros(self.n_nodes, dtype=np.intp)
+        self.right = np.zeros(self.n_nodes, dtype=np.intp)
+        self.missing_go_left = np.zeros(self.n_nodes, dtype=bool)
+        
+        for index, tree in enumerate(trees):
+            nodes = slice(offsets[index], offsets[index + 1])
+            node_ids = np.arange(offsets[index], offsets[index + 1])
+            is_leaf = tree.children_left == -1
+            
+            feature = tree.feature.copy()
+            if features is not None:
+                # Trees fitted on a feature subset index into that subset
+                feature[~is_leaf] = np.asarray(features[index])[feature[~is_leaf]]
+            feature[is_leaf] = 0
+            
+            self.feature[nodes] = feature
+            self.threshold[nodes] = tree.threshold
+            self.left[nodes] = np.where(is_leaf, node_ids, tree.children_left + offsets[index])
+            self.right[nodes] = np.where(is_leaf, node_ids, tree.children_right + offsets[index])
+            if hasattr(tree, 'missing_go_to_left'):
+                self.missing_go_left[nodes] = tree.missing_go_to_left.astype(bool)
+        
+        # Children packed pairwise so one gather picks the branch taken
+        self.children = np.empty(2 * self.n_nodes, dtype=np.intp)
+        self.children[0::2] = self.left
+        self.children[1::2] = self.right
+        self.is_leaf = self.left == np.arange(self.n_nodes)
+    
+    def _prepare(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        # Same rounding as sklearn's float32 input validation
+        return X.astype(np.float32).astype(np.float64)
+    
+    def _walk(self, X):
+        """Advance every (row, tree) pair to its leaf, yielding each step taken
+        
+        Yields ``(rows, current, next_node)`` for the pairs still moving, and
+        returns the final node array of shape (n_samples * n_trees,).
+        """
+        X = self._prepare(X)
+        n_samples, n_features = X.shape
+        has_missing = np.isnan(X).any()
+        flat_X = X.ravel()
+        
+        # One entry per (sample, tree); only entries not yet at a leaf are stepped
+        node = np.tile(self.roots, n_samples)
+        sample = np.repeat(np.arange(n_samples), self.n_trees)
+        active = np.arange(node.shape[0])
+        
+        while active.size:
+            current = node.take(active)
+            rows = sample.take(active)
+            values = flat_X.take(rows * n_features + self.feature.take(current))
+            go_right = ~(values <= self.threshold.take(current))
+            if has_missing:
+                missing = np.isnan(values)
+                go_right[missing] = ~self.missing_go_left.take(current[missing])
+            next_node = self.children.take(2 * current + go_right)
+            node[active] = next_node
+            yield rows, current, next_node
+            active = active[~self.is_leaf.take(next_node)]
+        
+        return node
+    
+    def apply(self, X):
+        """Return the leaf reached in every tree, shape (n_samples, n_trees)"""
+        walk = self._walk(X)
+        while True:
+            try:
+                next(walk)
+            except StopIteration as done:
+                return done.value.reshape(-1, self.n_trees)
+    
+    def _accumulate(self, leaf_values):
+        """Sum per-tree outputs in estimator order, as sklearn's += loop does"""
+        # cumsum adds strictly left to right, unlike the pairwise np.sum
+        return np.cumsum(leaf_values, axis=1)[:, -1]
+
+class CompiledRandomForestClassifier(CompiledForest):
+    """Drop-in predict/predict_proba for a fitted RandomForestClassifier"""
+    
+    def __init__(self, model):
+        super().__init__([estimator.tree_ for estimator in model.estimators_])
+        self.classes_ = model.classes_
+        self.n_classes_ = model.n_classes_
+        self.n_features_in_ = model.n_features_in_
+        self.feature_importances_ = model.feature_importances_
+        
+        # Per-node class distributions, as each tree's predict_proba returns them
+        self.value = np.vstack([
+            class_distributions(estimator.tree_, self.n_classes_) for estimator in model.estimators_
+        ])
+        
+        # Path-based (Saabas) attribution terms: the change in class
+        # distribution from a node to each child, credited to the split feature
+        parent = np.arange(self.n_nodes)
+        parent[self.left[~self.is_leaf]] = np.flatnonzero(~self.is_leaf)
+        parent[self.right[~self.is_leaf]] = np.flatnonzero(~self.is_leaf)
+        self.node_delta = self.value - self.value[parent]
+        self.bias = self.value[self.roots].mean(axis=0)
+    
+    def per_tree_proba(self, X):
+        """Class distribution from every tree, shape (n_samples, n_trees, n_classes)"""
+        return self.value[self.apply(X)]
+    
+    def proba_from_trees(self, per_tree):
+        """Average per-tree distributions exactly as predict_proba does"""
+        proba = self._accumulate(per_tree)
+        proba /= self.n_trees
+        return proba
+    
+    def predict_proba(self, X):
+        return self.proba_from_trees(self.per_tree_proba(X))
+    
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+    
+    def contributions(self, X):
+        """Per-feature contributions to each class probability
+        
+        Returns an array of shape (n_samples, n_features, n_classes) such that
+        ``bias + contributions.sum(axis=1)`` equals ``predict_proba(X)`` up
+        to rounding. Costs one extra walk of the trees.
+        """
+        n_samples = np.asarray(X).reshape(-1, self.n_features_in_).shape[0]
+        totals = np.zeros((n_samples * self.n_features_in_, self.n_classes_))
+        
+        for rows, current, next_node in self._walk(X):
+            cells = rows * self.n_features_in_ + self.feature.take(current)
+            delta = self.node_delta[next_node]
+            for class_index in range(self.n_classes_):
+                totals[:, class_index] += np.bincount(cells, weights=delta[:, class_index],
+                                                      minlength=totals.shape[0])
+        
+        totals /= self.n_trees
+        return totals.reshape(n_samples, self.n_features_in_, self.n_classes_)
+
+class CompiledIsolationForest(CompiledForest):
+    """Drop-in score_samples/decision_function/predict for a fitted IsolationForest"""
+    
+    def __init__(self, model):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        # Trees only see a column subset when max_features is below the input width
+        subsample_features = model.estimators_[0].n_features_in_ != model.n_features_in_
+        super().__init__(trees, features=model.estimators_features_ if subsample_features else None)
+        self.offset_ = model.offset_
+        self.n_features_in_ = model.n_features_in_
+        
+        # Path length contributed by ending in each node
+        self.depth_term = np.concatenate([
+            node_depths(tree) + average_path_length(tree.n_node_samples) - 1.0 for tree in trees
+        ])
+        self.denominator = self.n_trees * average_path_length([model.max_samples_])
+    
+    def score_samples(self, X):
+        depths = self._accumulate(self.depth_term[self.apply(X)])
+        scores = 2 ** (
+            -np.divide(depths, self.denominator, out=np.ones_like(depths), where=self.denominator != 0)
+        )
+        return -scores
+    
+    def decision_function(self, X):
+        return self.score_samples(X) - self.offset_
+    
+    def predict(self, X):
+        decision = self.decision_function(X)
+        is_inlier = np.ones(decision.shape[0], dtype=int)
+        is_inlier[decision < 0] = -1
+        return is_inlier
+
+def compile_forest(model):
+    """Flatten a fitted RandomForestClassifier or IsolationForest"""
+    if isinstance(model, RandomForestClassifier):
+        if model.n_outputs_ != 1:
+            raise ValueError('Only single-output forests can be compiled')
+        return CompiledRandomForestClassifier(model)
+    if isinstance(model, IsolationForest):
+        return CompiledIsolationForest(model)
+    raise TypeError(f'Cannot compile model of type {type(model).__name__}')
+
+# Compiled copies of sklearn models, for callers handed an uncompiled forest
+_compiled_views = weakref.WeakKeyDictionary()
+
+def compiled_view(model):
+    """Return ``model`` if already compiled, else a compiled copy cached per model object"""
+    if isinstance(model, CompiledForest):
+        return model
+    compiled = _compiled_views.get(model)
+    if compiled is None:
+        compiled = _compiled_views[model] = compile_forest(model)
+    return compiled